@@ -0,0 +1,3 @@
+"""
+r-Gather benchmark suite (run with `python -m benchmarks.run`)
+"""
@@ -0,0 +1,52 @@
+# generators.py
+import numpy as np
+
+def uniform(n: int, d: int, seed: int = 0) -> np.ndarray:
+    """
+    Points uniform in the unit cube
+    """
+    return np.random.default_rng(seed).uniform(0, 1, size=(n, d))
+
+def gaussian_blobs(n: int, d: int, seed: int = 0, blobs: int = 10, spread: float = 0.02) -> np.ndarray:
+    """
+    Isotropic Gaussian clusters around centers uniform in the unit cube,
+    with unequal blob sizes
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform(0, 1, size=(blobs, d))
+    weights = rng.dirichlet(np.ones(blobs))
+    labels = rng.choice(blobs, size=n, p=weights)
+    return centers[labels] + rng.normal(0, spread, size=(n, d))
+
+def chain(n: int, d: int, seed: int = 0) -> np.ndarray:
+    """
+    Adversarial chain: points along a line with gaps growing geometrically
+
+    Nearly every pairwise distance is distinct, many candidate radii pass
+    Condition 1 before Condition 2 does, and the greedy centers change
+    with every R, which defeats flow warm starts.
+    """
+    rng = np.random.default_rng(seed)
+    gaps = np.geomspace(1.0, 4.0, n - 1) * rng.uniform(0.9, 1.1, size=n - 1) if n > 1 else np.empty(0)
+    positions = np.concatenate(([0.0], np.cumsum(gaps)))
+    points = np.zeros((n, d))
+    points[:, 0] = positions / positions[-1] if n > 1 else 0.0
+    if d > 1:
+        points[:, 1:] = rng.normal(0, 1e-6, size=(n, d - 1))
+    return points
+
+def high_dimensional(n: int, d: int, seed: int = 0, intrinsic: int = 4) -> np.ndarray:
+    """
+    Points near a random `intrinsic`-dimensional subspace of R^d, plus noise
+    """
+    rng = np.random.default_rng(seed)
+    k = min(intrinsic, d)
+    basis = np.linalg.qr(rng.normal(size=(d, k)))[0]
+    return rng.uniform(0, 1, size=(n, k)) @ basis.T + rng.normal(0, 0.01, size=(n, d))
+
+GENERATORS = {
+    'uniform': uniform,
+    'blobs': gaussian_blobs,
+    'chain': chain,
+    'highdim': high_dimensional,
+}
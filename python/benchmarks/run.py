@@ -0,0 +1,235 @@
+# run.py
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import numpy as np
+from r_gather.profiling import PHASES, Profiler
+from r_gather.r_gather import compute_r_gather, compute_r_gather_binary_search
+from .generators import GENERATORS
+
+DRIVERS = {
+    'linear': compute_r_gather,
+    'binary': compute_r_gather_binary_search,
+}
+
+DEFAULT_SIZES = (100, 1000, 10000, 100000)
+DEFAULT_DIMS = (2, 8, 64)
+DEFAULT_R = (2, 5, 20)
+
+# Dense distance matrices larger than this use the kdtree backend instead
+DEFAULT_MAX_MATRIX_BYTES = 2 * 1024 ** 3
+
+# Largest dimension for which the kdtree backend is worth using
+KDTREE_MAX_DIM = 16
+
+def choose_backend(n: int, d: int, max_matrix_bytes: int) -> str | None:
+    """
+    'dense' while the distance matrix fits max_matrix_bytes, then 'kdtree'
+    in low dimensions, otherwise None (case skipped)
+    """
+    if n * n * 8 <= max_matrix_bytes:
+        return 'dense'
+    if d <= KDTREE_MAX_DIM:
+        try:
+            import scipy  # noqa: F401
+        except ImportError:
+            return None
+        return 'kdtree'
+    return None
+
+def run_case(coords: np.ndarray, r: int, driver: str, backend: str, repeat: int = 1,
+             trace_memory: bool = False) -> dict:
+    """
+    Time one driver on one dataset
+
+    The fastest of `repeat` runs is kept, with its per-phase times. With
+    trace_memory an extra run records the allocation peak of every phase.
+    """
+    best = None
+    for _ in range(repeat):
+        with Profiler() as profiler:
+            DRIVERS[driver](coords, r, backend=backend, profiler=profiler)
+        if best is None or profiler.wall_time < best.wall_time:
+            best = profiler
+
+    accepted = [p['R'] for p in best.probes if p['outcome'] == 'accepted']
+    result = {
+        'seconds': best.wall_time,
+        'phases': dict(best.times),
+        'probes': len(best.probes),
+        'rejections': best.rejections(),
+        'R': min(accepted) if accepted else None,
+    }
+    if trace_memory:
+        with Profiler(trace_memory=True) as profiler:
+            DRIVERS[driver](coords, r, backend=backend, profiler=profiler)
+        result['peak_bytes'] = dict(profiler.peak_bytes)
+        result['peak_bytes_total'] = max(profiler.peak_bytes.values(), default=0)
+    return result
+
+def run_suite(datasets, sizes, dims, r_values, drivers, repeat: int = 1, seed: int = 0,
+              max_matrix_bytes: int = DEFAULT_MAX_MATRIX_BYTES, budget: float = 60.0,
+              trace_memory: bool = False, log=None) -> list[dict]:
+    """
+    Run every case of the grid
+
+    Sizes are run in ascending order; once a series (dataset, d, r, driver)
+    takes longer than `budget` seconds its larger sizes are skipped.
+
+    Returns:
+        results: One dict per case that ran
+    """
+    results = []
+    for dataset in datasets:
+        for d in dims:
+            for r in r_values:
+                for driver in drivers:
+                    for n in sorted(sizes):
+                        if r > n:
+                            continue
+                        backend = choose_backend(n, d, max_matrix_bytes)
+                        if backend is None:
+                            continue
+                        coords = GENERATORS[dataset](n, d, seed=seed)
+                        case = {'dataset': dataset, 'n': n, 'd': d, 'r': r,
+                                'driver': driver, 'backend': backend}
+                        case.update(run_case(coords, r, driver, backend, repeat, trace_memory))
+                        results.append(case)
+                        if log is not None:
+                            log(f"{dataset:<8} n={n:<7} d={d:<3} r={r:<3} {driver:<6} {backend:<6} "
+                                f"{case['seconds']:9.4f} s  {case['probes']:4d} probes")
+                        if case['seconds'] > budget:
+                            break
+    return results
+
+def _key(case: dict) -> tuple:
+    return (case['dataset'], case['n'], case['d'], case['r'], case['driver'], case['backend'])
+
+def compare(results: list[dict], baseline: list[dict], tolerance: float = 0.25,
+            min_seconds: float = 0.005) -> list[dict]:
+    """
+    Cases slower than the baseline by more than `tolerance` (relative) and
+    `min_seconds` (absolute)
+
+    Returns:
+        regressions: One dict per regressed case with both timings
+    """
+    reference = {_key(case): case for case in baseline}
+    regressions = []
+    for case in results:
+        old = reference.get(_key(case))
+        if old is None:
+            continue
+        if case['seconds'] > old['seconds'] * (1 + tolerance) and case['seconds'] - old['seconds'] > min_seconds:
+            regressions.append({'case': _key(case), 'seconds': case['seconds'],
+                                'baseline_seconds': old['seconds'],
+                                'ratio': case['seconds'] / old['seconds']})
+    return regressions
+
+def plot_scaling(results: list[dict], directory: str) -> list[str]:
+    """
+    One log-log plot of total and per-phase time against n for every
+    (dataset, d, r, driver) series
+
+    Returns:
+        paths: The PNG files written
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    os.makedirs(directory, exist_ok=True)
+    series = {}
+    for case in results:
+        series.setdefault((case['dataset'], case['d'], case['r'], case['driver']), []).append(case)
+
+    paths = []
+    for (dataset, d, r, driver), cases in sorted(series.items()):
+        cases = sorted(cases, key=lambda case: case['n'])
+        if len(cases) < 2:
+            continue
+        n = [case['n'] for case in cases]
+        fig, ax = plt.subplots(figsize=(8, 6))
+        ax.loglog(n, [case['seconds'] for case in cases], 'k-o', linewidth=2, label='total')
+        seen = {name for case in cases for name in case['phases']}
+        phases = [name for name in PHASES if name in seen] + sorted(seen - set(PHASES))
+        for name in phases:
+            ax.loglog(n, [case['phases'].get(name, np.nan) for case in cases], '.--', label=name)
+        ax.set_xlabel('n')
+        ax.set_ylabel('seconds')
+        ax.set_title(f'{dataset}, d={d}, r={r}, {driver} search')
+        ax.legend(fontsize=8)
+        ax.grid(True, which='both', alpha=0.3)
+        path = os.path.join(directory, f'{dataset}_d{d}_r{r}_{driver}.png')
+        fig.savefig(path, dpi=100, bbox_inches='tight')
+        plt.close(fig)
+        paths.append(path)
+    return paths
+
+def _int_list(text: str) -> list[int]:
+    return [int(x) for x in text.split(',')]
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.run',
+                                     description='Time every phase of both r-gather search drivers.')
+    parser.add_argument('--datasets', default=','.join(GENERATORS),
+                        help=f"comma-separated, from {', '.join(GENERATORS)}")
+    parser.add_argument('--sizes', type=_int_list, default=list(DEFAULT_SIZES))
+    parser.add_argument('--dims', type=_int_list, default=list(DEFAULT_DIMS))
+    parser.add_argument('--r', type=_int_list, default=list(DEFAULT_R))
+    parser.add_argument('--drivers', default=','.join(DRIVERS))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--budget', type=float, default=60.0,
+                        help='skip larger n of a series once a case takes longer (seconds)')
+    parser.add_argument('--max-matrix-bytes', type=int, default=DEFAULT_MAX_MATRIX_BYTES)
+    parser.add_argument('--memory', action='store_true', help='also record allocation peaks')
+    parser.add_argument('--quick', action='store_true',
+                        help='small grid for a smoke run (n <= 1000, d in 2,8, r=5, 1 repeat)')
+    parser.add_argument('-o', '--output', help='write results as JSON (e.g. a new baseline)')
+    parser.add_argument('--baseline', help='compare against a previous JSON output')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--plots', metavar='DIR', help='write scaling plots')
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        args.sizes, args.dims, args.r, args.repeat = [100, 300, 1000], [2, 8], [5], 1
+
+    log = lambda message: print(message, file=sys.stderr)
+    results = run_suite(args.datasets.split(','), args.sizes, args.dims, args.r, args.drivers.split(','),
+                        repeat=args.repeat, seed=args.seed, max_matrix_bytes=args.max_matrix_bytes,
+                        budget=args.budget, trace_memory=args.memory, log=log)
+
+    if args.output:
+        meta = {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'processor': platform.processor(),
+        }
+        with open(args.output, 'w') as f:
+            json.dump({'meta': meta, 'results': results}, f, indent=2)
+        log(f"wrote {args.output}")
+
+    if args.plots:
+        for path in plot_scaling(results, args.plots):
+            log(f"wrote {path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            log(f"REGRESSION {regression['case']}: {regression['seconds']:.4f} s vs "
+                f"{regression['baseline_seconds']:.4f} s ({regression['ratio']:.2f}x)")
+        if regressions:
+            return 1
+        log("no regressions against the baseline")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,191 @@
+# adjacency.py
+import numpy as np
+
+if hasattr(np, 'bitwise_count'):
+    _popcount = np.bitwise_count
+else:
+    _POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def _popcount(bits: np.ndarray) -> np.ndarray:
+        return _POPCOUNT_TABLE[bits]
+
+def _index_dtype(n: int):
+    return np.int32 if n < np.iinfo(np.int32).max else np.int64
+
+class CSRAdjacency:
+    """
+    The 2R neighborhood graph of one radius probe in CSR form
+
+    Row i lists, in ascending order, every point within the threshold of
+    point i (including i). Built once per R and shared by Condition 1,
+    initial_clustering and the flow network. Used for sparse backends;
+    markings are boolean arrays.
+    """
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray):
+        self.indptr = indptr
+        self.indices = indices
+        self.n = len(indptr) - 1
+
+    @classmethod
+    def from_rows(cls, rows: list[np.ndarray], n: int) -> 'CSRAdjacency':
+        """
+        Build from a list of sorted neighbor index arrays, one per point
+        """
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(row) for row in rows])
+        dtype = _index_dtype(n)
+        indices = np.concatenate(rows).astype(dtype) if rows else np.empty(0, dtype=dtype)
+        return cls(indptr, indices)
+
+    @classmethod
+    def from_sorted_coo(cls, rows: np.ndarray, cols: np.ndarray, n: int) -> 'CSRAdjacency':
+        """
+        Build from (row, col) entries already sorted by row, then col
+        """
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum(np.bincount(rows, minlength=n))
+        return cls(indptr, cols.astype(_index_dtype(n)))
+
+    @classmethod
+    def from_pairs(cls, i: np.ndarray, j: np.ndarray, n: int) -> 'CSRAdjacency':
+        """
+        Build from unordered pairs i < j (self loops are added)
+        """
+        loops = np.arange(n)
+        rows = np.concatenate([i, j, loops])
+        cols = np.concatenate([j, i, loops])
+        order = np.lexsort((cols, rows))
+        return cls.from_sorted_coo(rows[order], cols[order], n)
+
+    def degrees(self) -> np.ndarray:
+        """
+        Number of points within the threshold of each point (including itself)
+        """
+        return np.diff(self.indptr)
+
+    def weighted_degrees(self, weights: np.ndarray) -> np.ndarray:
+        """
+        Total weight of the points within the threshold of each point
+        (including itself)
+        """
+        totals = np.concatenate([[0], np.cumsum(weights[self.indices])])
+        return totals[self.indptr[1:]] - totals[self.indptr[:-1]]
+
+    def row_degrees(self, rows) -> np.ndarray:
+        """
+        Degrees of the given rows only
+        """
+        return np.diff(self.indptr)[rows]
+
+    def neighbors(self, i: int) -> np.ndarray:
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def subgraph_rows(self, rows) -> tuple[np.ndarray, np.ndarray]:
+        """
+        CSR arrays (indptr, indices) restricted to the given rows, in order
+        """
+        rows = [self.neighbors(i) for i in rows]
+        indptr = np.zeros(len(rows) + 1, dtype=np.intp)
+        indptr[1:] = np.cumsum([len(row) for row in rows])
+        indices = np.concatenate(rows).astype(np.intp) if rows else np.empty(0, dtype=np.intp)
+        return indptr, indices
+
+    def new_marking(self) -> np.ndarray:
+        return np.zeros(self.n, dtype=bool)
+
+    def mark_neighbors(self, marking: np.ndarray, i: int):
+        marking[self.neighbors(i)] = True
+
+    def is_marked(self, marking: np.ndarray, i: int) -> bool:
+        return bool(marking[i])
+
+    def count_marked(self, marking: np.ndarray) -> int:
+        return int(np.count_nonzero(marking))
+
+class BitsetAdjacency:
+    """
+    The 2R neighborhood graph of one radius probe as packed bit rows
+
+    Row i is np.packbits of the boolean row "distance(i, j) <= threshold",
+    so the graph costs n²/8 bytes instead of n² for a boolean matrix.
+    Degrees are popcount row sums and markings are packed bit vectors
+    updated with bitwise OR / tested with AND.
+    """
+
+    def __init__(self, bits: np.ndarray, n: int, tile_size: int = 1024):
+        self.bits = bits
+        self.n = n
+        self.tile_size = tile_size
+
+    @classmethod
+    def from_distance_matrix(cls, distance_matrix: np.ndarray, threshold: float,
+                             tile_size: int = 1024) -> 'BitsetAdjacency':
+        """
+        Pack "distance <= threshold" one row tile at a time (O(tile·n) temporaries)
+        """
+        n = distance_matrix.shape[0]
+        bits = np.empty((n, (n + 7) // 8), dtype=np.uint8)
+        for start in range(0, n, tile_size):
+            stop = min(start + tile_size, n)
+            bits[start:stop] = np.packbits(distance_matrix[start:stop] <= threshold, axis=1)
+        return cls(bits, n, tile_size)
+
+    def degrees(self) -> np.ndarray:
+        """
+        Number of points within the threshold of each point (popcount row sums)
+        """
+        degrees = np.empty(self.n, dtype=np.int64)
+        for start in range(0, self.n, self.tile_size):
+            stop = min(start + self.tile_size, self.n)
+            degrees[start:stop] = _popcount(self.bits[start:stop]).sum(axis=1)
+        return degrees
+
+    def weighted_degrees(self, weights: np.ndarray) -> np.ndarray:
+        """
+        Total weight of the points within the threshold of each point
+        (unpacked row tiles times the weight vector)
+        """
+        weights = np.asarray(weights)
+        totals = np.empty(self.n, dtype=weights.dtype)
+        for start in range(0, self.n, self.tile_size):
+            stop = min(start + self.tile_size, self.n)
+            totals[start:stop] = np.unpackbits(self.bits[start:stop], axis=1, count=self.n) @ weights
+        return totals
+
+    def row_degrees(self, rows) -> np.ndarray:
+        """
+        Degrees of the given rows only
+        """
+        return _popcount(self.bits[np.asarray(rows, dtype=np.intp)]).sum(axis=1)
+
+    def neighbors(self, i: int) -> np.ndarray:
+        return np.flatnonzero(np.unpackbits(self.bits[i], count=self.n))
+
+    def subgraph_rows(self, rows) -> tuple[np.ndarray, np.ndarray]:
+        """
+        CSR arrays (indptr, indices) restricted to the given rows, in order
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        counts, chunks = [], []
+        for start in range(0, len(rows), self.tile_size):
+            block = np.unpackbits(self.bits[rows[start:start + self.tile_size]], axis=1, count=self.n)
+            counts.append(np.count_nonzero(block, axis=1))
+            chunks.append(np.nonzero(block)[1])
+        indptr = np.zeros(len(rows) + 1, dtype=np.intp)
+        if chunks:
+            indptr[1:] = np.cumsum(np.concatenate(counts))
+        indices = np.concatenate(chunks).astype(np.intp) if chunks else np.empty(0, dtype=np.intp)
+        return indptr, indices
+
+    def new_marking(self) -> np.ndarray:
+        return np.zeros(self.bits.shape[1], dtype=np.uint8)
+
+    def mark_neighbors(self, marking: np.ndarray, i: int):
+        np.bitwise_or(marking, self.bits[i], out=marking)
+
+    def is_marked(self, marking: np.ndarray, i: int) -> bool:
+        return bool(marking[i >> 3] & (0x80 >> (i & 7)))
+
+    def count_marked(self, marking: np.ndarray) -> int:
+        return int(_popcount(marking).sum())
@@ -0,0 +1,130 @@
+# bipartite_matching.py
+import numpy as np
+from collections import deque
+
+def max_b_matching(indptr: np.ndarray, indices: np.ndarray, n_points: int, capacity: int,
+                   match_point: np.ndarray | None = None):
+    """
+    Maximum bipartite b-matching between centers and points
+
+    Hopcroft–Karp with capacities: every center (left side) may be matched
+    to up to `capacity` points, every point (right side) to at most one
+    center. Each phase runs a BFS from all centers with spare capacity to
+    layer the centers, then augments along layered alternating paths with an
+    iterative DFS, so the whole matching costs O(E·sqrt(V)) over plain
+    integer arrays.
+
+    Args:
+        indptr: CSR row pointer, center k's points are indices[indptr[k]:indptr[k+1]]
+        indices: CSR column indices (point indices)
+        n_points: Number of points
+        capacity: Maximum number of points per center (r)
+        match_point: Optional initial matching, point -> center position or -1
+                     (must respect the adjacency and capacities)
+
+    Returns:
+        (match_point, load) - center position for each point (-1 if free) and
+                              number of points matched to each center
+    """
+    n_centers = len(indptr) - 1
+    indptr = np.asarray(indptr, dtype=np.intp)
+    indices = np.asarray(indices, dtype=np.intp)
+
+    if match_point is None:
+        match_point = np.full(n_points, -1, dtype=np.intp)
+    else:
+        match_point = np.array(match_point, dtype=np.intp)
+    load = np.bincount(match_point[match_point >= 0], minlength=n_centers).astype(np.intp)
+
+    # Plain Python lists are much faster than numpy scalars in the inner loops
+    ptr = indptr.tolist()
+    adj = indices.tolist()
+    mate = match_point.tolist()
+    used = load.tolist()
+
+    # Greedy initialization: fill each center with free neighbors
+    for c in range(n_centers):
+        for e in range(ptr[c], ptr[c + 1]):
+            if used[c] >= capacity:
+                break
+            v = adj[e]
+            if mate[v] == -1:
+                mate[v] = c
+                used[c] += 1
+
+    unreachable = n_centers + 1
+    while True:
+        # BFS: layer centers by alternating path length from free centers
+        dist = [unreachable] * n_centers
+        queue = deque()
+        for c in range(n_centers):
+            if used[c] < capacity:
+                dist[c] = 0
+                queue.append(c)
+
+        found = False
+        while queue:
+            c = queue.popleft()
+            for e in range(ptr[c], ptr[c + 1]):
+                u = mate[adj[e]]
+                if u == -1:
+                    found = True
+                elif u != c and dist[u] == unreachable:
+                    dist[u] = dist[c] + 1
+                    queue.append(u)
+
+        if not found:
+            break
+
+        # DFS: augment along layered paths, iteratively
+        cursor = ptr[:-1]
+        augmented = False
+        for root in range(n_centers):
+            while used[root] < capacity:
+                # stack of (center, edge position that led to the next center)
+                stack = [root]
+                edges = []
+                success = False
+                while stack:
+                    c = stack[-1]
+                    advanced = False
+                    while cursor[c] < ptr[c + 1]:
+                        e = cursor[c]
+                        v = adj[e]
+                        u = mate[v]
+                        if u == -1:
+                            edges.append(e)
+                            success = True
+                            break
+                        if u != c and dist[u] == dist[c] + 1:
+                            edges.append(e)
+                            stack.append(u)
+                            advanced = True
+                            break
+                        cursor[c] += 1
+                    if success:
+                        break
+                    if not advanced:
+                        # Dead end: drop this center from the phase
+                        dist[c] = unreachable
+                        stack.pop()
+                        if edges:
+                            cursor[stack[-1]] += 1
+                            edges.pop()
+
+                if not success:
+                    break
+
+                # Flip the path: each center on it takes the next point
+                for c, e in zip(stack, edges):
+                    mate[adj[e]] = c
+                    cursor[c] += 1
+                used[root] += 1
+                augmented = True
+
+        if not augmented:
+            break
+
+    match_point = np.array(mate, dtype=np.intp)
+    load = np.array(used, dtype=np.intp)
+    return match_point, load
@@ -0,0 +1,108 @@
+# cache.py
+import hashlib
+import os
+import numpy as np
+from .distance_matrix import DEFAULT_TILE_SIZE, compute_distance_matrix_blocked
+from .neighbor_index import DenseNeighborIndex
+
+# Default on-disk budget of a DistanceCache
+DEFAULT_MAX_BYTES = 8 * 1024 ** 3
+
+def dataset_fingerprint(coords: np.ndarray, dtype=np.float64) -> str:
+    """
+    Hash of the coordinate array (values and shape) and the distance dtype
+    """
+    coords = np.ascontiguousarray(coords, dtype=np.float64)
+    digest = hashlib.sha256()
+    digest.update(str(coords.shape).encode())
+    digest.update(np.dtype(dtype).str.encode())
+    digest.update(coords.tobytes())
+    return digest.hexdigest()[:32]
+
+class DistanceCache:
+    """
+    On-disk cache of distance matrices and sorted candidate radii
+
+    Entries are .npy files named by dataset_fingerprint, so repeated runs on
+    the same points (e.g. a sweep over r) reopen them with
+    np.load(mmap_mode='r') instead of recomputing: zero-copy, and shared
+    between processes through the page cache. A file's mtime records its
+    last use; when the directory grows beyond max_bytes the least recently
+    used entries are evicted.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str, kind: str) -> str:
+        return os.path.join(self.directory, f'{key}.{kind}.npy')
+
+    def _open(self, path: str) -> np.ndarray:
+        os.utime(path)
+        return np.load(path, mmap_mode='r')
+
+    def distance_matrix(self, coords: np.ndarray, dtype=np.float64,
+                        tile_size: int = DEFAULT_TILE_SIZE) -> np.ndarray:
+        """
+        The (n, n) distance matrix of coords as a read-only memmap
+        """
+        coords = np.asarray(coords)
+        path = self._path(dataset_fingerprint(coords, dtype), 'distances')
+        if not os.path.exists(path):
+            n = coords.shape[0]
+            temp_path = f'{path}.{os.getpid()}.tmp'
+            matrix = np.lib.format.open_memmap(temp_path, mode='w+', dtype=dtype, shape=(n, n))
+            compute_distance_matrix_blocked(coords, tile_size=tile_size, dtype=dtype, out=matrix)
+            matrix.flush()
+            del matrix
+            os.replace(temp_path, path)
+            self.evict(keep=path)
+        return self._open(path)
+
+    def candidate_radii(self, coords: np.ndarray, distance_matrix: np.ndarray,
+                        dtype=np.float64) -> np.ndarray:
+        """
+        Sorted unique positive half-distances of the dataset as a read-only memmap
+        """
+        path = self._path(dataset_fingerprint(coords, dtype), 'radii')
+        if not os.path.exists(path):
+            index = DenseNeighborIndex(distance_matrix)
+            radii = np.unique(index.pair_distances(0.0, np.inf) / 2)
+            temp_path = f'{path}.{os.getpid()}.tmp'
+            with open(temp_path, 'wb') as f:
+                np.save(f, radii)
+            os.replace(temp_path, path)
+            self.evict(keep=path)
+        return self._open(path)
+
+    def size(self) -> int:
+        """
+        Total bytes of cached entries
+        """
+        return sum(os.path.getsize(path) for path in self._entries())
+
+    def _entries(self) -> list[str]:
+        return [
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory) if name.endswith('.npy')
+        ]
+
+    def evict(self, keep: str | None = None):
+        """
+        Remove least recently used entries until the cache fits max_bytes
+        """
+        entries = sorted(self._entries(), key=os.path.getmtime)
+        total = sum(os.path.getsize(path) for path in entries)
+        for path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            total -= os.path.getsize(path)
+            os.remove(path)
+
+    def clear(self):
+        for path in self._entries():
+            os.remove(path)
@@ -0,0 +1,314 @@
+# candidates.py
+import numpy as np
+from .neighbor_index import NeighborIndex
+
+# Number of smallest candidates sorted by the first lazy chunk
+DEFAULT_CHUNK_SIZE = 256
+
+def condition_1_threshold(index: NeighborIndex, r: int) -> float:
+    """
+    Condition 1 threshold: the largest distance from a point to its r-th
+    nearest point (itself counted)
+
+    Every point has at least r points within 2R exactly when
+    2R >= threshold, so once the threshold is known Condition 1 is an O(1)
+    comparison per candidate R.
+
+    Returns:
+        The threshold, or np.inf when r > n (Condition 1 never holds)
+    """
+    r = int(r)
+    if r > index.n:
+        return np.inf
+    if r <= 1 or index.n == 0:
+        return 0.0
+    return float(index.kth_distances(r).max())
+
+def condition_1_thresholds(index: NeighborIndex, r_values) -> dict:
+    """
+    Condition 1 thresholds of several r from one nearest-distance table
+
+    Returns:
+        {r: threshold} as condition_1_threshold would compute each
+    """
+    r_values = [int(r) for r in r_values]
+    k = min(max([r for r in r_values if r > 1], default=1), index.n)
+    table = index.nearest_distances(k) if k > 1 else None
+
+    thresholds = {}
+    for r in r_values:
+        if r > index.n:
+            thresholds[r] = np.inf
+        elif r <= 1 or index.n == 0:
+            thresholds[r] = 0.0
+        else:
+            thresholds[r] = float(table[:, r - 1].max())
+    return thresholds
+
+def weighted_condition_1_threshold(index: NeighborIndex, r: int, weights: np.ndarray) -> float:
+    """
+    Condition 1 threshold of weighted points: the largest distance at
+    which a point's nearest points (itself counted) first reach weight r
+
+    Weights are at least 1, so the r nearest points always suffice.
+
+    Returns:
+        The threshold, or np.inf when the total weight is below r
+    """
+    r = int(r)
+    weights = np.asarray(weights)
+    if index.n == 0 or weights.sum() < r:
+        return np.inf
+    if r <= 1:
+        return 0.0
+    neighbors, distances = index.nearest_neighbors(min(r, index.n))
+    reached = np.cumsum(weights[neighbors], axis=1) >= r
+    first = np.argmax(reached, axis=1)
+    return float(distances[np.arange(index.n), first].max())
+
+def condition_1_lower_bound(index: NeighborIndex, r: int) -> float:
+    """
+    Smallest R that can satisfy Condition 1 (half the Condition 1 threshold)
+
+    Returns:
+        Lower bound on R, or np.inf when r > n
+    """
+    return condition_1_threshold(index, r) / 2
+
+def iter_ascending(values: np.ndarray, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    Yield the unique values of an unsorted array in ascending order lazily
+
+    Each step selects the next `chunk_size` smallest values with
+    np.partition and sorts only those, doubling the chunk every step. A
+    scan that stops after a few candidates costs O(N) instead of the
+    O(N log N) full sort.
+    """
+    while len(values) > 0:
+        if len(values) > chunk_size:
+            pivot = np.partition(values, chunk_size - 1)[chunk_size - 1]
+            head = values[values <= pivot]
+            values = values[values > pivot]
+            chunk_size *= 2
+        else:
+            head, values = values, values[:0]
+        yield from np.unique(head)
+
+def select_smallest_feasible(values: np.ndarray, probe):
+    """
+    Binary search by selection over an unsorted candidate array
+
+    Each round takes the median candidate with np.partition, probes it and
+    discards the half that cannot contain the answer, so the total work is
+    O(N) selection plus O(log N) probes and no array is ever fully sorted.
+
+    Args:
+        values: Unsorted candidate radii (duplicates allowed)
+        probe: Callable R -> (success, result), monotone in R
+
+    Returns:
+        (R, result) for the smallest successful R, or (None, None) if none
+        (callers map the failure to their own empty result)
+    """
+    best_R, best_result = None, None
+    while len(values) > 0:
+        mid = len(values) // 2
+        R = np.partition(values, mid)[mid]
+        success, result = probe(R)
+        if success:
+            best_R, best_result = R, result
+            values = values[values < R]
+        else:
+            values = values[values > R]
+    return best_R, best_result
+
+def select_smallest_feasible_kary(values: np.ndarray, probe_many, k: int):
+    """
+    k-ary search by selection: probe k quantile pivots per round
+
+    The k pivots split the remaining candidates into k + 1 parts; the part
+    just below the smallest successful pivot is kept. Rounds drop to
+    O(log_{k+1} N) and the probes of one round can run concurrently. For a
+    monotone probe the result equals select_smallest_feasible.
+
+    Args:
+        values: Unsorted candidate radii (duplicates allowed)
+        probe_many: Callable list of R -> list of (success, result), in order
+        k: Number of probes per round
+
+    Returns:
+        (R, result) for the smallest successful R, or (None, None) if none
+        (callers map the failure to their own empty result)
+    """
+    best_R, best_result = None, None
+    while len(values) > 0:
+        m = len(values)
+        if m <= k:
+            pivots = np.unique(values)
+        else:
+            positions = [(j + 1) * m // (k + 1) for j in range(k)]
+            pivots = np.unique(np.partition(values, positions)[positions])
+
+        outcomes = probe_many(list(pivots))
+        first = next((j for j, (success, _) in enumerate(outcomes) if success), None)
+        if first is None:
+            values = values[values > pivots[-1]]
+            continue
+
+        best_R, best_result = pivots[first], outcomes[first][1]
+        keep = values < best_R
+        if first > 0:
+            keep &= values > pivots[first - 1]
+        values = values[keep]
+    return best_R, best_result
+
+class CandidateRadii:
+    """
+    Candidate radii R = d_ij / 2 restricted to the feasible band
+
+    Only pair distances at or above the Condition 1 lower bound are ever
+    extracted, in doubling distance windows starting at the bound (a single
+    window for the dense backend). Nothing is sorted up front: iteration is
+    lazy via iter_ascending and binary search uses select_smallest_feasible.
+
+    When the sorted unique radii of the dataset are already known (e.g. from
+    a DistanceCache), the band is a zero-copy slice of them instead.
+
+    A precomputed Condition 1 `threshold` may be passed in, and `min_radius`
+    raises the bottom of the band further (e.g. to the R of a smaller r).
+    """
+
+    def __init__(self, index: NeighborIndex, r: int, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 sorted_radii: np.ndarray | None = None, threshold: float | None = None,
+                 min_radius: float = 0.0):
+        self.index = index
+        self.r = r
+        self.chunk_size = chunk_size
+        self.sorted_radii = sorted_radii
+        self.threshold = condition_1_threshold(index, r) if threshold is None else threshold
+        self.lower_bound = max(self.threshold / 2, min_radius)
+
+    def windows(self):
+        """
+        Yields:
+            (candidate_radii, is_last) - unsorted radii of one distance window
+                                         and whether it is the final window
+        """
+        if not np.isfinite(self.lower_bound):
+            return
+
+        if self.sorted_radii is not None:
+            yield self._sorted_band(), True
+            return
+
+        # Exclusive lower limit that still admits the bound itself (R > 0)
+        start = 2 * self.lower_bound
+        lower = max(np.nextafter(start, -np.inf), 0.0)
+        upper = max(self.index.initial_window(), 2 * start)
+        max_threshold = self.index.max_threshold()
+
+        while True:
+            if upper <= lower:
+                upper = max_threshold
+            is_last = upper >= max_threshold
+            candidate_radii = self.index.pair_distances(lower, upper) / 2
+            if len(candidate_radii) > 0:
+                yield candidate_radii, is_last
+            if is_last:
+                return
+            lower, upper = upper, 2 * upper
+
+    def _sorted_band(self) -> np.ndarray:
+        start = np.searchsorted(self.sorted_radii, self.lower_bound, side='left')
+        return self.sorted_radii[start:]
+
+    def __iter__(self):
+        if self.sorted_radii is not None:
+            if np.isfinite(self.lower_bound):
+                yield from self._sorted_band()
+            return
+        for candidate_radii, _ in self.windows():
+            yield from iter_ascending(candidate_radii, self.chunk_size)
+
+def geometric_radii(lower: float, upper: float, epsilon: float) -> np.ndarray:
+    """
+    Radii lower·(1 + epsilon)^i, i = 0, 1, ..., ending exactly at upper
+
+    Consecutive radii differ by a factor of at most (1 + epsilon).
+    """
+    if upper <= lower:
+        return np.array([lower], dtype=np.float64)
+    steps = int(np.ceil(np.log(upper / lower) / np.log1p(epsilon)))
+    radii = np.minimum(lower * (1 + epsilon) ** np.arange(steps + 1), upper)
+    radii[-1] = upper
+    return np.unique(radii)
+
+class GeometricRadii:
+    """
+    Approximate candidate radii: a geometric grid instead of every d_ij / 2
+
+    The grid runs from the Condition 1 lower bound (or min_radius) by
+    factors of (1 + epsilon) up to half of index.max_threshold(), where a
+    single cluster holds every point. No pair distance is extracted or
+    sorted. Feasibility only changes at the exact candidates, so the
+    smallest feasible grid radius G and the exact optimum R* satisfy
+    R* <= G < (1 + epsilon)·R*. Binary search over the grid takes
+    O(log(1/epsilon) + log log(upper/lower)) probes.
+
+    Drop-in replacement for CandidateRadii in linear_search and binary_search.
+    """
+
+    sorted_radii = None
+
+    def __init__(self, index: NeighborIndex, r: int, epsilon: float, threshold: float | None = None,
+                 min_radius: float = 0.0):
+        if not epsilon > 0:
+            raise ValueError(f"epsilon must be positive, got {epsilon!r}")
+        self.index = index
+        self.r = r
+        self.epsilon = epsilon
+        self.threshold = condition_1_threshold(index, r) if threshold is None else threshold
+        self.lower_bound = max(self.threshold / 2, min_radius)
+        self.radii = self._grid()
+
+    def _grid(self) -> np.ndarray:
+        if not np.isfinite(self.lower_bound):
+            return np.empty(0)
+        lower = self.lower_bound
+        if lower <= 0:
+            # Threshold 0 (r = 1, or every point has r - 1 duplicates): start
+            # at the smallest positive candidate
+            smallest = self._smallest_positive_distance()
+            if smallest is None:
+                return np.empty(0)
+            lower = smallest / 2
+        upper = self.index.max_threshold() / 2
+        return geometric_radii(lower, max(upper, lower), self.epsilon)
+
+    def _smallest_positive_distance(self) -> float | None:
+        # Smallest pair distance > 0, searched in doubling windows like
+        # CandidateRadii.windows; None if all points coincide
+        max_threshold = self.index.max_threshold()
+        if self.index.n < 2 or not max_threshold > 0:
+            return None
+        upper = self.index.initial_window()
+        if not 0 < upper < max_threshold:
+            upper = max_threshold
+        while True:
+            distances = self.index.pair_distances(0.0, upper)
+            if len(distances) > 0:
+                return float(distances.min())
+            if upper >= max_threshold:
+                return None
+            upper = min(2 * upper, max_threshold)
+
+    def windows(self):
+        """
+        Yields:
+            (radii, True) - the whole grid as a single window
+        """
+        if len(self.radii) > 0:
+            yield self.radii, True
+
+    def __iter__(self):
+        return iter(self.radii)
@@ -0,0 +1,223 @@
+# cli.py
+import argparse
+import os
+import sys
+import time
+import numpy as np
+from .cache import DistanceCache
+from .coreset import compute_r_gather_coreset
+from .flow_network import FLOW_BACKENDS
+from .loaders import LOADER_FORMATS, infer_format, load_points, print_progress
+from .neighbor_index import NEIGHBOR_BACKENDS
+from .partition import DEFAULT_LEASE, DEFAULT_PARTITION_SIZE, PARTITION_METHODS, compute_r_gather_partitioned
+from .profiling import Profiler, peak_rss_bytes
+from .r_gather import SEARCH_STRATEGIES, compute_r_gather_sweep
+
+OUTPUT_FORMATS = ('npy', 'csv')
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='r-gather',
+        description='Cluster a point file so that every cluster has at least r points, '
+                    'minimizing the largest cluster radius.'
+    )
+    parser.add_argument('input', help='point file (.npy, .csv or .parquet)')
+    parser.add_argument('-r', type=int, required=True, help='minimum cluster size')
+    parser.add_argument('-o', '--output', help='output prefix for the labels, centers and radii files')
+    parser.add_argument('--output-format', choices=OUTPUT_FORMATS, default='npy')
+
+    search = parser.add_argument_group('search')
+    search.add_argument('--search', choices=SEARCH_STRATEGIES, default='binary')
+    search.add_argument('--backend', choices=NEIGHBOR_BACKENDS, default='dense')
+    search.add_argument('--flow-backend', choices=FLOW_BACKENDS, default='matching')
+    search.add_argument('--workers', type=int, default=1,
+                        help='parallel probes per round (binary search), or processes solving '
+                             'partitions (--partition)')
+    search.add_argument('--no-warm-start', action='store_true',
+                        help='rebuild the flow matching for every probe')
+    search.add_argument('--cache', metavar='DIR', help='distance cache directory')
+    search.add_argument('--memory-budget', type=parse_bytes, metavar='BYTES',
+                        help='RAM budget of the tiled backend, e.g. 512M or 8G (default 1G)')
+    search.add_argument('--epsilon', type=float,
+                        help='approximate search: R within a factor (1 + epsilon) of the optimum')
+    search.add_argument('--coreset', type=float, nargs='?', const=0.0, metavar='TOLERANCE',
+                        help='collapse duplicates (or points within TOLERANCE) into weighted '
+                             'representatives first')
+
+    partitioning = parser.add_argument_group('partitioning')
+    partitioning.add_argument('--partition', choices=PARTITION_METHODS,
+                              help='solve spatial partitions separately and stitch their boundaries')
+    partitioning.add_argument('--partition-size', type=int, default=DEFAULT_PARTITION_SIZE,
+                              help='target points per partition')
+    partitioning.add_argument('--queue', metavar='DIR',
+                              help='shared work queue directory; other nodes join with r-gather-worker DIR')
+    partitioning.add_argument('--queue-timeout', type=float, metavar='SECONDS',
+                              help='give up waiting for queued partitions after this long')
+    partitioning.add_argument('--queue-lease', type=float, default=DEFAULT_LEASE, metavar='SECONDS',
+                              help='requeue tasks claimed this long ago by a worker that died '
+                                   '(default %(default)s)')
+    partitioning.add_argument('--compare-global', action='store_true',
+                              help='also run the global search and report the radius ratio')
+
+    loading = parser.add_argument_group('input')
+    loading.add_argument('--format', choices=LOADER_FORMATS, help='input format (default: from extension)')
+    loading.add_argument('--columns', help='comma-separated coordinate columns')
+    loading.add_argument('--id-column', help='column holding point ids')
+    loading.add_argument('--delimiter', help='CSV field separator (default: tab for .tsv, else comma)')
+    loading.add_argument('--no-header', action='store_true', help='CSV file has no header line')
+
+    profiling = parser.add_argument_group('profiling')
+    profiling.add_argument('--profile-json', metavar='PATH',
+                           help='write phase times, probes and counters as JSON')
+    profiling.add_argument('--trace-memory', action='store_true',
+                           help='record per-phase allocation peaks (tracemalloc, slower)')
+
+    parser.add_argument('-q', '--quiet', action='store_true', help='no progress or timing report')
+    return parser
+
+_BYTE_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+def parse_bytes(text: str) -> int:
+    """
+    Byte count with an optional K, M, G or T suffix (powers of 1024)
+    """
+    text = text.strip().upper().removesuffix('B')
+    unit = text[-1:] if text[-1:] in _BYTE_UNITS else ''
+    try:
+        return int(float(text[:len(text) - len(unit)]) * _BYTE_UNITS[unit])
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid byte count {text!r}") from None
+
+def _loader_options(args, format: str) -> dict:
+    options = {}
+    if format in ('csv', 'parquet'):
+        if args.columns:
+            columns = args.columns.split(',')
+            if args.no_header:
+                columns = [int(c) for c in columns]
+            options['columns'] = columns
+        if args.id_column is not None:
+            options['id_column'] = int(args.id_column) if args.no_header else args.id_column
+    if format == 'csv':
+        if args.delimiter is not None:
+            options['delimiter'] = args.delimiter
+        options['header'] = not args.no_header
+    return options
+
+def write_result(prefix: str, points, clusters, format: str = 'npy') -> list[str]:
+    """
+    Write labels, centers and radii of a ClusterResult
+
+    Labels are per point (-1 if unassigned), centers are point indices.
+    CSV files also carry the point ids.
+
+    Returns:
+        paths: The files written
+    """
+    directory = os.path.dirname(prefix)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    if format == 'npy':
+        arrays = {'labels': clusters.labels, 'centers': clusters.centers, 'radii': clusters.radii}
+        paths = []
+        for name, array in arrays.items():
+            path = f'{prefix}.{name}.npy'
+            np.save(path, array)
+            paths.append(path)
+        return paths
+
+    if format == 'csv':
+        labels_path = f'{prefix}.labels.csv'
+        np.savetxt(labels_path, np.column_stack([points.ids, clusters.labels]),
+                   fmt='%d', delimiter=',', header='id,label', comments='')
+        clusters_path = f'{prefix}.clusters.csv'
+        table = np.column_stack([np.arange(len(clusters)), clusters.centers,
+                                 points.ids[clusters.centers], clusters.sizes, clusters.radii])
+        np.savetxt(clusters_path, table, fmt=['%d', '%d', '%d', '%d', '%.17g'], delimiter=',',
+                   header='cluster,center,center_id,size,radius', comments='')
+        return [labels_path, clusters_path]
+
+    raise ValueError(f"Unknown output format {format!r}, expected one of {OUTPUT_FORMATS}")
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.coreset is not None and args.partition is not None:
+        parser.error('--coreset and --partition cannot be combined')
+    # Options the coreset and partitioned modes do not take
+    ignored = {
+        '--coreset': {'--workers': args.workers > 1, '--cache': args.cache, '--no-warm-start': args.no_warm_start},
+        '--partition': {'--epsilon': args.epsilon is not None, '--cache': args.cache,
+                        '--memory-budget': args.memory_budget is not None, '--no-warm-start': args.no_warm_start},
+    }
+    for mode, options in ignored.items():
+        if getattr(args, mode[2:]) is not None:
+            for option, given in options.items():
+                if given:
+                    parser.error(f'{option} cannot be combined with {mode}')
+    report = (lambda message: None) if args.quiet else (lambda message: print(message, file=sys.stderr))
+
+    start = time.perf_counter()
+    format = args.format or infer_format(args.input)
+    points = load_points(args.input, format=format, progress=None if args.quiet else print_progress,
+                         **_loader_options(args, format))
+    load_time = time.perf_counter() - start
+    report(f"loaded {points.n} points in {points.dimension} dimensions ({load_time:.3f} s)")
+
+    cache = DistanceCache(args.cache) if args.cache else None
+    with Profiler(trace_memory=args.trace_memory) as profiler:
+        if args.coreset is not None:
+            clusters = compute_r_gather_coreset(points, args.r, tolerance=args.coreset, backend=args.backend,
+                                                search=args.search, flow_backend=args.flow_backend,
+                                                epsilon=args.epsilon, profiler=profiler,
+                                                memory_budget=args.memory_budget)
+            R = None
+        elif args.partition is not None:
+            clusters, partitioned = compute_r_gather_partitioned(
+                points, args.r, method=args.partition, partition_size=args.partition_size,
+                backend=args.backend, flow_backend=args.flow_backend, workers=args.workers,
+                queue_dir=args.queue, queue_timeout=args.queue_timeout, queue_lease=args.queue_lease,
+                compare=args.compare_global,
+                profiler=profiler)
+            R = partitioned.R
+        else:
+            results = compute_r_gather_sweep(points, [args.r], backend=args.backend, search=args.search,
+                                             flow_backend=args.flow_backend, warm_start=not args.no_warm_start,
+                                             workers=args.workers, cache=cache, profiler=profiler,
+                                             epsilon=args.epsilon, memory_budget=args.memory_budget)
+            R, clusters = results[args.r]
+    feasible = len(clusters) > 0
+
+    if not feasible:
+        report(f"no valid clustering with r={args.r}")
+    elif R is None:
+        report(f"{profiler.counters['coreset_representatives']} representatives: "
+               f"{len(clusters)} clusters, max radius {clusters.radii.max():.6g}")
+    else:
+        report(f"R = {R:.6g}: {len(clusters)} clusters, max radius {clusters.radii.max():.6g}")
+    if args.partition is not None and feasible:
+        summary = (f"{len(partitioned.sizes)} partitions, {partitioned.band} points re-solved in stitching "
+                   f"({partitioned.stitched} pieces replaced)")
+        if partitioned.ratio is not None:
+            reference = 'global solution' if partitioned.global_max_radius is not None else 'lower bound'
+            summary += f"; max radius {partitioned.ratio:.3f}x the {reference}"
+        report(summary)
+    report('')
+    report(profiler.report())
+    report(f"{'total':<20} {'':>7} {profiler.wall_time:>10.4f}")
+    report('')
+    report(f"peak RSS: {peak_rss_bytes() / 1024 ** 2:.1f} MiB"
+           + (f" (workers: {peak_rss_bytes(children=True) / 1024 ** 2:.1f} MiB)" if args.workers > 1 else ''))
+
+    if args.profile_json:
+        profiler.to_json(args.profile_json, indent=2)
+        report(f"wrote {args.profile_json}")
+    if args.output:
+        for path in write_result(args.output, points, clusters, args.output_format):
+            report(f"wrote {path}")
+
+    return 0 if feasible else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
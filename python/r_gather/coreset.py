@@ -0,0 +1,185 @@
+# coreset.py
+import numpy as np
+from .data_structures import ClusterResult, Point, PointSet, as_point_set
+from .candidates import select_smallest_feasible, weighted_condition_1_threshold
+from .neighbor_index import NeighborIndex, build_neighbor_index, pairwise_distances
+from .profiling import NULL_PROFILER, Profiler
+from .r_gather import SEARCH_STRATEGIES, _timed, make_candidates, solve_radius
+
+class Coreset:
+    """
+    Weighted representatives of a point set
+
+    Points that coincide (tolerance=0) or share a grid cell of diagonal
+    `tolerance` are collapsed into one representative, the first of them
+    in input order, whose weight is the number of points it stands for.
+    Every point is within `tolerance` of its representative.
+
+    Attributes:
+        points: The original PointSet
+        representatives: (m,) index of each representative's point
+        weights: (m,) number of points per representative
+        assignment: (n,) representative of each point
+        tolerance: Collapse distance
+    """
+
+    def __init__(self, points: PointSet, representatives: np.ndarray, weights: np.ndarray,
+                 assignment: np.ndarray, tolerance: float = 0.0):
+        self.points = points
+        self.representatives = representatives
+        self.weights = weights
+        self.assignment = assignment
+        self.tolerance = tolerance
+
+    @property
+    def m(self) -> int:
+        return len(self.representatives)
+
+    def point_set(self) -> PointSet:
+        """
+        The representatives as a PointSet (with the ids of their points)
+        """
+        return PointSet(self.points.coordinates[self.representatives], self.points.ids[self.representatives])
+
+    def expand(self, centers: list[int], allocations) -> ClusterResult:
+        """
+        Per-point clusters from a weighted solution
+
+        The points of each representative are handed out in input order
+        according to its allocations, so every cluster receives as many
+        points as it received weight.
+
+        Args:
+            centers: Representative indices of the cluster centers
+            allocations: (reps, centers, units) from the weighted flow, ordered
+                         by representative (see weighted_allocations)
+
+        Returns:
+            ClusterResult over the original points; the radii are exact
+            distances from the centers' points, at most 2R + tolerance
+        """
+        points = self.points
+        if len(centers) == 0:
+            return ClusterResult.empty(points)
+        alloc_reps, alloc_centers, units = allocations
+
+        # Clusters numbered in centers order
+        cluster_of = np.full(self.m, -1, dtype=np.intp)
+        cluster_of[np.asarray(centers, dtype=np.intp)] = np.arange(len(centers))
+
+        # Points grouped by representative (stable, so in input order) line
+        # up with the allocation rows repeated by their units
+        members = np.argsort(self.assignment, kind='stable')
+        labels = np.empty(points.n, dtype=np.intp)
+        labels[members] = np.repeat(cluster_of[alloc_centers], units)
+
+        center_points = self.representatives[np.asarray(centers, dtype=np.intp)]
+        coords = points.coordinates
+        distances = pairwise_distances(coords, coords[center_points[labels]])
+        radii = np.zeros(len(centers), dtype=np.float64)
+        np.maximum.at(radii, labels, distances)
+        return ClusterResult(points, labels, center_points, radii)
+
+def build_coreset(points: list[Point] | PointSet, tolerance: float = 0.0) -> Coreset:
+    """
+    Collapse duplicates (tolerance=0) or tolerance-close points into weighted
+    representatives
+
+    With tolerance > 0 the points are bucketed into a grid of cells with
+    diagonal `tolerance` (side tolerance / sqrt(d)); one representative
+    stands for each non-empty cell.
+    """
+    points = as_point_set(points)
+    coords = points.coordinates
+    if tolerance > 0:
+        side = tolerance / np.sqrt(points.dimension)
+        keys = np.floor((coords - coords.min(axis=0)) / side).astype(np.int64)
+    else:
+        keys = np.asarray(coords)
+    _, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+    inverse = inverse.reshape(-1)
+
+    # Number representatives by first appearance
+    order = np.argsort(first, kind='stable')
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    assignment = rank[inverse]
+    weights = np.bincount(assignment, minlength=len(first)).astype(np.int64)
+    return Coreset(points, first[order], weights, assignment, tolerance)
+
+def weighted_search(index: NeighborIndex, weights: np.ndarray, r: int, search: str = 'binary',
+                    flow_backend: str = 'matching', epsilon: float | None = None,
+                    profiler: Profiler | None = None):
+    """
+    Smallest feasible R of weighted points
+
+    Candidates start at weighted_condition_1_threshold; every probe runs
+    solve_radius with the weights. Flow warm starts are not used.
+
+    Returns:
+        (R, centers, allocations), or (None, [], None) if no clustering exists
+    """
+    if search not in SEARCH_STRATEGIES:
+        raise ValueError(f"Unknown search {search!r}, expected one of {SEARCH_STRATEGIES}")
+    profiler = NULL_PROFILER if profiler is None else profiler
+    with profiler.phase('candidates'):
+        threshold = weighted_condition_1_threshold(index, r, weights)
+        candidates = make_candidates(index, r, epsilon, threshold=threshold)
+
+    def probe(R):
+        success, centers, allocations = solve_radius(index, R, r, threshold=threshold, flow_backend=flow_backend,
+                                                     profiler=profiler, weights=weights)
+        return success, (centers, allocations)
+
+    if search == 'linear':
+        for R in _timed(candidates, profiler, 'candidates'):
+            success, result = probe(R)
+            if success:
+                return R, *result
+        return None, [], None
+
+    for candidate_radii, is_last in _timed(candidates.windows(), profiler, 'candidates'):
+        if not is_last:
+            success, _ = probe(candidate_radii.max())
+            if not success:
+                continue
+        R, result = select_smallest_feasible(candidate_radii, probe)
+        if R is not None:
+            return R, *result
+    return None, [], None
+
+def compute_r_gather_coreset(points: list[Point] | PointSet, r: int, tolerance: float = 0.0,
+                             backend: str = 'dense', search: str = 'binary',
+                             flow_backend: str = 'matching', epsilon: float | None = None,
+                             profiler: Profiler | None = None,
+                             memory_budget: int | None = None) -> ClusterResult:
+    """
+    r-gather on weighted representatives, expanded back to every point
+
+    Duplicates (or tolerance-close points, see build_coreset) are collapsed
+    first, the weighted problem is solved on the representatives, and the
+    clusters are expanded so that each one holds at least r of the original
+    points. With tolerance=0 the optimal R is that of compute_r_gather on
+    the full input; with tolerance > 0 the cluster radii are at most
+    2R + tolerance.
+
+    Returns:
+        ClusterResult over the original points (empty if no clustering exists)
+    """
+    points = as_point_set(points)
+    profiler = NULL_PROFILER if profiler is None else profiler
+    with profiler.phase('coreset'):
+        coreset = build_coreset(points, tolerance)
+    profiler.count('coreset_representatives', coreset.m)
+
+    with profiler.phase('distance_matrix'):
+        index = build_neighbor_index(coreset.point_set(), backend, memory_budget=memory_budget)
+    try:
+        R, centers, allocations = weighted_search(index, coreset.weights, r, search, flow_backend, epsilon,
+                                                  profiler)
+    finally:
+        index.close()
+    if R is None:
+        return ClusterResult.empty(points)
+    with profiler.phase('clusters'):
+        return coreset.expand(centers, allocations)
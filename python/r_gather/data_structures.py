@@ -1,5 +1,6 @@
 # data_structure.py
 import numpy as np
+from collections.abc import Sequence
 from dataclasses import dataclass
 
 # Point Data Structure
@@ -8,13 +9,215 @@ class Point:
     id: int
     coordinate: np.ndarray
 
+# Columnar Point Set
+class PointSet:
+    """
+    Points stored column-wise: one contiguous (n, d) coordinate array and an
+    (n,) id array
+
+    Indexing returns a Point whose coordinate is a view of the row, so code
+    written against list[Point] keeps working without copying coordinates.
+    """
+
+    def __init__(self, coordinates: np.ndarray, ids: np.ndarray | None = None):
+        # asanyarray keeps memmaps as memmaps
+        coordinates = np.asanyarray(coordinates)
+        if coordinates.ndim == 1:
+            coordinates = coordinates.reshape(-1, 1)
+        if coordinates.ndim != 2:
+            raise ValueError(f"coordinates must be a (n, d) array, got shape {coordinates.shape}")
+        n = coordinates.shape[0]
+        ids = np.arange(n) if ids is None else np.asarray(ids)
+        if ids.shape != (n,):
+            raise ValueError(f"ids must have shape {(n,)}, got {ids.shape}")
+        self.coordinates = coordinates
+        self.ids = ids
+
+    @classmethod
+    def from_points(cls, points: list[Point]) -> 'PointSet':
+        """
+        Adapt a list of Point dataclasses
+
+        When the coordinates are consecutive rows of one (n, d) array (e.g.
+        Points built by enumerating a coordinate array), that array is
+        reused without copying; otherwise the rows are stacked once.
+        """
+        ids = np.fromiter((p.id for p in points), dtype=np.int64, count=len(points))
+        coordinates = _shared_rows(points)
+        if coordinates is None:
+            coordinates = np.array([p.coordinate for p in points])
+        return cls(coordinates, ids)
+
+    @property
+    def n(self) -> int:
+        return self.coordinates.shape[0]
+
+    @property
+    def dimension(self) -> int:
+        return self.coordinates.shape[1]
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __getitem__(self, i) -> Point:
+        return Point(id=self.ids[i].item(), coordinate=self.coordinates[i])
+
+    def __iter__(self):
+        for i in range(self.n):
+            yield self[i]
+
+    def to_points(self) -> list[Point]:
+        """
+        Point dataclasses whose coordinates are views into this set
+        """
+        return list(self)
+
+def _shared_rows(points: list[Point]) -> np.ndarray | None:
+    # The 2D array whose consecutive rows are the point coordinates, if any
+    if not points:
+        return None
+    first = points[0].coordinate
+    base = first.base if isinstance(first, np.ndarray) else None
+    if not isinstance(base, np.ndarray) or base.ndim != 2 or first.ndim != 1:
+        return None
+    if base.shape[1] != first.shape[0] or base.strides[1] != first.strides[0]:
+        return None
+
+    start = base.__array_interface__['data'][0]
+    offset = first.__array_interface__['data'][0] - start
+    row = base.strides[0]
+    if row <= 0 or offset % row:
+        return None
+    first_row = offset // row
+    if first_row + len(points) > base.shape[0]:
+        return None
+
+    for i, p in enumerate(points):
+        c = p.coordinate
+        if not isinstance(c, np.ndarray) or c.base is not base or c.strides != first.strides:
+            return None
+        if c.__array_interface__['data'][0] - start != offset + i * row:
+            return None
+    return base[first_row:first_row + len(points)]
+
+def as_point_set(points) -> PointSet:
+    """
+    Accept a PointSet, a list of Points or an (n, d) coordinate array
+    """
+    if isinstance(points, PointSet):
+        return points
+    if isinstance(points, np.ndarray):
+        return PointSet(points)
+    return PointSet.from_points(list(points))
+
 # Cluster Data Structure
-@dataclass
 class Cluster:
-    id: int
-    coordinate: np.ndarray
-    members: list[Point]
-    radius: float
-    
+    """
+    One cluster: center coordinate, members and radius
+
+    Cluster(id, coordinate, members, radius) holds a list of Points, as it
+    always has. ClusterResult builds its clusters with from_indices
+    instead: the members are then indices into a PointSet and the Point
+    objects are materialized only when `members` is read.
+    """
+
+    def __init__(self, id: int, coordinate: np.ndarray, members: list[Point], radius: float):
+        self.id = id
+        self.coordinate = coordinate
+        self.radius = radius
+        self.point_set = None
+        self.member_indices = None
+        self._members = list(members)
+
+    @classmethod
+    def from_indices(cls, id: int, coordinate: np.ndarray, member_indices: np.ndarray, radius: float,
+                     point_set: PointSet) -> 'Cluster':
+        """
+        Cluster whose members are the rows `member_indices` of point_set
+        """
+        cluster = cls(id, coordinate, [], radius)
+        cluster.point_set = point_set
+        cluster.member_indices = member_indices
+        cluster._members = None
+        return cluster
+
+    @property
+    def members(self) -> list[Point]:
+        if self._members is None:
+            # Materialized on demand from the member indices
+            self._members = [self.point_set[i] for i in self.member_indices]
+        return self._members
+
+    @property
+    def member_coordinates(self) -> np.ndarray:
+        if self.member_indices is None:
+            return np.array([p.coordinate for p in self._members])
+        return self.point_set.coordinates[self.member_indices]
+
     def size(self) -> int:
-        return len(self.members)
\ No newline at end of file
+        if self.member_indices is None:
+            return len(self._members)
+        return len(self.member_indices)
+
+    def __repr__(self) -> str:
+        return f"Cluster(id={self.id}, coordinate={self.coordinate!r}, size={self.size()}, radius={self.radius})"
+
+# Clustering Result
+class ClusterResult(Sequence):
+    """
+    A clustering stored as flat arrays
+
+    labels[p] is the cluster of point p (-1 if unassigned), centers[k] the
+    point index of cluster k's center and radii[k] its radius. The result is
+    a read-only sequence of Cluster objects, which are materialized only
+    when indexed or iterated.
+    """
+
+    def __init__(self, point_set: PointSet, labels: np.ndarray, centers: np.ndarray,
+                 radii: np.ndarray):
+        self.point_set = point_set
+        self.labels = labels
+        self.centers = centers
+        self.radii = radii
+        self._order = None
+        self._starts = None
+
+    @classmethod
+    def empty(cls, point_set: PointSet) -> 'ClusterResult':
+        """
+        The result of a search that found no valid clustering
+        """
+        return cls(point_set, np.full(point_set.n, -1, dtype=np.intp),
+                   np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float64))
+
+    @property
+    def sizes(self) -> np.ndarray:
+        return np.bincount(self.labels[self.labels >= 0], minlength=len(self.centers))
+
+    def member_indices(self, k: int) -> np.ndarray:
+        """
+        Sorted point indices of cluster k
+        """
+        if self._order is None:
+            # One stable sort groups every cluster's members contiguously
+            self._order = np.argsort(self.labels, kind='stable')
+            self._starts = np.concatenate(([0], np.cumsum(self.sizes))) + np.count_nonzero(self.labels < 0)
+        return self._order[self._starts[k]:self._starts[k + 1]]
+
+    def __len__(self) -> int:
+        return len(self.centers)
+
+    def __getitem__(self, k):
+        if isinstance(k, slice):
+            return [self[i] for i in range(*k.indices(len(self)))]
+        if k < 0:
+            k += len(self)
+        if not 0 <= k < len(self):
+            raise IndexError(f"cluster index {k} out of range")
+        return Cluster.from_indices(
+            id=k,
+            coordinate=self.point_set.coordinates[self.centers[k]],
+            member_indices=self.member_indices(k),
+            radius=float(self.radii[k]),
+            point_set=self.point_set
+        )
@@ -1,15 +1,23 @@
 # distance_matrix.py
 import numpy as np
-from .data_structures import Point
+from .data_structures import Point, PointSet, as_point_set
+
+# Default number of rows computed per tile in the blocked engine
+DEFAULT_TILE_SIZE = 1024
+
+# Squared distances below this many ulps (per dimension) of the squared
+# norms are recomputed directly by distance_tile
+_CANCELLATION_ULPS = 8
 
 # compute distance matrix for a set of points
-def compute_distance_matrix(points: list[Point]) -> np.ndarray:
-    
+def compute_distance_matrix(points: list[Point] | PointSet, tile_size: int = DEFAULT_TILE_SIZE,
+                            dtype=np.float64) -> np.ndarray:
+
     # double loop
     """
     n = len(points)
     matrix = np.zeros((n, n))
-    
+
     for i in range(n):
         for j in range(i + 1, n):
             dist = np.linalg.norm(
@@ -17,13 +25,208 @@ def compute_distance_matrix(points: list[Point]) -> np.ndarray:
             )
             matrix[i, j] = dist
             matrix[j, i] = dist
-    
+
     return matrix
     """
 
-    # vectorized
-    # O(n²m) / O(n²m)
-    coords = np.array([p.coordinate for p in points])
-    diff = coords[:, np.newaxis, :] - coords[np.newaxis, :, :]
-    matrix = np.linalg.norm(diff, axis = -1)
-    return matrix
\ No newline at end of file
+    # blocked
+    # O(n²m) / O(n² + tile·n)
+    coords = as_point_set(points).coordinates
+    return compute_distance_matrix_blocked(coords, tile_size=tile_size, dtype=dtype)
+
+def compute_distance_matrix_blocked(coords: np.ndarray, tile_size: int = DEFAULT_TILE_SIZE,
+                                    dtype=np.float64, out: np.ndarray | None = None) -> np.ndarray:
+    """
+    Blocked Euclidean distance matrix using ‖a‖² + ‖b‖² − 2a·b
+
+    Rows are processed in tiles of `tile_size`; each tile is a single
+    BLAS matmul against the remaining columns, so the only temporaries
+    are O(tile_size · n) instead of the O(n² · d) broadcast difference.
+    Only the upper triangle is computed and mirrored, so the result is
+    exactly symmetric with an exact zero diagonal.
+
+    Tolerance: the identity loses precision through cancellation. Coordinates
+    are shifted by their per-dimension minimum first, after which the result
+    agrees with the direct computation to about
+    sqrt(eps) * max‖x − min‖ in absolute terms (eps of `dtype`), i.e.
+    ~1e-8 relative to the data extent for float64 and ~1e-3 for float32.
+    Distances within that error of 0 are recomputed from the coordinate
+    difference, so duplicate points are exactly 0 apart. Integer-valued
+    coordinates of moderate size are reproduced exactly.
+
+    Args:
+        coords: (n, d) coordinate array
+        tile_size: Number of rows per tile
+        dtype: Floating type of the computation and result (float32 or float64)
+        out: Optional (n, n) array of type `dtype` to write into (e.g. a memmap)
+
+    Returns:
+        matrix: (n, n) distance matrix of type `dtype`
+    """
+    dtype = np.dtype(dtype)
+    if dtype not in (np.dtype(np.float32), np.dtype(np.float64)):
+        raise ValueError(f"dtype must be float32 or float64, got {dtype}")
+    if tile_size < 1:
+        raise ValueError(f"tile_size must be positive, got {tile_size}")
+
+    coords = np.asarray(coords)
+    if coords.ndim == 1:
+        coords = coords.reshape(-1, 1)
+    n = coords.shape[0]
+    if out is None:
+        matrix = np.empty((n, n), dtype=dtype)
+    elif out.shape != (n, n) or out.dtype != dtype:
+        raise ValueError(f"out must have shape {(n, n)} and dtype {dtype}")
+    else:
+        matrix = out
+    if n == 0:
+        return matrix
+
+    coords, sq_norms = prepare_coordinates(coords, dtype)
+    for start in range(0, n, tile_size):
+        stop = min(start + tile_size, n)
+        block = distance_tile(coords, sq_norms, start, stop)
+        matrix[start:stop, start:] = block
+        matrix[start:, start:stop] = block.T
+
+    return matrix
+
+def prepare_coordinates(coords: np.ndarray, dtype=np.float64) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Coordinates shifted towards the origin (to limit cancellation) in
+    `dtype`, and their squared norms, as used by distance_tile
+    """
+    coords = (coords - coords.min(axis=0)).astype(dtype)
+    return coords, np.einsum('ij,ij->i', coords, coords)
+
+def distance_tile(coords: np.ndarray, sq_norms: np.ndarray, start: int, stop: int,
+                  squared: bool = False) -> np.ndarray:
+    """
+    Distances of rows [start, stop) to columns [start, n) by one matmul
+
+    The leading (stop - start) square is exactly symmetric with a zero
+    diagonal; the remaining columns are the upper triangle of these rows.
+    Entries lost to cancellation are recomputed directly (see
+    compute_distance_matrix_blocked).
+    With squared=True the squared distances are returned (no sqrt); their
+    square roots equal the squared=False result exactly.
+    """
+    # Squared distances of rows [start, stop) to columns [start, n)
+    block = coords[start:stop] @ coords[start:].T
+    block *= -2
+    block += sq_norms[start:stop, np.newaxis]
+    block += sq_norms[np.newaxis, start:]
+    np.maximum(block, 0, out=block)
+
+    # Entries near the cancellation error of the identity (duplicates come
+    # out around sqrt(eps)·‖x‖ instead of 0) are recomputed from the
+    # direct difference
+    scale = sq_norms[start:stop].max(initial=0) + sq_norms[start:].max(initial=0)
+    tolerance = _CANCELLATION_ULPS * (coords.shape[1] + 2) * np.finfo(block.dtype).eps * scale
+    close = np.flatnonzero(block <= tolerance)
+    if len(close):
+        rows, cols = np.divmod(close, block.shape[1])
+        diff = coords[start + rows] - coords[start + cols]
+        block[rows, cols] = np.einsum('ij,ij->i', diff, diff)
+    if not squared:
+        np.sqrt(block, out=block)
+
+    # Make the diagonal tile exactly symmetric with a zero diagonal
+    width = stop - start
+    diagonal = block[:, :width]
+    upper = np.triu(diagonal, k=1)
+    diagonal[...] = upper + upper.T
+    return block
+
+def compute_condensed_distances(points: list[Point] | PointSet | np.ndarray,
+                                tile_size: int = DEFAULT_TILE_SIZE, dtype=np.float64,
+                                squared: bool = False) -> np.ndarray:
+    """
+    Condensed (pdist-style) distances: the upper triangle i < j in row-major order
+
+    Same tiles and values as compute_distance_matrix_blocked, but every pair
+    is stored once and the zero diagonal not at all, n(n - 1)/2 entries
+    instead of n². With squared=True the squared distances are stored and
+    no square root is taken; see squared_threshold for comparing them.
+
+    Returns:
+        condensed: (n(n - 1)/2,) array of type `dtype`; pair (i, j) is at
+                   condensed_index(n, i, j)
+    """
+    dtype = np.dtype(dtype)
+    if dtype not in (np.dtype(np.float32), np.dtype(np.float64)):
+        raise ValueError(f"dtype must be float32 or float64, got {dtype}")
+    if tile_size < 1:
+        raise ValueError(f"tile_size must be positive, got {tile_size}")
+
+    coords = points if isinstance(points, np.ndarray) else as_point_set(points).coordinates
+    if coords.ndim == 1:
+        coords = coords.reshape(-1, 1)
+    n = coords.shape[0]
+    condensed = np.empty(condensed_size(n), dtype=dtype)
+    if n < 2:
+        return condensed
+
+    coords, sq_norms = prepare_coordinates(coords, dtype)
+    for start in range(0, n, tile_size):
+        stop = min(start + tile_size, n)
+        block = distance_tile(coords, sq_norms, start, stop, squared=squared)
+        # Boolean indexing reads row-major, i.e. in condensed order
+        rows = np.arange(start, stop)[:, np.newaxis]
+        cols = np.arange(start, n)[np.newaxis, :]
+        condensed[condensed_offset(n, start):condensed_offset(n, stop)] = block[cols > rows]
+    return condensed
+
+def condensed_size(n: int) -> int:
+    """
+    Number of pairs i < j of n points
+    """
+    return n * (n - 1) // 2
+
+def condensed_offset(n: int, i):
+    """
+    Position of pair (i, i + 1), the first entry of row i, in the condensed array
+    """
+    return i * n - i * (i + 1) // 2
+
+def condensed_index(n: int, i, j):
+    """
+    Condensed position of pair (i, j) (element-wise, either order, i != j)
+    """
+    i, j = np.minimum(i, j), np.maximum(i, j)
+    return condensed_offset(n, i) + j - i - 1
+
+def condensed_to_square(n: int, k):
+    """
+    Pair (i, j), i < j, at condensed position k (element-wise)
+
+    Returns:
+        (i, j): integer arrays shaped like k
+    """
+    k = np.asarray(k, dtype=np.int64)
+    # Closed form for the row, then a correction step for rounding
+    i = (n - 2 - np.floor(np.sqrt(-8.0 * k + 4.0 * n * (n - 1) - 7) / 2 - 0.5)).astype(np.int64)
+    i -= condensed_offset(n, i) > k
+    i += condensed_offset(n, i + 1) <= k
+    return i, k - condensed_offset(n, i) + i + 1
+
+def squared_threshold(threshold: float, dtype=np.float64) -> float:
+    """
+    Largest squared distance s of type `dtype` with sqrt(s) <= threshold
+
+    Since sqrt is monotone, s_ij <= squared_threshold(t) holds exactly when
+    sqrt(s_ij) <= t, so squared distances can be compared against a squared
+    threshold with the same outcome as the rooted distances.
+    """
+    scalar = np.dtype(dtype).type
+    t = scalar(threshold)
+    if np.isnan(t) or t < 0:
+        return -np.inf
+    if np.isinf(t):
+        return np.inf
+    s = t * t
+    while s > 0 and np.sqrt(s) > t:
+        s = np.nextafter(s, scalar(-np.inf))
+    while np.sqrt(np.nextafter(s, scalar(np.inf))) <= t:
+        s = np.nextafter(s, scalar(np.inf))
+    return float(s)
@@ -0,0 +1,162 @@
+# distance_store.py
+import os
+import shutil
+import tempfile
+import weakref
+import numpy as np
+from .distance_matrix import distance_tile, prepare_coordinates
+
+# Default RAM budget of a DistanceStore and its queries
+DEFAULT_MEMORY_BUDGET = 1024 ** 3
+
+# Row tiles are sized so that this many (tile, n) arrays fit the budget
+# (the tile itself plus the temporaries of a query on it)
+_TILE_COPIES = 4
+
+def tile_rows_for_budget(n: int, itemsize: int, memory_budget: int) -> int:
+    """
+    Rows per tile such that _TILE_COPIES (tile, n) arrays fit memory_budget
+    """
+    return max(1, int(memory_budget // (_TILE_COPIES * max(n, 1) * itemsize)))
+
+def block_side_for_budget(itemsize: int, memory_budget: int) -> int:
+    """
+    Side of the square blocks such that _TILE_COPIES of them fit memory_budget
+    """
+    return max(1, int(np.sqrt(memory_budget / (_TILE_COPIES * itemsize))))
+
+def _mirror_upper(matrix: np.ndarray, side: int):
+    # Copy the upper triangle of a square (memmapped) matrix into its lower
+    # triangle, one square block at a time in row-major block order
+    n = matrix.shape[0]
+    for i0 in range(0, n, side):
+        i1 = min(i0 + side, n)
+        for j0 in range(0, i0, side):
+            j1 = min(j0 + side, n)
+            matrix[i0:i1, j0:j1] = np.array(matrix[j0:j1, i0:i1]).T
+        # Diagonal block: only its own upper triangle is written
+        block = np.array(matrix[i0:i1, i0:i1])
+        lower = np.tril_indices(i1 - i0, -1)
+        block[lower] = block.T[lower]
+        matrix[i0:i1, i0:i1] = block
+
+class DistanceStore:
+    """
+    (n, n) distance matrix in a .npy file, read back in row tiles
+
+    The file is written once, one full row tile at a time, so both writing
+    and every later pass (tiles()) move through it sequentially; queries
+    that need only some rows (rows()) read them in ascending order. No
+    query holds more than a few tiles in RAM, so memory_budget (bytes)
+    bounds the working set however large the matrix is.
+
+    Attributes:
+        path: The .npy file
+        matrix: Read-only memmap of the file
+        n: Number of points
+        memory_budget: RAM budget in bytes
+        tile_rows: Rows per tile
+        max_distance: Largest entry
+    """
+
+    def __init__(self, path: str, memory_budget: int = DEFAULT_MEMORY_BUDGET,
+                 max_distance: float | None = None):
+        self.path = path
+        self.matrix = np.load(path, mmap_mode='r')
+        self.n = self.matrix.shape[0]
+        self.memory_budget = memory_budget
+        self.tile_rows = tile_rows_for_budget(self.n, self.matrix.dtype.itemsize, memory_budget)
+        if max_distance is None:
+            max_distance = max((float(block.max()) for _, _, block in self.tiles()), default=0.0)
+        self.max_distance = max_distance
+        self._cleanup = None
+
+    @classmethod
+    def create(cls, coords: np.ndarray, path: str | None = None,
+               memory_budget: int = DEFAULT_MEMORY_BUDGET, dtype=np.float64) -> 'DistanceStore':
+        """
+        Compute the distance matrix of coords into a new .npy file
+
+        Two sequential passes. The first writes the upper part of every row
+        tile (distance_tile; each row's tail is one contiguous run). The
+        second mirrors it into the lower triangle by square blocks sized
+        from the budget (block_side_for_budget): a block above the diagonal
+        is read and written transposed below it, so every read and write is
+        a run of block-side entries per row instead of one scattered
+        segment of a tile's width per earlier row. The stored matrix is
+        exactly symmetric and equal to compute_distance_matrix_blocked with
+        the same tile size.
+
+        Args:
+            coords: (n, d) coordinates
+            path: Target file; a temporary directory (under TMPDIR) that is
+                  removed with the store if None
+            memory_budget: RAM budget in bytes
+            dtype: Distance dtype
+        """
+        coords = np.asarray(coords)
+        n = coords.shape[0]
+        directory = None
+        if path is None:
+            directory = tempfile.mkdtemp(prefix='r_gather_store_')
+            path = os.path.join(directory, 'distances.npy')
+
+        tile_rows = tile_rows_for_budget(n, np.dtype(dtype).itemsize, memory_budget)
+        coords, sq_norms = prepare_coordinates(coords, dtype)
+        matrix = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=(n, n))
+        max_distance = 0.0
+        for start in range(0, n, tile_rows):
+            stop = min(start + tile_rows, n)
+            block = distance_tile(coords, sq_norms, start, stop)
+            matrix[start:stop, start:] = block
+            max_distance = max(max_distance, float(block.max()))
+        _mirror_upper(matrix, block_side_for_budget(np.dtype(dtype).itemsize, memory_budget))
+        matrix.flush()
+        del matrix
+
+        store = cls(path, memory_budget, max_distance)
+        if directory is not None:
+            store._cleanup = weakref.finalize(store, shutil.rmtree, directory, True)
+        return store
+
+    def tiles(self):
+        """
+        Sequential pass over the matrix
+
+        Yields:
+            (start, stop, block): block holds rows [start, stop), copied into RAM
+        """
+        for start in range(0, self.n, self.tile_rows):
+            stop = min(start + self.tile_rows, self.n)
+            yield start, stop, np.array(self.matrix[start:stop])
+
+    def row(self, i: int) -> np.ndarray:
+        return np.array(self.matrix[i])
+
+    def rows(self, indices):
+        """
+        Selected rows, read in ascending order, at most one tile at a time
+
+        Yields:
+            (rows, block): sorted unique row indices and their (len(rows), n) rows
+        """
+        indices = np.unique(np.asarray(indices, dtype=np.intp))
+        for start in range(0, len(indices), self.tile_rows):
+            rows = indices[start:start + self.tile_rows]
+            yield rows, self.matrix[rows]
+
+    def close(self):
+        """
+        Release the memmap and remove a temporary file
+        """
+        self.matrix = None
+        if self._cleanup is not None:
+            self._cleanup()
+
+    def __getstate__(self):
+        # Reopened by path (e.g. in worker processes); only the creating
+        # store removes a temporary file
+        return {'path': self.path, 'memory_budget': self.memory_budget, 'max_distance': self.max_distance}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'], state['memory_budget'], state['max_distance'])
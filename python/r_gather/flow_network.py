@@ -1,9 +1,17 @@
 # flow_network.py
 import numpy as np
 import networkx as nx
+from .adjacency import BitsetAdjacency, CSRAdjacency
+from .bipartite_matching import max_b_matching
+from .neighbor_index import NeighborIndex, as_neighbor_index
+from .profiling import NULL_PROFILER
+
+FLOW_BACKENDS = ('matching', 'networkx')
 
 def build_flow_network(n: int, centers: list[int], 
-                      distance_matrix: np.ndarray, R: float, r: int) -> nx.DiGraph:
+                      distance_matrix: np.ndarray | NeighborIndex, R: float, r: int,
+                      adjacency: CSRAdjacency | BitsetAdjacency | None = None,
+                      weights: np.ndarray | None = None) -> nx.DiGraph:
     """
     Build flow network for verification
     
@@ -15,19 +23,23 @@ def build_flow_network(n: int, centers: list[int],
     
     Edges:
     - s -> c (capacity r) for each c in C
-    - c -> v (capacity 1) if distance(c,v) <= 2R
-    - v -> t (capacity 1) for each v in V
+    - c -> v (capacity 1, or w_v) if distance(c,v) <= 2R
+    - v -> t (capacity 1, or w_v) for each v in V
     
     Args:
         n: Number of points
         centers: List of center indices
-        distance_matrix: Distance matrix between points
+        distance_matrix: Distance matrix between points, or a NeighborIndex
         R: Current radius value
         r: Minimum cluster size
+        adjacency: Optional precomputed 2R adjacency of this R
+        weights: Optional integer point weights (weighted representatives,
+                 see coreset.py); point v then stands for w_v points
     
     Returns:
         G: The flow network as a DiGraph
     """
+    index = as_neighbor_index(distance_matrix)
     G = nx.DiGraph()
     
     # Add source and sink nodes
@@ -44,36 +56,265 @@ def build_flow_network(n: int, centers: list[int],
     for i in range(n):
         point_node = f'point_{i}'
         G.add_node(point_node)
-        G.add_edge(point_node, 'sink', capacity=1)
+        G.add_edge(point_node, 'sink', capacity=1 if weights is None else int(weights[i]))
     
     # Add edges from centers to points (if distance <= 2R)
     for center_idx in centers:
         center_node = f'center_{center_idx}'
-        for i in range(n):
-            if distance_matrix[center_idx][i] <= 2 * R:
-                point_node = f'point_{i}'
-                G.add_edge(center_node, point_node, capacity=1)
+        if adjacency is not None:
+            neighbors = adjacency.neighbors(center_idx)
+        else:
+            neighbors = index.neighbors_within(center_idx, 2 * R)
+        for i in neighbors:
+            point_node = f'point_{i}'
+            G.add_edge(center_node, point_node, capacity=1 if weights is None else int(weights[i]))
     
     return G
 
+def build_flow_arrays(centers: list[int], distance_matrix: np.ndarray | NeighborIndex, R: float,
+                      adjacency: CSRAdjacency | BitsetAdjacency | None = None):
+    """
+    Center -> point edges of the flow network as CSR arrays
+
+    Row k holds the points within 2R of centers[k] (the c -> v edges of
+    build_flow_network); source and sink edges are implicit. Rows are taken
+    from the probe's precomputed 2R adjacency when one is given.
+
+    Returns:
+        (indptr, indices)
+    """
+    if adjacency is not None:
+        return adjacency.subgraph_rows(centers)
+    index = as_neighbor_index(distance_matrix)
+    rows = [index.neighbors_within(center_idx, 2 * R) for center_idx in centers]
+    indptr = np.zeros(len(rows) + 1, dtype=np.intp)
+    indptr[1:] = np.cumsum([len(row) for row in rows])
+    indices = np.concatenate(rows).astype(np.intp) if rows else np.empty(0, dtype=np.intp)
+    return indptr, indices
+
 def flow_network_verification(n: int, centers: list[int], 
-                             distance_matrix: np.ndarray, R: float, r: int):
+                             distance_matrix: np.ndarray | NeighborIndex, R: float, r: int,
+                             flow_backend: str = 'matching', adjacency: CSRAdjacency | BitsetAdjacency | None = None,
+                             profiler=None, weights: np.ndarray | None = None):
     """
     Phase 2.2: Flow network verification and reassignment
+
+    Args:
+        flow_backend: 'matching' (array-based b-matching, default) or
+                      'networkx' (maximum_flow on build_flow_network, reference)
+        adjacency: Optional precomputed 2R adjacency of this R
+        profiler: Optional Profiler; times 'flow_network' (building the
+                  graph or CSR arrays) and 'max_flow'
+        weights: Optional integer point weights; the w_v points a
+                 representative stands for may be split across centers
+
+    Returns:
+        (success, assignments) - point -> center dict, or with weights
+                                 (success, allocations) as returned by
+                                 weighted_allocations
+    """
+    profiler = NULL_PROFILER if profiler is None else profiler
+    if weights is not None:
+        if flow_backend == 'matching':
+            return _weighted_matching_verification(n, centers, distance_matrix, R, r, weights, adjacency, profiler)
+        if flow_backend == 'networkx':
+            return _networkx_verification(n, centers, distance_matrix, R, r, adjacency, profiler, weights)
+    elif flow_backend == 'matching':
+        return _matching_verification(n, centers, distance_matrix, R, r, adjacency, profiler)
+    elif flow_backend == 'networkx':
+        return _networkx_verification(n, centers, distance_matrix, R, r, adjacency, profiler)
+    raise ValueError(f"Unknown flow backend {flow_backend!r}, expected one of {FLOW_BACKENDS}")
+
+def _matching_verification(n: int, centers: list[int],
+                           distance_matrix: np.ndarray | NeighborIndex, R: float, r: int,
+                           adjacency: CSRAdjacency | BitsetAdjacency | None = None,
+                           profiler=NULL_PROFILER):
+    """
+    Flow verification as a b-matching over CSR arrays (no graph objects)
+    """
+    with profiler.phase('flow_network'):
+        indptr, indices = build_flow_arrays(centers, distance_matrix, R, adjacency)
+    with profiler.phase('max_flow'):
+        match_point, load = max_b_matching(indptr, indices, n, int(r))
+    return _assignments_from_matching(n, centers, indptr, indices, match_point, load, r)
+
+def _assignments_from_matching(n: int, centers: list[int], indptr: np.ndarray, indices: np.ndarray,
+                               match_point: np.ndarray, load: np.ndarray, r: int):
+    # Check if every center got exactly r points
+    if np.any(load != r):
+        return False, {}
+
+    # Remaining points go to the first center (in centers order) within 2R
+    owner = match_point.copy()
+    for k in range(len(centers)):
+        neighbors = indices[indptr[k]:indptr[k + 1]]
+        owner[neighbors[owner[neighbors] == -1]] = k
+    if np.any(owner == -1):
+        return False, {}
+
+    center_array = np.asarray(centers)
+    assignments = dict(zip(range(n), center_array[owner].tolist()))
+    return True, assignments
+
+def _weighted_matching_verification(n: int, centers: list[int],
+                                    distance_matrix: np.ndarray | NeighborIndex, R: float, r: int,
+                                    weights: np.ndarray, adjacency: CSRAdjacency | BitsetAdjacency | None = None,
+                                    profiler=NULL_PROFILER):
+    """
+    Weighted flow verification as a unit b-matching
+
+    Representative v is split into min(w_v, r * k_v) unit points, k_v being
+    the number of centers within 2R (no feasible flow sends more through
+    it), and every center -> v edge into edges to all of v's units.
+    """
+    weights = np.asarray(weights, dtype=np.int64)
+    with profiler.phase('flow_network'):
+        indptr, indices = build_flow_arrays(centers, distance_matrix, R, adjacency)
+        units = np.minimum(weights, r * np.bincount(indices, minlength=n))
+        unit_start = np.cumsum(units) - units
+        lengths = units[indices]
+        first = np.cumsum(lengths) - lengths
+        unit_indices = np.repeat(unit_start[indices] - first, lengths) + np.arange(int(lengths.sum()))
+        unit_indptr = np.concatenate([[0], np.cumsum(lengths)])[indptr]
+    with profiler.phase('max_flow'):
+        match_unit, load = max_b_matching(unit_indptr, unit_indices, int(units.sum()), int(r))
+    if np.any(load != r):
+        return False, {}
+
+    unit_point = np.repeat(np.arange(n), units)
+    matched = match_unit >= 0
+    return weighted_allocations(n, centers, indptr, indices, weights,
+                                unit_point[matched], match_unit[matched], np.ones(int(matched.sum()), dtype=np.int64))
+
+def weighted_allocations(n: int, centers: list[int], indptr: np.ndarray, indices: np.ndarray,
+                         weights: np.ndarray, flow_points: np.ndarray, flow_centers: np.ndarray,
+                         flow_units: np.ndarray):
+    """
+    Complete a weighted flow into allocations of every point's weight
+
+    Weight left over after the flow goes to the first center (in centers
+    order) within 2R, like the remaining points of the unweighted case.
+
+    Args:
+        indptr, indices: Center -> point CSR rows (build_flow_arrays)
+        flow_points, flow_centers, flow_units: The flow, as flow_units[k]
+            units from point flow_points[k] to center position flow_centers[k]
+
+    Returns:
+        (success, allocations) - allocations is (points, centers, units):
+            units[k] of the weight of points[k] go to center index
+            centers[k], ordered by point; each point's units sum to its weight
+    """
+    k = len(centers)
+    remaining = weights - np.bincount(flow_points, weights=flow_units, minlength=n).astype(np.int64)
+    rows = np.repeat(np.arange(k), np.diff(indptr))
+    first_center = np.full(n, k, dtype=np.intp)
+    np.minimum.at(first_center, indices, rows)
+    left = np.flatnonzero(remaining > 0)
+    if np.any(first_center[left] == k):
+        return False, {}
+
+    points = np.concatenate([flow_points, left])
+    positions = np.concatenate([flow_centers, first_center[left]])
+    units = np.concatenate([flow_units, remaining[left]])
+    order = np.argsort(points, kind='stable')
+    center_array = np.asarray(centers, dtype=np.intp)
+    return True, (points[order], center_array[positions[order]], units[order])
+
+def _restrict_matching(match_point: np.ndarray, indptr: np.ndarray, indices: np.ndarray) -> np.ndarray:
+    # Keep only the matched pairs that are still edges of the CSR graph
+    rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    still_matched = match_point[indices] == rows
+    restricted = np.full_like(match_point, -1)
+    restricted[indices[still_matched]] = rows[still_matched]
+    return restricted
+
+class IncrementalFlowVerifier:
     """
+    Phase 2.2 with warm starts across successive R probes
+
+    Keeps the matching (and thereby the residual graph) of the previous
+    probe. When initial_clustering returns the same centers again, the
+    center -> point edge sets of a larger R are supersets of the old ones,
+    so the old matching stays valid and max_b_matching only has to augment
+    through the newly admitted edges. For a smaller R the matching is
+    restricted to the surviving edges first. A changed center set falls back
+    to a full rebuild.
+    """
+
+    def __init__(self, n: int, distance_matrix: np.ndarray | NeighborIndex, r: int):
+        self.n = n
+        self.index = as_neighbor_index(distance_matrix)
+        self.r = int(r)
+        self.centers = None
+        self.R = None
+        self.match_point = None
+        self.rebuilds = 0
+        self.warm_starts = 0
+
+    def verify(self, centers: list[int], R: float, adjacency: CSRAdjacency | BitsetAdjacency | None = None,
+               profiler=None):
+        """
+        Same contract as flow_network_verification(n, centers, index, R, r)
+        """
+        profiler = NULL_PROFILER if profiler is None else profiler
+        with profiler.phase('flow_network'):
+            indptr, indices = build_flow_arrays(centers, self.index, R, adjacency)
+
+        initial = None
+        if self.centers is not None and np.array_equal(self.centers, centers):
+            initial = self.match_point
+            if R < self.R:
+                initial = _restrict_matching(initial, indptr, indices)
+            self.warm_starts += 1
+        else:
+            self.rebuilds += 1
+
+        with profiler.phase('max_flow'):
+            match_point, load = max_b_matching(indptr, indices, self.n, self.r, match_point=initial)
+        self.centers = np.array(centers)
+        self.R = R
+        self.match_point = match_point
+        return _assignments_from_matching(self.n, centers, indptr, indices, match_point, load, self.r)
+
+def _networkx_verification(n: int, centers: list[int],
+                           distance_matrix: np.ndarray | NeighborIndex, R: float, r: int,
+                           adjacency: CSRAdjacency | BitsetAdjacency | None = None,
+                           profiler=NULL_PROFILER, weights: np.ndarray | None = None):
+    """
+    Flow verification with NetworkX maximum flow (reference implementation)
+    """
+    index = as_neighbor_index(distance_matrix)
+
     # Build flow network
-    G = build_flow_network(n, centers, distance_matrix, R, r)
+    with profiler.phase('flow_network'):
+        G = build_flow_network(n, centers, index, R, r, adjacency, weights)
     
     # Compute maximum flow from source to sink
-    flow_value, flow_dict = nx.maximum_flow(
-        G, 'source', 'sink',
-        flow_func=nx.algorithms.flow.shortest_augmenting_path
-    )
+    with profiler.phase('max_flow'):
+        flow_value, flow_dict = nx.maximum_flow(
+            G, 'source', 'sink',
+            flow_func=nx.algorithms.flow.shortest_augmenting_path
+        )
     
     # Check if flow equals r * |C|
     expected_flow = r * len(centers)
     if flow_value < expected_flow - 0.5:
         return False, {}
+
+    if weights is not None:
+        # Per-representative flow amounts, completed to full weights
+        flow_points, flow_centers, flow_units = [], [], []
+        for position, center_idx in enumerate(centers):
+            for node, amount in flow_dict[f'center_{center_idx}'].items():
+                if amount > 0:
+                    flow_points.append(int(node[len('point_'):]))
+                    flow_centers.append(position)
+                    flow_units.append(int(amount))
+        indptr, indices = build_flow_arrays(centers, index, R, adjacency)
+        return weighted_allocations(n, centers, indptr, indices, np.asarray(weights, dtype=np.int64),
+                                    np.array(flow_points, dtype=np.intp), np.array(flow_centers, dtype=np.intp),
+                                    np.array(flow_units, dtype=np.int64))
     
     # Extract assignments from flow
     assignments = {}
@@ -99,14 +340,10 @@ def flow_network_verification(n: int, centers: list[int],
     # Handle remaining nodes (those not in flow solution)
     for point_idx in range(n):
         if point_idx not in assignments:
-            # Find any center within 2R
-            assigned = False
-            for center_idx in centers:
-                if distance_matrix[point_idx][center_idx] <= 2 * R:
-                    assignments[point_idx] = center_idx
-                    assigned = True
-                    break
-            if not assigned:
+            # Find the first center within 2R
+            within_2R = np.isin(centers, index.neighbors_within(point_idx, 2 * R))
+            if not np.any(within_2R):
                 return False, {}
+            assignments[point_idx] = centers[int(np.argmax(within_2R))]
     
     return True, assignments
\ No newline at end of file
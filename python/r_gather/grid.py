@@ -0,0 +1,247 @@
+# grid.py
+from itertools import product
+import numpy as np
+
+# Largest dimension for which the 3^d neighbor-cell scan pays off
+GRID_MAX_DIM = 5
+
+# Candidate pairs expanded per batch (bounds the temporaries)
+GRID_PAIR_BATCH = 1 << 22
+
+# Cell sizes are widened by this relative amount so that floor() rounding
+# can never put two points within the cell size into non-adjacent cells
+_CELL_SLACK = 1e-9
+
+def _row_distances(coords: np.ndarray, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    diff = coords[a] - coords[b]
+    return np.sqrt(np.sum(diff * diff, axis=-1))
+
+class UniformGrid:
+    """
+    Points bucketed into a uniform grid of cubic cells
+
+    Every cell is identified by one integer key (its row-major position in
+    the bounding box, padded by one cell on each side), and the points are
+    sorted by key, so the points of a cell are one contiguous run of
+    `order`. Any two points within cell_size of each other lie in the same
+    or in adjacent cells, i.e. one of the 3^d neighbor offsets.
+    """
+
+    def __init__(self, coords: np.ndarray, cell_size: float):
+        self.coords = coords
+        self.n, self.d = coords.shape
+        self.cell_size = cell_size
+        cells = np.floor((coords - coords.min(axis=0)) / cell_size).astype(np.int64) + 1
+        shape = cells.max(axis=0) + 2
+        if np.prod(shape.astype(np.float64)) >= 2.0 ** 62:
+            raise OverflowError("Too many grid cells for 64-bit cell keys")
+        strides = np.ones(self.d, dtype=np.int64)
+        strides[:-1] = np.cumprod(shape[::-1])[::-1][1:]
+
+        self.keys = cells @ strides
+        self.order = np.argsort(self.keys, kind='stable')
+        self.cell_keys, self.cell_starts, self.cell_counts = np.unique(
+            self.keys[self.order], return_index=True, return_counts=True
+        )
+        offsets = np.array(list(product((-1, 0, 1), repeat=self.d)), dtype=np.int64)
+        self.offsets = offsets @ strides
+
+    def candidate_counts(self, queries: np.ndarray) -> np.ndarray:
+        """
+        Number of points in the 3^d cells around each query point
+        """
+        _, counts = self._cell_ranges(queries)
+        return counts.sum(axis=1)
+
+    def candidates(self, queries: np.ndarray):
+        """
+        Every (query, point) pair with the point in a cell adjacent to the query's
+
+        Returns:
+            (owner, j): owner[k] is the position in `queries` and j[k] the
+                        point index of pair k
+        """
+        starts, counts = self._cell_ranges(queries)
+        lengths = counts.ravel()
+        total = int(lengths.sum())
+        owner = np.repeat(np.repeat(np.arange(len(queries)), starts.shape[1]), lengths)
+        first = np.cumsum(lengths) - lengths
+        positions = np.arange(total) - np.repeat(first - starts.ravel(), lengths)
+        return owner, self.order[positions]
+
+    def _cell_ranges(self, queries: np.ndarray):
+        targets = self.keys[queries][:, np.newaxis] + self.offsets[np.newaxis, :]
+        slots = np.searchsorted(self.cell_keys, targets)
+        slots = np.minimum(slots, len(self.cell_keys) - 1)
+        found = self.cell_keys[slots] == targets
+        return self.cell_starts[slots], np.where(found, self.cell_counts[slots], 0)
+
+def _query_batches(grid: UniformGrid, queries: np.ndarray):
+    # Split queries so each batch expands to about GRID_PAIR_BATCH pairs
+    if len(queries) == 0:
+        return
+    totals = np.cumsum(grid.candidate_counts(queries))
+    start = 0
+    while start < len(queries):
+        done = totals[start - 1] if start else 0
+        stop = int(np.searchsorted(totals, done + GRID_PAIR_BATCH, side='right'))
+        stop = max(stop, start + 1)
+        yield queries[start:stop]
+        start = stop
+
+def _smallest_per_group(owner: np.ndarray, dist: np.ndarray, j: np.ndarray, counts: np.ndarray, k: int):
+    # (groups, k) ascending smallest distances of each group (owner is
+    # sorted) and their point indices; inf-padded rows when the groups are
+    # of similar size, one global sort when a few groups are much larger
+    first = np.cumsum(counts) - counts
+    width = int(counts.max())
+    if width * len(counts) > 4 * len(dist) + 1024:
+        order = np.lexsort((dist, owner))
+        rows = first[:, np.newaxis] + np.minimum(np.arange(k), np.maximum(counts - 1, 0)[:, np.newaxis])
+        return j[order][rows], dist[order][rows]
+    columns = np.arange(len(owner)) - first[owner]
+    table = np.full((len(counts), max(width, k)), np.inf)
+    table[owner, columns] = dist
+    points = np.zeros(table.shape, dtype=np.intp)
+    points[owner, columns] = j
+    if table.shape[1] > k:
+        part = np.argpartition(table, k - 1, axis=1)[:, :k]
+        table = np.take_along_axis(table, part, axis=1)
+        points = np.take_along_axis(points, part, axis=1)
+    order = np.argsort(table, axis=1, kind='stable')
+    return np.take_along_axis(points, order, axis=1), np.take_along_axis(table, order, axis=1)
+
+def grid_count_within(coords: np.ndarray, threshold: float, distance=None,
+                      slack: float = 0.0) -> np.ndarray:
+    """
+    Number of points within threshold of each point (including itself),
+    scanning only the 3^d cells around every point
+
+    Cost is O(n log n) for the grid plus the number of point pairs in
+    adjacent cells, instead of O(n²): near-linear when the points within
+    `threshold` of a point are few, which is the Condition 1 regime.
+
+    Args:
+        coords: (n, d) coordinates
+        threshold: Neighbor distance (2R)
+        distance: Optional callable (a, b) -> element-wise distances between
+                  point indices, e.g. NeighborIndex.distances_between so the
+                  counts use that index's distances; the Euclidean distance
+                  of the coordinates if None
+        slack: Largest absolute error of `distance` against the exact
+               Euclidean distance; the cells are widened by it
+
+    Returns:
+        counts: (n,) neighbor counts
+    """
+    coords = np.asarray(coords, dtype=np.float64)
+    n = coords.shape[0]
+    if n == 0 or not np.isfinite(threshold):
+        return np.full(n, n, dtype=np.int64)
+    if distance is None:
+        distance = lambda a, b: _row_distances(coords, a, b)
+    # With a zero cell size only coincident points are neighbors, and any
+    # cell size keeps those in one cell
+    cell_size = max(threshold, 0.0) * (1 + _CELL_SLACK) + slack
+    grid = UniformGrid(coords, cell_size if cell_size > 0 else 1.0)
+
+    counts = np.zeros(n, dtype=np.int64)
+    for queries in _query_batches(grid, np.arange(n)):
+        owner, j = grid.candidates(queries)
+        within = distance(queries[owner], j) <= threshold
+        counts += np.bincount(queries[owner[within]], minlength=n)
+    return counts
+
+def grid_nearest_distances(coords: np.ndarray, k: int, distance=None,
+                           slack: float = 0.0) -> np.ndarray:
+    """
+    (n, k) ascending distances from each point to its k nearest points,
+    counting itself (see grid_nearest_neighbors)
+    """
+    return grid_nearest_neighbors(coords, k, distance, slack)[1]
+
+def grid_nearest_neighbors(coords: np.ndarray, k: int, distance=None, slack: float = 0.0):
+    """
+    The k nearest points of every point, counting itself, from a hierarchy
+    of uniform grids
+
+    Each point is resolved on the finest grid on which its 3^d cells hold
+    at least k points within one cell size (so no point outside them can
+    be closer). Points start on the grid whose cells would hold about k
+    points under uniform density; unresolved points move to cells twice as
+    large, points whose cells hold too many candidates (dense clusters)
+    move to cells half as large. Cost is about O(n · k · 3^d) plus one
+    O(n log n) grid per level visited.
+
+    Args:
+        coords: (n, d) coordinates
+        k: Number of nearest points (1 <= k <= n)
+        distance, slack: As for grid_count_within
+
+    Returns:
+        (indices, distances): (n, k) point indices and their ascending
+                              distances (ties in any order)
+    """
+    coords = np.asarray(coords, dtype=np.float64)
+    n, d = coords.shape
+    if distance is None:
+        distance = lambda a, b: _row_distances(coords, a, b)
+    extent = float(np.max(coords.max(axis=0) - coords.min(axis=0))) if n else 0.0
+    if extent == 0.0:
+        return np.tile(np.arange(k), (n, 1)), np.zeros((n, k))
+
+    base = extent * (k / n) ** (1.0 / d)
+    cap = 4 * k * 3 ** d
+    # Below this cell size the grid cannot separate points any further
+    finest = -int(np.log2(base / max(slack, extent * 1e-12)))
+
+    result = np.empty((n, k))
+    neighbors = np.empty((n, k), dtype=np.intp)
+    level = np.zeros(n, dtype=np.int64)
+    came_down = np.zeros(n, dtype=bool)
+    forced = np.zeros(n, dtype=bool)
+    pending = np.arange(n)
+    while pending.size:
+        current = level[pending].max()
+        queries = pending[level[pending] == current]
+        cell_size = base * 2.0 ** current
+        try:
+            grid = UniformGrid(coords, cell_size * (1 + _CELL_SLACK) + slack)
+        except OverflowError:
+            if current >= 0:
+                raise
+            # Too fine for 64-bit keys: settle for the next coarser grid
+            level[queries] += 1
+            forced[queries] = True
+            continue
+        # Every point within `reach` of a query is among its candidates
+        reach = cell_size
+
+        crowded = (grid.candidate_counts(queries) > cap) & ~forced[queries] & (current > finest)
+        level[queries[crowded]] -= 1
+        came_down[queries[crowded]] = True
+        queries = queries[~crowded]
+
+        unresolved = []
+        for batch in _query_batches(grid, queries):
+            owner, j = grid.candidates(batch)
+            dist = distance(batch[owner], j)
+            keep = dist <= reach
+            owner, j, dist = owner[keep], j[keep], dist[keep]
+            counts = np.bincount(owner, minlength=len(batch))
+            resolved = counts >= k
+            if resolved.any():
+                nearest, nearest_dist = _smallest_per_group(owner, dist, j, counts, k)
+                neighbors[batch[resolved]] = nearest[resolved]
+                result[batch[resolved]] = nearest_dist[resolved]
+            unresolved.append(batch[~resolved])
+
+        unresolved = np.concatenate(unresolved) if unresolved else np.empty(0, dtype=np.intp)
+        level[unresolved] += 1
+        forced[unresolved] |= came_down[unresolved]
+        done = np.ones(n, dtype=bool)
+        done[pending] = False
+        done[queries] = True
+        done[unresolved] = False
+        pending = np.flatnonzero(~done)
+    return neighbors, result
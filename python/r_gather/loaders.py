@@ -0,0 +1,219 @@
+# loaders.py
+import os
+import sys
+from itertools import islice
+import numpy as np
+from .data_structures import PointSet
+
+# Default number of rows parsed per chunk
+DEFAULT_CHUNK_ROWS = 65536
+
+LOADER_FORMATS = ('npy', 'csv', 'parquet')
+
+def load_points(path: str, format: str | None = None, progress=None, **kwargs) -> PointSet:
+    """
+    Load a point file into a PointSet
+
+    Args:
+        path: .npy, .csv/.txt/.tsv or .parquet file
+        format: One of LOADER_FORMATS, inferred from the extension if None
+        progress: Optional callable (rows_done, rows_total) called per chunk
+        **kwargs: Passed to load_npy, load_csv or load_parquet
+
+    Returns:
+        points: The loaded PointSet
+    """
+    if format is None:
+        format = infer_format(path)
+    if format == 'npy':
+        return load_npy(path, progress=progress, **kwargs)
+    if format == 'csv':
+        return load_csv(path, progress=progress, **kwargs)
+    if format == 'parquet':
+        return load_parquet(path, progress=progress, **kwargs)
+    raise ValueError(f"Unknown format {format!r}, expected one of {LOADER_FORMATS}")
+
+def infer_format(path: str) -> str:
+    """
+    Loader format of a file from its extension
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.npy':
+        return 'npy'
+    if extension in ('.csv', '.tsv', '.txt'):
+        return 'csv'
+    if extension in ('.parquet', '.pq'):
+        return 'parquet'
+    raise ValueError(f"Cannot infer the format of {path!r}, pass format= explicitly")
+
+def default_delimiter(path: str) -> str:
+    """
+    Field separator of a text file from its extension: tab for .tsv, else comma
+    """
+    return '\t' if os.path.splitext(path)[1].lower() == '.tsv' else ','
+
+def load_npy(path: str, mmap: bool = True, progress=None) -> PointSet:
+    """
+    Open an (n, d) .npy coordinate array
+
+    With mmap=True the file is memory-mapped read-only, so nothing is read
+    until the coordinates are used and no copy is ever made.
+    """
+    coordinates = np.load(path, mmap_mode='r' if mmap else None)
+    if progress is not None:
+        progress(len(coordinates), len(coordinates))
+    return PointSet(coordinates)
+
+def load_csv(path: str, columns=None, id_column=None, delimiter: str | None = None, header: bool = True,
+             dtype=np.float64, chunk_rows: int = DEFAULT_CHUNK_ROWS, out_path: str | None = None,
+             progress=None) -> PointSet:
+    """
+    Parse a delimited text file in chunks into one contiguous array
+
+    A first pass counts the rows so the (n, d) result is allocated once
+    (as an .npy memmap at out_path if given); the second pass parses
+    chunk_rows lines at a time straight into it. Peak memory is the result
+    plus one chunk.
+
+    Args:
+        path: Text file with one point per line
+        columns: Coordinate columns (names if header, else positions); all
+                 columns except id_column if None
+        id_column: Optional column holding point ids
+        delimiter: Field separator (default_delimiter(path) if None)
+        header: Whether the first line holds column names
+        dtype: Coordinate dtype
+        chunk_rows: Lines parsed per chunk
+        out_path: Optional .npy path; the coordinates are then written to a
+                  memmap there instead of RAM
+        progress: Optional callable (rows_done, rows_total)
+
+    Returns:
+        points: PointSet over the parsed coordinates
+    """
+    if delimiter is None:
+        delimiter = default_delimiter(path)
+    with open(path) as f:
+        # First pass: count the rows
+        names = _split(f.readline(), delimiter) if header else None
+        first, n = None, 0
+        for line in f:
+            if line.strip():
+                first = line if first is None else first
+                n += 1
+        if first is None:
+            raise ValueError(f"{path!r} contains no rows")
+        n_fields = len(_split(first, delimiter))
+
+        # Second pass: parse chunks into the result
+        f.seek(0)
+        if header:
+            f.readline()
+        id_position = None if id_column is None else _column_position(id_column, names)
+        if columns is None:
+            positions = [k for k in range(n_fields) if k != id_position]
+        else:
+            positions = [_column_position(c, names) for c in columns]
+
+        coordinates = _allocate((n, len(positions)), dtype, out_path)
+        ids = np.empty(n, dtype=np.int64) if id_position is not None else None
+        if ids is None:
+            usecols, row_dtype = positions, dtype
+        else:
+            # One parse per chunk: coordinates and the (exact integer) id as
+            # fields of a structured row
+            usecols = positions + [id_position]
+            row_dtype = np.dtype([('coordinates', dtype, (len(positions),)), ('id', np.int64)])
+
+        done = 0
+        lines = (line for line in f if line.strip())
+        while done < n:
+            chunk = list(islice(lines, chunk_rows))
+            if not chunk:
+                break
+            block = np.loadtxt(chunk, delimiter=delimiter, usecols=usecols, dtype=row_dtype,
+                               ndmin=2 if ids is None else 1)
+            if ids is None:
+                coordinates[done:done + len(chunk)] = block
+            else:
+                coordinates[done:done + len(chunk)] = block['coordinates']
+                ids[done:done + len(chunk)] = block['id']
+            done += len(chunk)
+            if progress is not None:
+                progress(done, n)
+
+    return PointSet(_finish(coordinates), ids)
+
+def load_parquet(path: str, columns=None, id_column: str | None = None, dtype=np.float64,
+                 chunk_rows: int = DEFAULT_CHUNK_ROWS, out_path: str | None = None,
+                 progress=None) -> PointSet:
+    """
+    Read a Parquet file batch by batch into one contiguous array
+
+    Requires pyarrow (the `parquet` extra). The row count comes from the
+    file metadata, so the result is allocated once and filled per record
+    batch; arguments are as for load_csv, with column names.
+    """
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError(
+            "Reading Parquet requires pyarrow (pip install r-gather[parquet])"
+        ) from e
+
+    parquet_file = pq.ParquetFile(path)
+    n = parquet_file.metadata.num_rows
+    if columns is None:
+        columns = [name for name in parquet_file.schema_arrow.names if name != id_column]
+    read_columns = list(columns) + ([id_column] if id_column is not None else [])
+
+    coordinates = _allocate((n, len(columns)), dtype, out_path)
+    ids = np.empty(n, dtype=np.int64) if id_column is not None else None
+
+    done = 0
+    for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=read_columns):
+        rows = batch.num_rows
+        for k, name in enumerate(columns):
+            coordinates[done:done + rows, k] = batch.column(name).to_numpy(zero_copy_only=False)
+        if ids is not None:
+            ids[done:done + rows] = batch.column(id_column).to_numpy(zero_copy_only=False)
+        done += rows
+        if progress is not None:
+            progress(done, n)
+
+    return PointSet(_finish(coordinates), ids)
+
+def print_progress(rows_done: int, rows_total: int, stream=None):
+    """
+    Progress callback writing a single updating line to stderr
+    """
+    stream = sys.stderr if stream is None else stream
+    percent = 100.0 * rows_done / rows_total if rows_total else 100.0
+    stream.write(f"\rloaded {rows_done}/{rows_total} rows ({percent:.0f}%)")
+    if rows_done >= rows_total:
+        stream.write("\n")
+    stream.flush()
+
+def _split(line: str, delimiter: str) -> list[str]:
+    return [field.strip() for field in line.rstrip('\r\n').split(delimiter)]
+
+def _column_position(column, names) -> int:
+    if isinstance(column, (int, np.integer)):
+        return int(column)
+    if names is None:
+        raise ValueError(f"Column {column!r} given by name but the file has no header")
+    if column not in names:
+        raise ValueError(f"Column {column!r} not found, available columns: {names}")
+    return names.index(column)
+
+def _allocate(shape: tuple, dtype, out_path: str | None) -> np.ndarray:
+    if out_path is None:
+        return np.empty(shape, dtype=dtype)
+    return np.lib.format.open_memmap(out_path, mode='w+', dtype=dtype, shape=shape)
+
+def _finish(coordinates: np.ndarray) -> np.ndarray:
+    # Reopen a written memmap read-only
+    if isinstance(coordinates, np.memmap):
+        coordinates.flush()
+        return np.load(coordinates.filename, mmap_mode='r')
+    return coordinates
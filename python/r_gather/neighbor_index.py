@@ -0,0 +1,616 @@
+# neighbor_index.py
+from abc import ABC, abstractmethod
+import numpy as np
+from .adjacency import BitsetAdjacency, CSRAdjacency, _index_dtype
+from .data_structures import Point, PointSet, as_point_set
+from .distance_matrix import (DEFAULT_TILE_SIZE, compute_condensed_distances, compute_distance_matrix,
+                              condensed_index, condensed_offset, condensed_to_square, squared_threshold)
+from .distance_store import DEFAULT_MEMORY_BUDGET, DistanceStore
+from .grid import GRID_MAX_DIM, grid_count_within, grid_nearest_neighbors
+
+# Relative slack for spatial-tree queries; candidates are re-filtered
+# with exact distances so every backend uses the same comparison
+_TREE_SLACK = 1e-9
+
+def pairwise_distances(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Row-wise Euclidean distances between two (k, d) coordinate arrays
+    """
+    diff = a - b
+    return np.sqrt(np.sum(diff * diff, axis=-1))
+
+def _nearest_in_rows(block: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    # (indices, distances) of the k smallest entries of every row, ascending
+    part = np.argpartition(block, k - 1, axis=1)[:, :k]
+    part_dist = np.take_along_axis(block, part, axis=1)
+    order = np.argsort(part_dist, axis=1, kind='stable')
+    return np.take_along_axis(part, order, axis=1), np.take_along_axis(part_dist, order, axis=1)
+
+class NeighborIndex(ABC):
+    """
+    Radius queries over a fixed point set
+
+    Every query takes a distance `threshold` (2R for radius R) and treats
+    a pair (i, j) as neighbors when distance(i, j) <= threshold. A point is
+    always its own neighbor.
+    """
+
+    n: int
+
+    @abstractmethod
+    def count_within(self, threshold: float) -> np.ndarray:
+        """
+        Number of points within threshold of each point (including itself)
+        """
+
+    @abstractmethod
+    def neighbors_within(self, i: int, threshold: float) -> np.ndarray:
+        """
+        Sorted indices of points within threshold of point i (including i)
+        """
+
+    @abstractmethod
+    def distances(self, i: int, indices) -> np.ndarray:
+        """
+        Distances from point i to each point in indices
+        """
+
+    @abstractmethod
+    def distances_between(self, a, b) -> np.ndarray:
+        """
+        Element-wise distances between points a[k] and b[k]
+        """
+
+    @abstractmethod
+    def pair_distances(self, lower: float, upper: float) -> np.ndarray:
+        """
+        Distances d of point pairs i < j with lower < d <= upper (unsorted)
+        """
+
+    @abstractmethod
+    def kth_distances(self, k: int) -> np.ndarray:
+        """
+        Distance from each point to its k-th nearest point, counting itself
+        (k = 1 gives zeros)
+        """
+
+    @abstractmethod
+    def nearest_distances(self, k: int) -> np.ndarray:
+        """
+        (n, k) ascending distances from each point to its k nearest points,
+        counting itself; column k - 1 equals kth_distances(k)
+        """
+
+    @abstractmethod
+    def nearest_neighbors(self, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        (indices, distances): the k nearest points of each point, counting
+        itself, as (n, k) arrays in ascending distance (ties in any order)
+        """
+
+    def adjacency(self, threshold: float) -> CSRAdjacency | BitsetAdjacency:
+        """
+        The full neighborhood graph at threshold, built in one pass
+        """
+        rows = [self.neighbors_within(i, threshold) for i in range(self.n)]
+        return CSRAdjacency.from_rows(rows, self.n)
+
+    @abstractmethod
+    def initial_window(self) -> float:
+        """
+        Upper threshold of the first candidate enumeration window
+        """
+
+    @abstractmethod
+    def max_threshold(self) -> float:
+        """
+        Upper bound on every pairwise distance
+        """
+
+    def close(self):
+        """
+        Release what the index holds outside memory (e.g. temporary files)
+        """
+
+class DenseNeighborIndex(NeighborIndex):
+    """
+    Neighbor index over a precomputed (n, n) distance matrix
+
+    When the coordinates are known and d <= GRID_MAX_DIM, count_within and
+    the nearest-distance queries (the Condition 1 threshold) scan a uniform
+    grid instead of every matrix row, reading matrix entries only for the
+    pairs in adjacent cells.
+    """
+
+    def __init__(self, distance_matrix: np.ndarray, tile_size: int = DEFAULT_TILE_SIZE,
+                 coords: np.ndarray | None = None):
+        self.distance_matrix = distance_matrix
+        self.n = distance_matrix.shape[0]
+        self.tile_size = tile_size
+        self.coords = coords
+        self._use_grid = coords is not None and self.n > 0 and 1 <= coords.shape[1] <= GRID_MAX_DIM
+
+    def _grid_slack(self) -> float:
+        # Error bound of the blocked matrix engine (see
+        # compute_distance_matrix_blocked), with a safety factor
+        extent = self.coords.max(axis=0) - self.coords.min(axis=0)
+        eps = np.finfo(self.distance_matrix.dtype).eps
+        return 4 * float(np.sqrt(eps)) * float(np.sqrt(np.sum(extent * extent)))
+
+    def count_within(self, threshold: float) -> np.ndarray:
+        if self._use_grid:
+            try:
+                return grid_count_within(self.coords, threshold, self.distances_between, self._grid_slack())
+            except OverflowError:
+                pass
+        return np.sum(self.distance_matrix <= threshold, axis=1)
+
+    def neighbors_within(self, i: int, threshold: float) -> np.ndarray:
+        return np.flatnonzero(self.distance_matrix[i] <= threshold)
+
+    def distances(self, i: int, indices) -> np.ndarray:
+        return self.distance_matrix[i, indices]
+
+    def distances_between(self, a, b) -> np.ndarray:
+        return self.distance_matrix[a, b]
+
+    def pair_distances(self, lower: float, upper: float) -> np.ndarray:
+        # Upper triangle only, one row tile at a time
+        dm = self.distance_matrix
+        chunks = []
+        for start in range(0, self.n, self.tile_size):
+            stop = min(start + self.tile_size, self.n)
+            block = dm[start:stop, start:]
+            rows = np.arange(start, stop)[:, np.newaxis]
+            cols = np.arange(start, self.n)[np.newaxis, :]
+            chunks.append(block[(cols > rows) & (block > lower) & (block <= upper)])
+        return np.concatenate(chunks) if chunks else np.empty(0, dtype=dm.dtype)
+
+    def adjacency(self, threshold: float) -> BitsetAdjacency:
+        return BitsetAdjacency.from_distance_matrix(self.distance_matrix, threshold, self.tile_size)
+
+    def _grid_nearest(self, k: int) -> tuple[np.ndarray, np.ndarray] | None:
+        if not self._use_grid:
+            return None
+        try:
+            neighbors, table = grid_nearest_neighbors(self.coords, k, self.distances_between, self._grid_slack())
+        except OverflowError:
+            return None
+        return neighbors, table.astype(self.distance_matrix.dtype, copy=False)
+
+    def kth_distances(self, k: int) -> np.ndarray:
+        nearest = self._grid_nearest(k)
+        if nearest is not None:
+            return nearest[1][:, k - 1]
+        dm = self.distance_matrix
+        result = np.empty(self.n, dtype=dm.dtype)
+        for start in range(0, self.n, self.tile_size):
+            stop = min(start + self.tile_size, self.n)
+            result[start:stop] = np.partition(dm[start:stop], k - 1, axis=1)[:, k - 1]
+        return result
+
+    def nearest_distances(self, k: int) -> np.ndarray:
+        nearest = self._grid_nearest(k)
+        if nearest is not None:
+            return nearest[1]
+        dm = self.distance_matrix
+        result = np.empty((self.n, k), dtype=dm.dtype)
+        for start in range(0, self.n, self.tile_size):
+            stop = min(start + self.tile_size, self.n)
+            block = np.partition(dm[start:stop], k - 1, axis=1)[:, :k]
+            result[start:stop] = np.sort(block, axis=1)
+        return result
+
+    def nearest_neighbors(self, k: int) -> tuple[np.ndarray, np.ndarray]:
+        nearest = self._grid_nearest(k)
+        if nearest is not None:
+            return nearest
+        dm = self.distance_matrix
+        neighbors = np.empty((self.n, k), dtype=np.intp)
+        result = np.empty((self.n, k), dtype=dm.dtype)
+        for start in range(0, self.n, self.tile_size):
+            stop = min(start + self.tile_size, self.n)
+            neighbors[start:stop], result[start:stop] = _nearest_in_rows(dm[start:stop], k)
+        return neighbors, result
+
+    def initial_window(self) -> float:
+        # The matrix already exists, enumerate everything at once
+        return np.inf
+
+    def max_threshold(self) -> float:
+        return float(self.distance_matrix.max()) if self.n else 0.0
+
+class CondensedNeighborIndex(NeighborIndex):
+    """
+    Neighbor index over condensed (pdist-style) distances
+
+    Each pair is stored once (compute_condensed_distances), half the memory
+    of DenseNeighborIndex. With squared=True the entries are squared
+    distances: every threshold is mapped to squared_threshold instead of
+    rooting n² entries, with exactly the outcome of comparing the rooted
+    distances. Only the distances a query returns (cluster radii, candidate
+    radii, nearest distances) are rooted.
+
+    While few pairs are within a threshold (the Condition 1 regime),
+    count_within and adjacency scan the condensed array for that pair list:
+    O(n²/2) comparisons plus O(pairs), and a CSRAdjacency. Otherwise, and
+    for the nearest-distance queries, full row tiles are reassembled from
+    contiguous segments of the condensed array (see _rows).
+    """
+
+    def __init__(self, condensed: np.ndarray, n: int, squared: bool = False,
+                 tile_size: int = DEFAULT_TILE_SIZE):
+        self.condensed = condensed
+        self.n = n
+        self.squared = squared
+        self.tile_size = tile_size
+
+    @classmethod
+    def from_coords(cls, coords: np.ndarray, squared: bool = True,
+                    tile_size: int = DEFAULT_TILE_SIZE) -> 'CondensedNeighborIndex':
+        condensed = compute_condensed_distances(coords, tile_size=tile_size, squared=squared)
+        return cls(condensed, len(coords), squared, tile_size)
+
+    def _threshold(self, threshold: float) -> float:
+        # Threshold in the units of the stored entries
+        return squared_threshold(threshold, self.condensed.dtype) if self.squared else threshold
+
+    def _root(self, values: np.ndarray) -> np.ndarray:
+        return np.sqrt(values) if self.squared else values
+
+    def _chunks(self):
+        # (offset, entries) covering the condensed array, tile_size rows each
+        for start in range(0, self.n, self.tile_size):
+            stop = min(start + self.tile_size, self.n)
+            first, last = condensed_offset(self.n, start), condensed_offset(self.n, stop)
+            yield first, self.condensed[first:last]
+
+    def _rows(self, start: int, stop: int) -> np.ndarray:
+        # Full rows [start, stop) as stored, with a zero diagonal
+        n, condensed = self.n, self.condensed
+        block = np.zeros((stop - start, n), dtype=condensed.dtype)
+        # Right of the diagonal: one contiguous segment per row
+        for local, i in enumerate(range(start, stop)):
+            block[local, i + 1:] = condensed[condensed_offset(n, i):condensed_offset(n, i + 1)]
+        # Columns k < start: row k holds these entries contiguously
+        if start:
+            k = np.arange(start)
+            block[:, :start] = condensed[(condensed_offset(n, k) - k - 1)[:, np.newaxis]
+                                         + np.arange(start, stop)[np.newaxis, :]].T
+        # Within the tile, mirror the upper triangle
+        square = block[:, start:stop]
+        lower = np.tril_indices(stop - start, -1)
+        square[lower] = square.T[lower]
+        return block
+
+    def _row_tiles(self):
+        for start in range(0, self.n, self.tile_size):
+            stop = min(start + self.tile_size, self.n)
+            yield start, stop, self._rows(start, stop)
+
+    def _pairs_within(self, threshold: float):
+        # Pairs i < j with distance <= threshold, or None when there are so
+        # many that their CSR graph would outgrow a bitset (n²/8 bytes)
+        limit = self._threshold(threshold)
+        total = sum(int(np.count_nonzero(chunk <= limit)) for _, chunk in self._chunks())
+        if total > self.n * self.n // 64:
+            return None
+        positions = [offset + np.flatnonzero(chunk <= limit) for offset, chunk in self._chunks()]
+        positions = np.concatenate(positions) if positions else np.empty(0, dtype=np.int64)
+        return condensed_to_square(self.n, positions)
+
+    def count_within(self, threshold: float) -> np.ndarray:
+        pairs = self._pairs_within(threshold)
+        if pairs is not None:
+            i, j = pairs
+            return np.bincount(i, minlength=self.n) + np.bincount(j, minlength=self.n) + 1
+        limit = self._threshold(threshold)
+        counts = np.empty(self.n, dtype=np.int64)
+        for start, stop, block in self._row_tiles():
+            counts[start:stop] = np.count_nonzero(block <= limit, axis=1)
+        return counts
+
+    def neighbors_within(self, i: int, threshold: float) -> np.ndarray:
+        return np.flatnonzero(self._rows(i, i + 1)[0] <= self._threshold(threshold))
+
+    def distances(self, i: int, indices) -> np.ndarray:
+        return self.distances_between(i, indices)
+
+    def distances_between(self, a, b) -> np.ndarray:
+        a, b = np.broadcast_arrays(np.asarray(a, dtype=np.intp), np.asarray(b, dtype=np.intp))
+        diagonal = a == b
+        if len(self.condensed) == 0:
+            return np.zeros(a.shape, dtype=self.condensed.dtype)
+        # Diagonal entries read any valid pair and are zeroed afterwards
+        values = self.condensed[condensed_index(self.n, a, np.where(diagonal, (a + 1) % self.n, b))]
+        values[diagonal] = 0
+        return self._root(values)
+
+    def pair_distances(self, lower: float, upper: float) -> np.ndarray:
+        low, high = self._threshold(lower), self._threshold(upper)
+        chunks = [chunk[(chunk > low) & (chunk <= high)] for _, chunk in self._chunks()]
+        values = np.concatenate(chunks) if chunks else np.empty(0, dtype=self.condensed.dtype)
+        return self._root(values)
+
+    def adjacency(self, threshold: float) -> CSRAdjacency | BitsetAdjacency:
+        pairs = self._pairs_within(threshold)
+        if pairs is not None:
+            return CSRAdjacency.from_pairs(*pairs, self.n)
+        limit = self._threshold(threshold)
+        bits = np.empty((self.n, (self.n + 7) // 8), dtype=np.uint8)
+        for start, stop, block in self._row_tiles():
+            bits[start:stop] = np.packbits(block <= limit, axis=1)
+        return BitsetAdjacency(bits, self.n, self.tile_size)
+
+    def kth_distances(self, k: int) -> np.ndarray:
+        return self.nearest_distances(k)[:, k - 1]
+
+    def nearest_distances(self, k: int) -> np.ndarray:
+        result = np.empty((self.n, k), dtype=self.condensed.dtype)
+        for start, stop, block in self._row_tiles():
+            result[start:stop] = np.sort(np.partition(block, k - 1, axis=1)[:, :k], axis=1)
+        return self._root(result)
+
+    def nearest_neighbors(self, k: int) -> tuple[np.ndarray, np.ndarray]:
+        neighbors = np.empty((self.n, k), dtype=np.intp)
+        result = np.empty((self.n, k), dtype=self.condensed.dtype)
+        for start, stop, block in self._row_tiles():
+            neighbors[start:stop], result[start:stop] = _nearest_in_rows(block, k)
+        return neighbors, self._root(result)
+
+    def initial_window(self) -> float:
+        # The distances already exist, enumerate everything at once
+        return np.inf
+
+    def max_threshold(self) -> float:
+        return float(self._root(self.condensed.max())) if len(self.condensed) else 0.0
+
+class KDTreeNeighborIndex(NeighborIndex):
+    """
+    Neighbor index backed by a scipy cKDTree
+
+    Memory is O(n) for the tree plus O(n·k) for the neighborhoods that are
+    actually requested, where k is the typical number of points within the
+    threshold. Requires scipy (the `spatial` extra).
+    """
+
+    def __init__(self, coords: np.ndarray, leafsize: int = 16):
+        try:
+            from scipy.spatial import cKDTree
+        except ImportError as e:
+            raise ImportError(
+                "The 'kdtree' backend requires scipy (pip install r-gather[spatial])"
+            ) from e
+
+        coords = np.asarray(coords, dtype=np.float64)
+        if coords.ndim == 1:
+            coords = coords.reshape(-1, 1)
+        self.coords = coords
+        self.n = coords.shape[0]
+        self.tree = cKDTree(coords, leafsize=leafsize)
+
+    def _slack(self, threshold: float) -> float:
+        return threshold * (1 + _TREE_SLACK) + _TREE_SLACK
+
+    def _pairs_within(self, threshold: float):
+        # Pairs i < j with exact distance <= threshold
+        pairs = self.tree.query_pairs(self._slack(threshold), output_type='ndarray')
+        i, j = pairs[:, 0], pairs[:, 1]
+        d = pairwise_distances(self.coords[i], self.coords[j])
+        keep = d <= threshold
+        return i[keep], j[keep], d[keep]
+
+    def count_within(self, threshold: float) -> np.ndarray:
+        i, j, _ = self._pairs_within(threshold)
+        return np.bincount(i, minlength=self.n) + np.bincount(j, minlength=self.n) + 1
+
+    def adjacency(self, threshold: float) -> CSRAdjacency:
+        i, j, _ = self._pairs_within(threshold)
+        return CSRAdjacency.from_pairs(i, j, self.n)
+
+    def neighbors_within(self, i: int, threshold: float) -> np.ndarray:
+        candidates = np.asarray(
+            self.tree.query_ball_point(self.coords[i], self._slack(threshold)),
+            dtype=np.intp
+        )
+        d = pairwise_distances(self.coords[candidates], self.coords[i])
+        return np.sort(candidates[d <= threshold])
+
+    def distances(self, i: int, indices) -> np.ndarray:
+        return pairwise_distances(self.coords[indices], self.coords[i])
+
+    def distances_between(self, a, b) -> np.ndarray:
+        return pairwise_distances(self.coords[a], self.coords[b])
+
+    def pair_distances(self, lower: float, upper: float) -> np.ndarray:
+        _, _, d = self._pairs_within(upper)
+        return d[d > lower]
+
+    def kth_distances(self, k: int) -> np.ndarray:
+        _, neighbors = self.tree.query(self.coords, k=k)
+        neighbors = np.asarray(neighbors).reshape(self.n, -1)
+        # Exact distances so the result matches neighbors_within comparisons
+        d = pairwise_distances(self.coords[neighbors], self.coords[:, np.newaxis, :])
+        return d.max(axis=1)
+
+    def nearest_distances(self, k: int) -> np.ndarray:
+        return self.nearest_neighbors(k)[1]
+
+    def nearest_neighbors(self, k: int) -> tuple[np.ndarray, np.ndarray]:
+        _, neighbors = self.tree.query(self.coords, k=k)
+        neighbors = np.asarray(neighbors).reshape(self.n, -1)
+        d = pairwise_distances(self.coords[neighbors], self.coords[:, np.newaxis, :])
+        order = np.argsort(d, axis=1, kind='stable')
+        return np.take_along_axis(neighbors, order, axis=1), np.take_along_axis(d, order, axis=1)
+
+    def initial_window(self) -> float:
+        # Largest nearest-neighbor distance: every point has a neighbor below it
+        if self.n < 2:
+            return self.max_threshold()
+        d, _ = self.tree.query(self.coords, k=2)
+        return float(d[:, 1].max())
+
+    def max_threshold(self) -> float:
+        if self.n == 0:
+            return 0.0
+        extent = self.coords.max(axis=0) - self.coords.min(axis=0)
+        return float(np.sqrt(np.sum(extent * extent)))
+
+class TiledNeighborIndex(NeighborIndex):
+    """
+    Neighbor index over an on-disk DistanceStore, within a RAM budget
+
+    For distance matrices larger than memory. Every whole-matrix query
+    (Condition 1 counts, nearest distances, candidate radii, the adjacency
+    used by greedy marking and the flow network) is one sequential pass
+    over the store's row tiles; per-point queries read only the rows they
+    need, in ascending order. The adjacency is a BitsetAdjacency when its
+    n²/8 bytes fit half the budget, otherwise a CSRAdjacency whose size
+    is the number of neighbor pairs.
+    """
+
+    def __init__(self, store: DistanceStore):
+        self.store = store
+        self.n = store.n
+        self.memory_budget = store.memory_budget
+
+    @classmethod
+    def from_coords(cls, coords: np.ndarray, memory_budget: int = DEFAULT_MEMORY_BUDGET,
+                    path: str | None = None) -> 'TiledNeighborIndex':
+        """
+        Write the distance store of coords (see DistanceStore.create) and index it
+        """
+        return cls(DistanceStore.create(coords, path=path, memory_budget=memory_budget))
+
+    def close(self):
+        self.store.close()
+
+    def count_within(self, threshold: float) -> np.ndarray:
+        counts = np.empty(self.n, dtype=np.int64)
+        for start, stop, block in self.store.tiles():
+            counts[start:stop] = np.count_nonzero(block <= threshold, axis=1)
+        return counts
+
+    def neighbors_within(self, i: int, threshold: float) -> np.ndarray:
+        return np.flatnonzero(self.store.row(i) <= threshold)
+
+    def distances(self, i: int, indices) -> np.ndarray:
+        return self.store.row(i)[indices]
+
+    def distances_between(self, a, b) -> np.ndarray:
+        a, b = np.broadcast_arrays(np.asarray(a, dtype=np.intp), np.asarray(b, dtype=np.intp))
+        shape = a.shape
+        a, b = a.ravel(), b.ravel()
+        # The matrix is symmetric: read the rows of the side with fewer
+        # distinct points (e.g. the cluster centers)
+        if len(np.unique(a)) > len(np.unique(b)):
+            a, b = b, a
+        result = np.empty(len(a), dtype=self.store.matrix.dtype)
+        order = np.argsort(a, kind='stable')
+        sorted_a = a[order]
+        for rows, block in self.store.rows(a):
+            lo = np.searchsorted(sorted_a, rows[0], side='left')
+            hi = np.searchsorted(sorted_a, rows[-1], side='right')
+            selected = order[lo:hi]
+            result[selected] = block[np.searchsorted(rows, a[selected]), b[selected]]
+        return result.reshape(shape)
+
+    def pair_distances(self, lower: float, upper: float) -> np.ndarray:
+        # Upper triangle only
+        chunks = []
+        for start, stop, block in self.store.tiles():
+            block = block[:, start:]
+            rows = np.arange(start, stop)[:, np.newaxis]
+            cols = np.arange(start, self.n)[np.newaxis, :]
+            chunks.append(block[(cols > rows) & (block > lower) & (block <= upper)])
+        return np.concatenate(chunks) if chunks else np.empty(0, dtype=self.store.matrix.dtype)
+
+    def adjacency(self, threshold: float) -> CSRAdjacency | BitsetAdjacency:
+        n = self.n
+        if n * ((n + 7) // 8) <= self.memory_budget // 2:
+            bits = np.empty((n, (n + 7) // 8), dtype=np.uint8)
+            for start, stop, block in self.store.tiles():
+                bits[start:stop] = np.packbits(block <= threshold, axis=1)
+            return BitsetAdjacency(bits, n, self.store.tile_rows)
+        counts, columns = [], []
+        for start, stop, block in self.store.tiles():
+            within = block <= threshold
+            counts.append(np.count_nonzero(within, axis=1))
+            columns.append(np.nonzero(within)[1].astype(_index_dtype(n)))
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum(np.concatenate(counts)) if counts else 0
+        indices = np.concatenate(columns) if columns else np.empty(0, dtype=_index_dtype(n))
+        return CSRAdjacency(indptr, indices)
+
+    def kth_distances(self, k: int) -> np.ndarray:
+        result = np.empty(self.n, dtype=self.store.matrix.dtype)
+        for start, stop, block in self.store.tiles():
+            result[start:stop] = np.partition(block, k - 1, axis=1)[:, k - 1]
+        return result
+
+    def nearest_distances(self, k: int) -> np.ndarray:
+        result = np.empty((self.n, k), dtype=self.store.matrix.dtype)
+        for start, stop, block in self.store.tiles():
+            result[start:stop] = np.sort(np.partition(block, k - 1, axis=1)[:, :k], axis=1)
+        return result
+
+    def nearest_neighbors(self, k: int) -> tuple[np.ndarray, np.ndarray]:
+        neighbors = np.empty((self.n, k), dtype=np.intp)
+        result = np.empty((self.n, k), dtype=self.store.matrix.dtype)
+        for start, stop, block in self.store.tiles():
+            neighbors[start:stop], result[start:stop] = _nearest_in_rows(block, k)
+        return neighbors, result
+
+    def initial_window(self) -> float:
+        # Largest nearest-neighbor distance, so each candidate window is one
+        # pass that only keeps the pairs below its threshold
+        if self.n < 2:
+            return self.max_threshold()
+        return float(self.kth_distances(2).max())
+
+    def max_threshold(self) -> float:
+        return self.store.max_distance
+
+NEIGHBOR_BACKENDS = ('dense', 'kdtree', 'tiled', 'condensed')
+
+def build_neighbor_index(points: list[Point] | PointSet, backend: str = 'dense', cache=None,
+                         memory_budget: int | None = None) -> NeighborIndex:
+    """
+    Build a neighbor index for a list of points
+
+    Args:
+        points: List of points or a PointSet
+        backend: 'dense' (full distance matrix), 'kdtree' (spatial tree,
+                 O(n·k) memory, best for low dimensions) or 'tiled'
+                 (distance matrix on disk, streamed in row tiles) or
+                 'condensed' (each pair stored once, as squared distances)
+        cache: Optional DistanceCache; the dense matrix is then reopened as a
+               memmap when the same points were seen before
+        memory_budget: RAM budget in bytes of the tiled backend
+                       (DEFAULT_MEMORY_BUDGET if None)
+
+    Returns:
+        index: The neighbor index
+    """
+    coords = as_point_set(points).coordinates
+    if backend == 'dense':
+        if cache is not None:
+            return DenseNeighborIndex(cache.distance_matrix(coords), coords=coords)
+        return DenseNeighborIndex(compute_distance_matrix(coords), coords=coords)
+    if backend == 'kdtree':
+        return KDTreeNeighborIndex(coords)
+    if backend == 'condensed':
+        return CondensedNeighborIndex.from_coords(coords)
+    if backend == 'tiled':
+        return TiledNeighborIndex.from_coords(
+            coords, DEFAULT_MEMORY_BUDGET if memory_budget is None else memory_budget
+        )
+    raise ValueError(f"Unknown neighbor backend {backend!r}, expected one of {NEIGHBOR_BACKENDS}")
+
+def as_neighbor_index(distance_matrix) -> NeighborIndex:
+    """
+    Wrap a dense distance matrix as a neighbor index (indexes pass through)
+    """
+    if isinstance(distance_matrix, NeighborIndex):
+        return distance_matrix
+    return DenseNeighborIndex(np.asarray(distance_matrix))
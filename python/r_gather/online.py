@@ -0,0 +1,344 @@
+# online.py
+import numpy as np
+from .data_structures import ClusterResult, Point, PointSet, as_point_set
+from .flow_network import flow_network_verification
+from .grid import GRID_PAIR_BATCH
+from .neighbor_index import build_neighbor_index, pairwise_distances
+from .profiling import NULL_PROFILER, Profiler
+from .r_gather import binary_search, make_candidates, prepare_index, solve_radius
+
+# Local repairs re-solve the clusters whose centers are within these
+# multiples of R of the affected points, widening once before escalating
+REPAIR_REACH = (4.0, 8.0)
+
+class RGatherIndex:
+    """
+    An r-gather clustering kept valid under insertions and deletions
+
+    The index holds the points, the clusters (center, members, radius) and
+    the radius parameter R: every cluster has at least r points within 2R
+    of its center. Updates are repaired locally:
+
+    - insert: a new point joins its nearest center within 2R; points with
+      no such center are re-solved together with the clusters whose
+      centers lie within 4R of them (the only clusters that can hold their
+      2R neighbors): the existing centers are kept, unmarked points become
+      new centers as in initial_clustering, and the flow reassigns that
+      neighborhood alone (falling back to solve_radius on it)
+    - delete: clusters that lose their center or drop below r points are
+      dissolved, and their remaining points are repaired the same way
+
+    A failed local repair is retried once on a wider neighborhood (see
+    REPAIR_REACH); only then is R escalated by a global search starting at
+    the current R. R never decreases on its own; rebuild() searches for
+    the optimum from scratch.
+
+    Points and clusters are kept in compact arrays (deletions swap the last
+    entry into the hole), so result() returns the current clustering in
+    O(1).
+    """
+
+    def __init__(self, points: list[Point] | PointSet, r: int, backend: str = 'dense',
+                 flow_backend: str = 'matching', profiler: Profiler | None = None):
+        points = as_point_set(points)
+        self.r = r
+        self.backend = backend
+        self.flow_backend = flow_backend
+        self.profiler = NULL_PROFILER if profiler is None else profiler
+        self.R = None
+        self.repairs = 0
+        self.recomputes = 0
+
+        self.n = 0
+        self.k = 0
+        self._coords = np.empty((0, points.dimension), dtype=np.float64)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._labels = np.empty(0, dtype=np.intp)
+        self._slot = {}
+        self._centers = np.empty(0, dtype=np.intp)
+        self._radii = np.empty(0, dtype=np.float64)
+        self._members = []
+
+        self._append_points(points.coordinates, points.ids)
+        self.rebuild()
+
+    # Queries
+
+    def result(self) -> ClusterResult:
+        """
+        The current clustering, in O(1)
+
+        Its arrays are views of the index and change with the next update;
+        it is empty while no clustering exists (fewer than r points).
+        """
+        points = PointSet(self._coords[:self.n], self._ids[:self.n])
+        return ClusterResult(points, self._labels[:self.n], self._centers[:self.k], self._radii[:self.k])
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __contains__(self, id) -> bool:
+        return id in self._slot
+
+    # Updates
+
+    def insert(self, points: list[Point] | PointSet):
+        """
+        Add points (their ids must be new) and repair the clustering
+        """
+        points = as_point_set(points)
+        ids = points.ids.tolist()
+        if len(set(ids)) < len(ids) or any(id in self._slot for id in ids):
+            raise ValueError("Point ids must be unique and not already in the index")
+        slots = self._append_points(points.coordinates, points.ids)
+        if self.R is None:
+            self.rebuild()
+            return
+
+        # Join the nearest center within 2R
+        clusters, distances = self._nearest_centers(slots)
+        joined = distances <= 2 * self.R
+        for slot, cluster, distance in zip(slots[joined].tolist(), clusters[joined].tolist(),
+                                           distances[joined].tolist()):
+            self._labels[slot] = cluster
+            self._members[cluster].add(slot)
+            self._radii[cluster] = max(self._radii[cluster], distance)
+        if not joined.all():
+            self._repair(self._ids[slots[~joined]])
+
+    def delete(self, ids):
+        """
+        Remove the points with these ids and repair the clustering
+        """
+        ids = np.unique(np.asarray(ids))
+        slots = [self._slot[id] for id in ids.tolist()]
+        broken, shrunk = set(), set()
+        for slot in slots:
+            cluster = self._labels[slot]
+            if cluster < 0:
+                continue
+            self._members[cluster].discard(slot)
+            self._labels[slot] = -1
+            (broken if self._centers[cluster] == slot else shrunk).add(int(cluster))
+        broken |= {c for c in shrunk if len(self._members[c]) < self.r}
+        for cluster in shrunk - broken:
+            self._radii[cluster] = self._cluster_radius(self._centers[cluster], self._members[cluster])
+
+        # Dissolve broken clusters (highest first, as the last cluster moves
+        # into the hole); their points are repaired by id since removing
+        # slots moves other points
+        orphans = []
+        for cluster in sorted(broken, reverse=True):
+            orphans.extend(self._ids[list(self._members[cluster])].tolist())
+            self._drop_cluster(cluster)
+        for slot in sorted(slots, reverse=True):
+            self._remove_slot(slot)
+
+        if self.n < self.r:
+            self._clear_clusters()
+            self.R = None
+        elif self.R is None:
+            self.rebuild()
+        elif orphans:
+            self._repair(np.array(orphans))
+
+    def rebuild(self, min_radius: float = 0.0):
+        """
+        Recompute the clustering globally: the smallest feasible R >= min_radius
+        """
+        self.recomputes += 1
+        self.profiler.count('online_recomputes')
+        self._clear_clusters()
+        self.R = None
+        if self.n < self.r or self.n == 0:
+            return
+        points = PointSet(self._coords[:self.n], self._ids[:self.n])
+        index, _ = prepare_index(points, self.backend, profiler=self.profiler)
+        try:
+            with self.profiler.phase('candidates'):
+                candidates = make_candidates(index, self.r, min_radius=min_radius)
+            R, clusters = binary_search(points, index, candidates, self.r, self.flow_backend,
+                                        profiler=self.profiler)
+        finally:
+            index.close()
+        if R is None:
+            if min_radius > 0:
+                # Deletions can leave every distance below min_radius
+                self.rebuild()
+            return
+        self.R = float(R)
+        for k in range(len(clusters)):
+            self._add_cluster(clusters.centers[k], clusters.member_indices(k), clusters.radii[k])
+
+    # Repair
+
+    def _repair(self, ids: np.ndarray):
+        # Re-solve the points with these ids together with the nearby clusters
+        seeds = np.array([self._slot[id] for id in ids.tolist()], dtype=np.intp)
+        for reach in REPAIR_REACH:
+            region = sorted(self._clusters_near(seeds, reach * self.R))
+            local = np.union1d(seeds, np.array([s for c in region for s in self._members[c]], dtype=np.intp))
+            if len(local) < self.r:
+                continue
+            solution = self._solve_local(local, seeds, region)
+            if solution is None:
+                continue
+
+            self.repairs += 1
+            self.profiler.count('online_repairs')
+            centers, assignments = solution
+            for cluster in reversed(region):
+                self._drop_cluster(cluster)
+            members = {center: [] for center in centers}
+            for point, center in assignments.items():
+                members[center].append(point)
+            for center, points in members.items():
+                self._add_cluster(local[center], local[points])
+            return
+        self.rebuild(min_radius=self.R)
+
+    def _solve_local(self, local: np.ndarray, seeds: np.ndarray, region: list):
+        # Clustering of the points `local` (sorted slots) at R, as (centers,
+        # assignments) in positions of `local`, or None. First the region's
+        # centers are kept and only unmarked seeds become new centers
+        # (Phase 2.1 restricted to the seeds), then Phase 2.2 reassigns;
+        # if that fails, both conditions are solved from scratch.
+        index = build_neighbor_index(PointSet(self._coords[local]), self.backend)
+        try:
+            return self._solve_on(index, local, seeds, region)
+        finally:
+            index.close()
+
+    def _solve_on(self, index, local: np.ndarray, seeds: np.ndarray, region: list):
+        R = self.R
+        with self.profiler.phase('adjacency'):
+            adjacency = index.adjacency(2 * R)
+
+        with self.profiler.phase('initial_clustering'):
+            centers = np.searchsorted(local, self._centers[region]).tolist()
+            marked = adjacency.new_marking()
+            for center in centers:
+                adjacency.mark_neighbors(marked, center)
+            degrees = adjacency.degrees()
+            for seed in np.searchsorted(local, seeds).tolist():
+                if not adjacency.is_marked(marked, seed) and degrees[seed] >= self.r:
+                    centers.append(seed)
+                    adjacency.mark_neighbors(marked, seed)
+            covered = adjacency.count_marked(marked) == len(local)
+        if covered:
+            with self.profiler.phase('flow'):
+                success, assignments = flow_network_verification(len(local), centers, index, R, self.r,
+                                                                 flow_backend=self.flow_backend,
+                                                                 adjacency=adjacency, profiler=self.profiler)
+            if success:
+                return centers, assignments
+
+        success, centers, assignments = solve_radius(index, R, self.r, flow_backend=self.flow_backend,
+                                                     profiler=self.profiler)
+        return (centers, assignments) if success else None
+
+    def _center_distances(self, slots: np.ndarray):
+        # (positions, distances) blocks of slots × all centers, exact distances
+        centers = self._coords[self._centers[:self.k]]
+        step = max(1, GRID_PAIR_BATCH // max(self.k * centers.shape[1], 1))
+        for start in range(0, len(slots), step):
+            block = self._coords[slots[start:start + step]]
+            yield start, pairwise_distances(block[:, np.newaxis, :], centers[np.newaxis, :, :])
+
+    def _nearest_centers(self, slots: np.ndarray):
+        clusters = np.full(len(slots), -1, dtype=np.intp)
+        distances = np.full(len(slots), np.inf)
+        if self.k == 0:
+            return clusters, distances
+        for start, block in self._center_distances(slots):
+            stop = start + len(block)
+            clusters[start:stop] = np.argmin(block, axis=1)
+            distances[start:stop] = block[np.arange(len(block)), clusters[start:stop]]
+        return clusters, distances
+
+    def _clusters_near(self, slots: np.ndarray, reach: float) -> set:
+        near = np.zeros(self.k, dtype=bool)
+        if self.k:
+            for _, block in self._center_distances(slots):
+                near |= np.any(block <= reach, axis=0)
+        return set(np.flatnonzero(near).tolist())
+
+    def _cluster_radius(self, center: int, members) -> float:
+        members = np.fromiter(members, dtype=np.intp, count=len(members))
+        if len(members) == 0:
+            return 0.0
+        return float(pairwise_distances(self._coords[members], self._coords[center]).max())
+
+    # Storage
+
+    def _append_points(self, coords: np.ndarray, ids: np.ndarray) -> np.ndarray:
+        count = len(ids)
+        self._reserve_points(self.n + count)
+        slots = np.arange(self.n, self.n + count)
+        self._coords[slots] = coords
+        self._ids[slots] = ids
+        self._labels[slots] = -1
+        for slot, id in zip(slots.tolist(), np.asarray(ids).tolist()):
+            self._slot[id] = slot
+        self.n += count
+        return slots
+
+    def _reserve_points(self, size: int):
+        if size <= len(self._ids):
+            return
+        capacity = max(size, 2 * len(self._ids), 16)
+        self._coords = _grow(self._coords, capacity)
+        self._ids = _grow(self._ids, capacity)
+        self._labels = _grow(self._labels, capacity)
+
+    def _remove_slot(self, slot: int):
+        # Move the last point into an unassigned slot
+        last = self.n - 1
+        del self._slot[self._ids[slot].item()]
+        if slot != last:
+            cluster = self._labels[last]
+            self._coords[slot] = self._coords[last]
+            self._ids[slot] = self._ids[last]
+            self._labels[slot] = cluster
+            self._slot[self._ids[slot].item()] = slot
+            if cluster >= 0:
+                self._members[cluster].discard(last)
+                self._members[cluster].add(slot)
+                if self._centers[cluster] == last:
+                    self._centers[cluster] = slot
+        self.n -= 1
+
+    def _add_cluster(self, center: int, members, radius: float | None = None):
+        cluster = self.k
+        if cluster == len(self._centers):
+            capacity = max(2 * cluster, 16)
+            self._centers = _grow(self._centers, capacity)
+            self._radii = _grow(self._radii, capacity)
+        members = np.asarray(members, dtype=np.intp)
+        self._centers[cluster] = center
+        self._members.append(set(members.tolist()))
+        self._labels[members] = cluster
+        self._radii[cluster] = self._cluster_radius(center, members) if radius is None else radius
+        self.k += 1
+
+    def _drop_cluster(self, cluster: int):
+        # Unassign the members and move the last cluster into its place
+        self._labels[list(self._members[cluster])] = -1
+        last = self.k - 1
+        if cluster != last:
+            self._centers[cluster] = self._centers[last]
+            self._radii[cluster] = self._radii[last]
+            self._members[cluster] = self._members[last]
+            self._labels[list(self._members[cluster])] = cluster
+        self._members.pop()
+        self.k -= 1
+
+    def _clear_clusters(self):
+        self._labels[:self.n] = -1
+        self._members = []
+        self.k = 0
+
+def _grow(array: np.ndarray, capacity: int) -> np.ndarray:
+    grown = np.empty((capacity,) + array.shape[1:], dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
@@ -0,0 +1,103 @@
+# parallel.py
+import os
+import shutil
+import tempfile
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from .neighbor_index import CondensedNeighborIndex, DenseNeighborIndex, NeighborIndex
+
+# Per-process state of a probe worker, set by _init_worker
+_worker_state = {}
+
+def _init_worker(index_spec, flow_backend: str, warm_start: bool):
+    kind, payload = index_spec
+    if kind == 'memmap':
+        # Every worker maps the same file; pages are shared, nothing is pickled
+        index = DenseNeighborIndex(np.load(payload, mmap_mode='r'))
+    elif kind == 'condensed':
+        path, n, squared = payload
+        index = CondensedNeighborIndex(np.load(path, mmap_mode='r'), n, squared)
+    else:
+        index = payload
+    _worker_state.update(index=index, flow_backend=flow_backend, warm_start=warm_start,
+                         r=None, verifier=None)
+
+def _probe_worker(R: float, r: int, threshold: float):
+    from .r_gather import make_flow_verifier, solve_radius
+
+    state = _worker_state
+    if state['r'] != r:
+        # A new search (e.g. the next r of a sweep): fresh warm-start state
+        state.update(r=r, verifier=make_flow_verifier(state['index'], r, state['flow_backend'],
+                                                      state['warm_start']))
+    success, centers, assignments = solve_radius(
+        state['index'], R, r, threshold=threshold,
+        flow_backend=state['flow_backend'], verifier=state['verifier'],
+    )
+    return success, (centers, assignments)
+
+def _npy_filename(array: np.ndarray) -> str | None:
+    # Backing .npy file of an np.load(mmap_mode=...) array, e.g. from DistanceCache
+    if isinstance(array, np.memmap) and array.filename and str(array.filename).endswith('.npy'):
+        return str(array.filename)
+    return None
+
+class ParallelProber:
+    """
+    Process pool that evaluates several candidate radii concurrently
+
+    The dense distance matrix is written once to a .npy file that every
+    worker opens with np.load(mmap_mode='r'), so it is shared through the
+    page cache instead of being pickled per task. A matrix that already is
+    a .npy memmap (DistanceCache) is mapped directly; condensed distances
+    are shared the same way. Other indexes (e.g. the
+    KD-tree, O(n) sized) are sent once per worker at start-up.
+
+    The pool and the shared file depend on the index only, so one prober
+    serves the searches of every r of a sweep.
+
+    Use as a context manager; probe_many(radii, r, threshold) returns, in
+    order, one (success, (centers, assignments)) per radius.
+    """
+
+    def __init__(self, index: NeighborIndex, workers: int, flow_backend: str = 'matching',
+                 warm_start: bool = True, temp_dir: str | None = None):
+        self.index = index
+        self.workers = workers
+        self._temp_dir = None
+
+        if isinstance(index, DenseNeighborIndex):
+            path = _npy_filename(index.distance_matrix)
+            if path is None:
+                self._temp_dir = tempfile.mkdtemp(prefix='r_gather_', dir=temp_dir)
+                path = os.path.join(self._temp_dir, 'distance_matrix.npy')
+                np.save(path, index.distance_matrix)
+            index_spec = ('memmap', path)
+        elif isinstance(index, CondensedNeighborIndex):
+            self._temp_dir = tempfile.mkdtemp(prefix='r_gather_', dir=temp_dir)
+            path = os.path.join(self._temp_dir, 'condensed.npy')
+            np.save(path, index.condensed)
+            index_spec = ('condensed', (path, index.n, index.squared))
+        else:
+            index_spec = ('object', index)
+
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker,
+            initargs=(index_spec, flow_backend, warm_start),
+        )
+
+    def probe_many(self, radii: list[float], r: int, threshold: float) -> list:
+        return list(self._executor.map(_probe_worker, radii, repeat(r), repeat(threshold)))
+
+    def close(self):
+        self._executor.shutdown()
+        if self._temp_dir is not None:
+            shutil.rmtree(self._temp_dir, ignore_errors=True)
+            self._temp_dir = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,534 @@
+# partition.py
+import argparse
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import numpy as np
+from .data_structures import ClusterResult, Point, PointSet, as_point_set
+from .grid import GRID_MAX_DIM, GRID_PAIR_BATCH, grid_nearest_distances
+from .neighbor_index import build_neighbor_index, pairwise_distances
+from .profiling import NULL_PROFILER, Profiler
+from .r_gather import compute_r_gather_sweep
+
+PARTITION_METHODS = ('kdtree', 'grid')
+
+# Default number of points per partition
+DEFAULT_PARTITION_SIZE = 2000
+
+# Seconds after which a claimed queue task is presumed abandoned (its
+# worker died) and requeued; must exceed the time to solve one part
+DEFAULT_LEASE = 600.0
+
+def kd_partition(coords: np.ndarray, leaf_size: int):
+    """
+    k-d split: halve at the median of the widest dimension until every part
+    holds at most leaf_size points
+
+    Every part holds at least leaf_size // 2 points, so parts never fall
+    below r when leaf_size >= 2r.
+
+    Returns:
+        (parts, boxes): list of point index arrays and the (m, 2, d) lower
+                        and upper corners of their cells (outer sides infinite)
+    """
+    coords = np.asarray(coords)
+    n, d = coords.shape
+    parts, boxes = [], []
+    stack = [(np.arange(n), np.full(d, -np.inf), np.full(d, np.inf))]
+    while stack:
+        indices, lo, hi = stack.pop()
+        if len(indices) <= max(leaf_size, 1):
+            parts.append(indices)
+            boxes.append((lo, hi))
+            continue
+        values = coords[indices]
+        dim = int(np.argmax(values.max(axis=0) - values.min(axis=0)))
+        mid = len(indices) // 2
+        order = np.argpartition(values[:, dim], mid)
+        split = values[order[mid], dim]
+        left_hi, right_lo = hi.copy(), lo.copy()
+        left_hi[dim] = right_lo[dim] = split
+        stack.append((indices[order[mid:]], right_lo, hi))
+        stack.append((indices[order[:mid]], lo, left_hi))
+    return parts, np.array(boxes).reshape(len(parts), 2, d)
+
+def grid_partition(coords: np.ndarray, cells: int):
+    """
+    Uniform grid of `cells` cells per dimension over the bounding box
+
+    Empty cells are dropped; cells may hold fewer than r points (their
+    points are left to the stitching pass).
+
+    Returns:
+        (parts, boxes) as for kd_partition
+    """
+    coords = np.asarray(coords)
+    n, d = coords.shape
+    low = coords.min(axis=0)
+    width = (coords.max(axis=0) - low) / cells
+    keys = np.zeros((n, d), dtype=np.int64)
+    nonzero = width > 0
+    keys[:, nonzero] = np.clip(np.floor((coords[:, nonzero] - low[nonzero]) / width[nonzero]), 0, cells - 1)
+    unique_keys, inverse = np.unique(keys, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    order = np.argsort(inverse, kind='stable')
+    parts = np.split(order, np.cumsum(np.bincount(inverse))[:-1])
+
+    lo = low + unique_keys * width
+    hi = lo + width
+    # Cells on the border of the bounding box extend to infinity
+    lo[unique_keys == 0] = -np.inf
+    hi[unique_keys == cells - 1] = np.inf
+    return parts, np.stack([lo, hi], axis=1)
+
+def _solve_partition(coords: np.ndarray, r: int, backend: str = 'dense', flow_backend: str = 'matching'):
+    # (R, labels, centers) of one part in its own indices; R is nan and
+    # every label -1 when the part has no clustering
+    R, clusters = compute_r_gather_sweep(coords, [r], backend=backend, search='binary',
+                                         flow_backend=flow_backend)[r]
+    return np.nan if R is None else float(R), clusters.labels, clusters.centers
+
+class WorkQueue:
+    """
+    Partition tasks in a directory shared by every worker (local disk or a
+    network file system mounted on several nodes)
+
+    Tasks move from pending/ to claimed/ by os.rename, which is atomic, so
+    any number of workers on any number of hosts claim each task exactly
+    once without locks. Results are written under a temporary name and
+    renamed into done/, so a result file is always complete. Run workers
+    with serve_queue (or `r-gather-worker DIR` on other nodes).
+
+    A claim is a lease: claiming stamps the task file, and a task still
+    claimed `lease` seconds later is moved back to pending/ by the next
+    claim(), so tasks of a worker that died are solved by another one. A
+    slow worker that finishes after its lease expired publishes the same
+    result twice, which is harmless.
+    """
+
+    def __init__(self, path: str, lease: float = DEFAULT_LEASE):
+        self.path = path
+        self.lease = lease
+        for name in ('pending', 'claimed', 'done'):
+            os.makedirs(os.path.join(path, name), exist_ok=True)
+
+    def _file(self, state: str, name: str) -> str:
+        return os.path.join(self.path, state, name + '.npz')
+
+    def submit(self, name: str, coords: np.ndarray, r: int, backend: str = 'dense',
+               flow_backend: str = 'matching'):
+        temporary = os.path.join(self.path, f'.{name}.npz')
+        np.savez(temporary, coords=coords, r=r, backend=backend, flow_backend=flow_backend)
+        os.replace(temporary, self._file('pending', name))
+
+    def claim(self) -> str | None:
+        """
+        Take one pending task (after requeueing expired claims), or None if
+        there is none
+        """
+        self.requeue_expired()
+        for entry in sorted(os.listdir(os.path.join(self.path, 'pending'))):
+            name = entry.removesuffix('.npz')
+            try:
+                os.rename(self._file('pending', name), self._file('claimed', name))
+            except FileNotFoundError:
+                continue  # claimed by another worker first
+            # rename keeps the submission time; the lease starts now
+            os.utime(self._file('claimed', name))
+            return name
+        return None
+
+    def requeue_expired(self) -> int:
+        """
+        Move tasks claimed longer than the lease back to pending/
+
+        Returns:
+            Number of tasks requeued
+        """
+        requeued = 0
+        expiry = time.time() - self.lease
+        for entry in os.listdir(os.path.join(self.path, 'claimed')):
+            name = entry.removesuffix('.npz')
+            try:
+                if os.stat(self._file('claimed', name)).st_mtime < expiry:
+                    os.rename(self._file('claimed', name), self._file('pending', name))
+                    requeued += 1
+            except FileNotFoundError:
+                continue  # finished or requeued by another worker meanwhile
+        return requeued
+
+    def run(self, name: str):
+        """
+        Solve a claimed task and publish its result
+        """
+        with np.load(self._file('claimed', name)) as task:
+            R, labels, centers = _solve_partition(task['coords'], int(task['r']), str(task['backend']),
+                                                  str(task['flow_backend']))
+        temporary = os.path.join(self.path, f'.{name}.{os.getpid()}.npz')
+        np.savez(temporary, R=R, labels=labels, centers=centers)
+        os.replace(temporary, self._file('done', name))
+        try:
+            os.remove(self._file('claimed', name))
+        except FileNotFoundError:
+            pass  # lease expired and the task was requeued
+
+    def result(self, name: str):
+        """
+        (R, labels, centers) of a finished task, or None
+        """
+        try:
+            with np.load(self._file('done', name)) as done:
+                return float(done['R']), done['labels'], done['centers']
+        except FileNotFoundError:
+            return None
+
+    def remove(self, name: str):
+        for state in ('pending', 'claimed', 'done'):
+            try:
+                os.remove(self._file(state, name))
+            except FileNotFoundError:
+                pass
+
+def serve_queue(path: str, wait: float = 0.0, poll: float = 0.5, lease: float = DEFAULT_LEASE) -> int:
+    """
+    Work a WorkQueue until it is empty
+
+    Args:
+        path: Queue directory
+        wait: Seconds to keep polling for tasks while the queue is empty
+              (e.g. for workers started before the tasks are submitted)
+        poll: Polling interval in seconds
+        lease: Seconds before another worker's claim is presumed abandoned
+
+    Returns:
+        Number of tasks solved
+    """
+    queue = WorkQueue(path, lease)
+    solved = 0
+    deadline = time.monotonic() + wait
+    while True:
+        name = queue.claim()
+        if name is None:
+            if time.monotonic() >= deadline:
+                return solved
+            time.sleep(poll)
+            continue
+        queue.run(name)
+        solved += 1
+        deadline = time.monotonic() + wait
+
+@dataclass
+class PartitionReport:
+    """
+    Outcome of a partitioned run
+
+    Attributes:
+        sizes: Points per partition
+        partition_R: R of every partition (nan where it has no clustering)
+        band: Points re-solved by the stitching pass
+        stitched: Stitching pieces whose clusters replaced the partition ones
+        R: Largest R of the clusters kept (every member within 2R of its center)
+        max_radius: Largest cluster radius of the result
+        lower_bound: Lower bound on the largest cluster radius of any
+                     r-gather clustering (half the Condition 1 threshold)
+        global_R, global_max_radius: Of the global binary search, when compared
+        solve_seconds, stitch_seconds: Wall time of the partition solves and of stitching
+    """
+    sizes: np.ndarray
+    partition_R: np.ndarray
+    band: int
+    stitched: int
+    R: float | None
+    max_radius: float | None
+    lower_bound: float | None
+    global_R: float | None = None
+    global_max_radius: float | None = None
+    solve_seconds: float = 0.0
+    stitch_seconds: float = 0.0
+
+    @property
+    def ratio(self) -> float | None:
+        """
+        max_radius relative to the global solution, or (an upper bound on
+        that) to lower_bound when no global search was run
+        """
+        reference = self.global_max_radius if self.global_max_radius is not None else self.lower_bound
+        if self.max_radius is None or not reference:
+            return None
+        return self.max_radius / reference
+
+def radius_lower_bound(coords: np.ndarray, r: int) -> float | None:
+    """
+    Half the Condition 1 threshold of all points
+
+    Every point shares a cluster with r - 1 others, all within twice the
+    cluster radius, so no r-gather clustering has a smaller largest
+    radius. Computed from nearest-neighbor grids (or the k-d tree in high
+    dimensions, None without scipy), never a full distance matrix.
+    """
+    n, d = coords.shape
+    if r > n:
+        return None
+    if r <= 1:
+        return 0.0
+    if d <= GRID_MAX_DIM:
+        return float(grid_nearest_distances(coords, r)[:, r - 1].max()) / 2
+    try:
+        index = build_neighbor_index(coords, 'kdtree')
+    except ImportError:
+        return None
+    return float(index.kth_distances(r).max()) / 2
+
+def _solve_partitions(tasks, r: int, backend: str, flow_backend: str, workers: int,
+                      queue_dir: str | None, timeout: float | None, lease: float = DEFAULT_LEASE):
+    if queue_dir is None:
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(_solve_partition, coords, r, backend, flow_backend)
+                           for coords in tasks]
+                return [future.result() for future in futures]
+        return [_solve_partition(coords, r, backend, flow_backend) for coords in tasks]
+
+    # File-based queue: submit every part, help work it, wait for the
+    # tasks taken by other nodes (and, with local workers, solve the ones
+    # whose claims expire)
+    queue = WorkQueue(queue_dir, lease)
+
+    def work():
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(serve_queue, [queue_dir] * workers, [0.0] * workers,
+                                  [0.5] * workers, [lease] * workers))
+        elif workers == 1:
+            serve_queue(queue_dir, lease=lease)
+
+    run = uuid.uuid4().hex[:12]
+    names = [f'{run}-{p:06d}' for p in range(len(tasks))]
+    for name, coords in zip(names, tasks):
+        queue.submit(name, coords, r, backend, flow_backend)
+    work()
+
+    results = {}
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while len(results) < len(names):
+        if workers > 0 and queue.requeue_expired():
+            work()
+        for name in names:
+            if name not in results:
+                result = queue.result(name)
+                if result is not None:
+                    results[name] = result
+        if len(results) < len(names):
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"{len(names) - len(results)} partition tasks unfinished in {queue_dir}")
+            time.sleep(0.1)
+    for name in names:
+        queue.remove(name)
+    return [results[name] for name in names]
+
+def compute_r_gather_partitioned(points: list[Point] | PointSet, r: int, method: str = 'kdtree',
+                                 partition_size: int = DEFAULT_PARTITION_SIZE, backend: str = 'dense',
+                                 flow_backend: str = 'matching', workers: int = 1,
+                                 queue_dir: str | None = None, queue_timeout: float | None = None,
+                                 queue_lease: float = DEFAULT_LEASE, compare: bool = False,
+                                 profiler: Profiler | None = None):
+    """
+    r-gather by spatial divide and conquer with a stitching pass
+
+    The points are split into parts of about partition_size points (a k-d
+    split, or a uniform grid with that many points per cell on average),
+    and each part is solved on its own by the binary search - in this
+    process, in `workers` processes, or through a WorkQueue in queue_dir
+    that workers on other nodes can share. The cost drops from one
+    O(n²)-sized problem to n / partition_size problems of fixed size.
+
+    Stitching: a cluster whose 2R ball (R the largest partition R) reaches
+    beyond its part's cell may be worse than a solution that also uses the
+    points on the other side. Such clusters are grouped, whole, into pieces
+    of about partition_size points (a k-d split of their centers) together
+    with the points of parts without a clustering, and every piece is
+    re-solved the same way as the parts. A piece's clusters replace the old
+    ones if their largest radius is not larger (always, if it holds
+    unassigned points). Points still unassigned afterwards join their
+    nearest center (their radii are then not bounded by 2R).
+
+    Every cluster of the result holds at least r points. Its largest radius
+    is reported against radius_lower_bound and, with compare=True, against
+    the global binary search (which costs what partitioning avoids).
+
+    Args:
+        method: 'kdtree' or 'grid' (see PARTITION_METHODS)
+        partition_size: Target points per part (at least 2r for 'kdtree')
+        workers: Processes solving parts (in queue mode, local workers in
+                 addition to any remote ones; 0 to leave the queue to them)
+        queue_dir: Directory of a WorkQueue; parts are solved in-process or
+                   by a process pool if None
+        queue_timeout: Seconds to wait for queued results (None: no limit)
+        queue_lease: Seconds after which a claimed task is presumed
+                     abandoned and requeued (see WorkQueue)
+
+    Returns:
+        (clusters, report): ClusterResult over all points and a PartitionReport
+    """
+    if method not in PARTITION_METHODS:
+        raise ValueError(f"Unknown partition method {method!r}, expected one of {PARTITION_METHODS}")
+    points = as_point_set(points)
+    profiler = NULL_PROFILER if profiler is None else profiler
+    coords = np.asarray(points.coordinates, dtype=np.float64)
+    n = points.n
+
+    with profiler.phase('partition'):
+        if method == 'kdtree':
+            parts, boxes = kd_partition(coords, max(partition_size, 2 * r))
+        else:
+            cells = max(1, int(np.ceil((n / max(partition_size, 1)) ** (1 / points.dimension))))
+            parts, boxes = grid_partition(coords, cells)
+    profiler.count('partitions', len(parts))
+
+    # Solve every part
+    start = time.perf_counter()
+    with profiler.phase('partition_solve'):
+        solved = _solve_partitions([coords[part] for part in parts], r, backend, flow_backend,
+                                   workers, queue_dir, queue_timeout, queue_lease)
+    solve_seconds = time.perf_counter() - start
+
+    labels = np.full(n, -1, dtype=np.intp)
+    center_list, part_of_cluster = [], []
+    partition_R = np.full(len(parts), np.nan)
+    for p, (part, (R, part_labels, part_centers)) in enumerate(zip(parts, solved)):
+        partition_R[p] = R
+        assigned = part_labels >= 0
+        labels[part[assigned]] = part_labels[assigned] + len(center_list)
+        center_list.extend(part[part_centers].tolist())
+        part_of_cluster.extend([p] * len(part_centers))
+    centers = np.array(center_list, dtype=np.intp)
+    part_of_cluster = np.array(part_of_cluster, dtype=np.intp)
+
+    # Stitch the clusters that cross their part's cell
+    start = time.perf_counter()
+    with profiler.phase('stitch'):
+        cluster_R = partition_R[part_of_cluster]
+        bound = float(np.nanmax(partition_R)) if np.any(~np.isnan(partition_R)) else np.inf
+        center_coords = coords[centers]
+        lo, hi = boxes[part_of_cluster, 0], boxes[part_of_cluster, 1]
+        crossing = np.any((center_coords - lo < 2 * bound) | (hi - center_coords < 2 * bound), axis=1)
+        pieces = _stitch_pieces(coords, labels, centers, crossing, max(partition_size, 2 * r))
+        band = sum(len(piece) for piece in pieces)
+        profiler.count('stitch_band_points', band)
+        solved = _solve_partitions([coords[piece] for piece in pieces], r, backend, flow_backend,
+                                   workers, queue_dir, queue_timeout, queue_lease)
+
+        radii = _radii(coords, labels, centers)
+        dropped = np.zeros(len(centers), dtype=bool)
+        new_centers, new_R = [], []
+        stitched = 0
+        for piece, (R, piece_labels, piece_centers) in zip(pieces, solved):
+            if np.isnan(R):
+                continue
+            old = labels[piece]
+            old_clusters = np.unique(old[old >= 0])
+            if np.all(old >= 0) and _radii(coords[piece], piece_labels, piece_centers).max() > radii[old_clusters].max():
+                continue
+            dropped[old_clusters] = True
+            labels[piece] = piece_labels + len(centers) + len(new_centers)
+            new_centers.extend(piece[piece_centers].tolist())
+            new_R.extend([R] * len(piece_centers))
+            stitched += 1
+        labels, centers, cluster_R = _compact(labels, np.append(centers, np.array(new_centers, dtype=np.intp)),
+                                              np.append(cluster_R, new_R), np.append(dropped, np.zeros(len(new_centers), dtype=bool)))
+
+        unassigned = np.flatnonzero(labels < 0)
+        if len(unassigned) and len(centers):
+            labels[unassigned] = _nearest(coords[unassigned], coords[centers])
+        if len(centers) == 0:
+            labels = np.full(n, -1, dtype=np.intp)
+        radii = _radii(coords, labels, centers)
+    stitch_seconds = time.perf_counter() - start
+
+    clusters = ClusterResult(points, labels, centers, radii)
+    feasible = len(centers) > 0
+    report = PartitionReport(
+        sizes=np.array([len(part) for part in parts]),
+        partition_R=partition_R,
+        band=band,
+        stitched=stitched,
+        R=float(cluster_R.max()) if feasible else None,
+        max_radius=float(radii.max()) if feasible else None,
+        lower_bound=radius_lower_bound(coords, r),
+        solve_seconds=solve_seconds,
+        stitch_seconds=stitch_seconds,
+    )
+    if compare:
+        global_R, global_clusters = compute_r_gather_sweep(points, [r], backend=backend, search='binary',
+                                                           flow_backend=flow_backend, profiler=profiler)[r]
+        report.global_R = None if global_R is None else float(global_R)
+        report.global_max_radius = float(global_clusters.radii.max()) if len(global_clusters) else None
+    return clusters, report
+
+def _radii(coords: np.ndarray, labels: np.ndarray, centers: np.ndarray) -> np.ndarray:
+    # Exact radius of every cluster (unassigned points ignored)
+    assigned = np.flatnonzero(labels >= 0)
+    radii = np.zeros(len(centers))
+    np.maximum.at(radii, labels[assigned],
+                  pairwise_distances(coords[assigned], coords[centers[labels[assigned]]]))
+    return radii
+
+def _nearest(queries: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    # Index of the nearest target of every query, in bounded blocks
+    nearest = np.empty(len(queries), dtype=np.intp)
+    step = max(1, GRID_PAIR_BATCH // max(len(targets) * targets.shape[1], 1))
+    for start in range(0, len(queries), step):
+        block = queries[start:start + step]
+        nearest[start:start + step] = np.argmin(
+            pairwise_distances(block[:, np.newaxis, :], targets[np.newaxis, :, :]), axis=1)
+    return nearest
+
+def _stitch_pieces(coords: np.ndarray, labels: np.ndarray, centers: np.ndarray, crossing: np.ndarray,
+                   size: int) -> list[np.ndarray]:
+    # Whole crossing clusters grouped by a k-d split of their centers into
+    # pieces of about `size` points; unassigned points join the piece of
+    # their nearest crossing center
+    crossing_ids = np.flatnonzero(crossing)
+    unassigned = np.flatnonzero(labels < 0)
+    if len(crossing_ids) == 0:
+        return [unassigned] if len(unassigned) else []
+
+    # Label -1 reads the appended entry
+    piece_of = np.full(len(centers) + 1, -1, dtype=np.intp)
+    members = np.count_nonzero(np.append(crossing, False)[labels])
+    groups, _ = kd_partition(coords[centers[crossing_ids]], max(1, size * len(crossing_ids) // members))
+    for g, group in enumerate(groups):
+        piece_of[crossing_ids[group]] = g
+    piece_of_point = piece_of[labels]
+    if len(unassigned):
+        piece_of_point[unassigned] = piece_of[crossing_ids[_nearest(coords[unassigned],
+                                                                    coords[centers[crossing_ids]])]]
+
+    in_band = np.flatnonzero(piece_of_point >= 0)
+    order = in_band[np.argsort(piece_of_point[in_band], kind='stable')]
+    return np.split(order, np.cumsum(np.bincount(piece_of_point[in_band], minlength=len(groups)))[:-1])
+
+def _compact(labels: np.ndarray, centers: np.ndarray, cluster_R: np.ndarray, dropped: np.ndarray):
+    # Remove dropped clusters (their points were relabeled) and renumber the rest
+    kept = np.flatnonzero(~dropped)
+    renumber = np.full(len(centers) + 1, -1, dtype=np.intp)
+    renumber[kept] = np.arange(len(kept))
+    return renumber[labels], centers[kept], cluster_R[kept]
+
+def worker_main(argv=None) -> int:
+    """
+    Entry point of r-gather-worker: solve the tasks of a shared WorkQueue
+    """
+    parser = argparse.ArgumentParser(prog='r-gather-worker',
+                                     description='Solve partition tasks from a shared queue directory.')
+    parser.add_argument('queue', help='queue directory (see --queue of r-gather)')
+    parser.add_argument('--wait', type=float, default=0.0,
+                        help='seconds to keep polling while the queue is empty')
+    parser.add_argument('--lease', type=float, default=DEFAULT_LEASE,
+                        help='seconds after which a claimed task is requeued (default %(default)s)')
+    args = parser.parse_args(argv)
+    solved = serve_queue(args.queue, wait=args.wait, lease=args.lease)
+    print(f"solved {solved} tasks")
+    return 0
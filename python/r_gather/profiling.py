@@ -0,0 +1,203 @@
+# profiling.py
+import json
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# Phases timed by the search drivers, in pipeline order
+PHASES = (
+    'coreset',              # collapsing duplicates into weighted representatives
+    'window',               # streaming: adding and expiring window points
+    'partition',            # partitioned mode: k-d or grid split
+    'partition_solve',      # partitioned mode: solving the parts
+    'stitch',               # partitioned mode: re-solving clusters across cell boundaries
+    'distance_matrix',      # neighbor index (the distance matrix for the dense backend)
+    'candidates',           # Condition 1 threshold and candidate radii enumeration
+    'condition_1',
+    'adjacency',            # 2R neighborhood graph of a probe
+    'initial_clustering',
+    'flow',
+    'flow_network',         # within flow: building the flow graph / CSR arrays
+    'max_flow',             # within flow: maximum flow / b-matching
+    'clusters',             # building the ClusterResult
+    'parallel_probes',      # probes run in worker processes (workers > 1)
+)
+
+# Probe outcomes: the phase that rejected R, or 'accepted'
+# ('rejected' for probes run in worker processes, which report no reason)
+PROBE_OUTCOMES = ('condition_1', 'initial_clustering', 'flow', 'accepted', 'rejected')
+
+class Profiler:
+    """
+    Instrumentation collector for the search pipeline
+
+    Pass as profiler= to a search driver. It records:
+    - wall time and call count per phase (PHASES)
+    - every probed R with the phase that rejected it (PROBE_OUTCOMES) and,
+      once Phase 2.1 succeeded, the flow graph size: V = n + k + 2 vertices,
+      E = k + n + (center -> point edges) for k centers
+    - counters (e.g. flow warm starts and rebuilds)
+    - with trace_memory=True, the peak Python allocation of each phase
+      (tracemalloc, which costs noticeable time itself)
+
+    Used as a context manager it also records the total wall time and
+    starts/stops tracemalloc. Drivers called without a profiler use
+    NULL_PROFILER, whose hooks do nothing.
+    """
+
+    enabled = True
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.times = {}
+        self.counts = {}
+        self.peak_bytes = {}
+        self.counters = {}
+        self.probes = []
+        self.wall_time = None
+        self._start = None
+        self._started_tracing = False
+        self._memory_frames = []
+
+    def __enter__(self) -> 'Profiler':
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.wall_time = time.perf_counter() - self._start
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        return False
+
+    @contextmanager
+    def phase(self, name: str):
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            self._enter_memory_frame()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.times[name] = self.times.get(name, 0.0) + time.perf_counter() - start
+            self.counts[name] = self.counts.get(name, 0) + 1
+            if tracing:
+                peak = self._exit_memory_frame()
+                self.peak_bytes[name] = max(self.peak_bytes.get(name, 0), peak)
+
+    def _enter_memory_frame(self):
+        # Phases nest (e.g. max_flow inside flow): fold the peak so far into
+        # the enclosing phases before resetting it for this one
+        current, peak = tracemalloc.get_traced_memory()
+        for frame in self._memory_frames:
+            frame[1] = max(frame[1], peak)
+        tracemalloc.reset_peak()
+        self._memory_frames.append([current, current])
+
+    def _exit_memory_frame(self) -> int:
+        peak = tracemalloc.get_traced_memory()[1]
+        base, frame_peak = self._memory_frames.pop()
+        for frame in self._memory_frames:
+            frame[1] = max(frame[1], peak)
+        return max(frame_peak, peak) - base
+
+    def record_probe(self, R: float, outcome: str, **details):
+        """
+        Record one probed R and the phase that rejected it (or 'accepted')
+        """
+        self.probes.append({'R': float(R), 'outcome': outcome, **details})
+
+    def count(self, name: str, amount: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def rejections(self) -> dict:
+        """
+        Number of probes per outcome
+        """
+        result = {}
+        for probe in self.probes:
+            result[probe['outcome']] = result.get(probe['outcome'], 0) + 1
+        return result
+
+    def _phase_names(self) -> list[str]:
+        return [p for p in PHASES if p in self.times] + sorted(set(self.times) - set(PHASES))
+
+    def report(self, total: float | None = None) -> str:
+        """
+        Table of the phase times (and their share of total, if given)
+        """
+        total = self.wall_time if total is None else total
+        lines = [f"{'phase':<20} {'calls':>7} {'seconds':>10}" + ('  share' if total else '')]
+        for name in self._phase_names():
+            line = f"{name:<20} {self.counts[name]:>7} {self.times[name]:>10.4f}"
+            if total:
+                line += f"  {100 * self.times[name] / total:>4.0f}%"
+            lines.append(line)
+        if self.probes:
+            outcomes = ', '.join(f"{k}: {v}" for k, v in self.rejections().items())
+            lines.append(f"{len(self.probes)} probes ({outcomes})")
+        return '\n'.join(lines)
+
+    def to_dict(self) -> dict:
+        return {
+            'wall_seconds': self.wall_time,
+            'phases': {
+                name: {
+                    'seconds': self.times[name],
+                    'calls': self.counts[name],
+                    **({'peak_bytes': self.peak_bytes[name]} if name in self.peak_bytes else {}),
+                }
+                for name in self._phase_names()
+            },
+            'probe_count': len(self.probes),
+            'rejections': self.rejections(),
+            'probes': self.probes,
+            'counters': dict(self.counters),
+            'peak_rss_bytes': peak_rss_bytes(),
+        }
+
+    def to_json(self, path: str | None = None, **kwargs) -> str:
+        """
+        The collected data as JSON, also written to path if given
+        """
+        text = json.dumps(self.to_dict(), **kwargs)
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(text)
+        return text
+
+class _NullProfiler:
+    # Stand-in when profiling is off: every hook is a no-op
+    enabled = False
+    _context = nullcontext()
+
+    def phase(self, name: str):
+        return self._context
+
+    def record_probe(self, R: float, outcome: str, **details):
+        pass
+
+    def count(self, name: str, amount: int = 1):
+        pass
+
+NULL_PROFILER = _NullProfiler()
+
+def peak_rss_bytes(children: bool = False) -> int:
+    """
+    Peak resident set size of this process (or of its finished children),
+    0 where the platform does not report it
+    """
+    if resource is None:
+        return 0
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    peak = resource.getrusage(who).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
@@ -1,96 +1,404 @@
 # r_gather.py
 import numpy as np
-from .data_structures import Point, Cluster
-from .distance_matrix import compute_distance_matrix
-from .flow_network import flow_network_verification
+from .data_structures import Point, Cluster, ClusterResult, PointSet, as_point_set
+from .adjacency import BitsetAdjacency, CSRAdjacency
+from .cache import DistanceCache
+from .candidates import (CandidateRadii, GeometricRadii, condition_1_thresholds, select_smallest_feasible,
+                         select_smallest_feasible_kary)
+from .flow_network import IncrementalFlowVerifier, flow_network_verification
+from .grid import GRID_MAX_DIM, grid_count_within
+from .neighbor_index import DenseNeighborIndex, NeighborIndex, as_neighbor_index, build_neighbor_index
+from .parallel import ParallelProber
+from .profiling import NULL_PROFILER, Profiler
 
-def compute_r_gather(points: list[Point], r: float) -> list[Cluster]:
+def compute_r_gather(points: list[Point] | PointSet, r: float, backend: str = 'dense',
+                     flow_backend: str = 'matching', warm_start: bool = True,
+                     cache: DistanceCache | None = None,
+                     profiler: Profiler | None = None,
+                     epsilon: float | None = None,
+                     memory_budget: int | None = None) -> ClusterResult:
+    """
+    Linear scan over the candidate radii for the smallest feasible R
 
-    # Compute distance matrix and candidate radii
-    distance_matrix = compute_distance_matrix(points)
-    candidate_radii = np.unique(distance_matrix / 2)
+    With epsilon the candidates are a geometric grid (GeometricRadii) and
+    the result's R is within a factor (1 + epsilon) of the exact optimum.
+    """
+    points = as_point_set(points)
+    profiler = NULL_PROFILER if profiler is None else profiler
 
-    # Find the smallest R in candidate radii
-    for R in candidate_radii:
+    # Build neighbor index (distance matrix for the dense backend) and
+    # candidate radii, which start at the first R that satisfies Condition 1
+    index, sorted_radii = prepare_index(points, backend, cache, profiler, radii=epsilon is None,
+                                        memory_budget=memory_budget)
+    try:
+        with profiler.phase('candidates'):
+            candidates = make_candidates(index, r, epsilon, sorted_radii=sorted_radii)
 
-        if R == 0:
-            continue
+        _, clusters = linear_search(points, index, candidates, r, flow_backend, warm_start, profiler)
+        return clusters
+    finally:
+        index.close()
+
+def compute_r_gather_binary_search(points: list[Point] | PointSet, r: float, backend: str = 'dense',
+                                   flow_backend: str = 'matching', warm_start: bool = True,
+                                   workers: int = 1, cache: DistanceCache | None = None,
+                                   profiler: Profiler | None = None,
+                                   epsilon: float | None = None,
+                                   memory_budget: int | None = None) -> ClusterResult:
+    """
+    Binary search for the smallest feasible R
+
+    With workers > 1 the search becomes k-ary: each round probes `workers`
+    candidate radii concurrently in a process pool (ParallelProber) and
+    returns the same minimal R as the serial search.
+
+    With epsilon the search runs over a geometric grid of radii
+    (GeometricRadii): O(log(1/epsilon)) probes, no pair distances sorted,
+    and R within a factor (1 + epsilon) of the exact optimum.
+
+    With backend='tiled' the distance matrix lives on disk and every pass
+    over it stays within memory_budget bytes of RAM (TiledNeighborIndex).
+
+    A Profiler passed as profiler= accumulates the time of every phase.
+    """
+    points = as_point_set(points)
+    profiler = NULL_PROFILER if profiler is None else profiler
+
+    # Build neighbor index (distance matrix for the dense backend)
+    index, sorted_radii = prepare_index(points, backend, cache, profiler, radii=epsilon is None,
+                                        memory_budget=memory_budget)
+    try:
+        with profiler.phase('candidates'):
+            candidates = make_candidates(index, r, epsilon, sorted_radii=sorted_radii)
+
+        _, clusters = binary_search(points, index, candidates, r, flow_backend, warm_start, workers, profiler)
+        return clusters
+    finally:
+        index.close()
+
+def compute_r_gather_sweep(points: list[Point] | PointSet, r_values, backend: str = 'dense',
+                           search: str = 'linear', flow_backend: str = 'matching',
+                           warm_start: bool = True, workers: int = 1,
+                           cache: DistanceCache | None = None,
+                           profiler: Profiler | None = None,
+                           epsilon: float | None = None,
+                           memory_budget: int | None = None) -> dict:
+    """
+    Optimal clustering for every r in r_values, sharing all per-dataset work
+
+    With epsilon every R is within a factor (1 + epsilon) of the optimum
+    (see GeometricRadii).
+
+    Returns:
+        {r: (R, clusters)} - R is None (and clusters empty) when no
+                             clustering exists for that r
+    """
+    return {
+        r: (R, clusters)
+        for r, R, clusters in iter_r_gather_sweep(points, r_values, backend, search, flow_backend,
+                                                  warm_start, workers, cache, profiler, epsilon,
+                                                  memory_budget)
+    }
+
+def iter_r_gather_sweep(points: list[Point] | PointSet, r_values, backend: str = 'dense',
+                        search: str = 'linear', flow_backend: str = 'matching',
+                        warm_start: bool = True, workers: int = 1,
+                        cache: DistanceCache | None = None,
+                        profiler: Profiler | None = None,
+                        epsilon: float | None = None,
+                        memory_budget: int | None = None):
+    """
+    Stream the results of compute_r_gather_sweep as each r completes
+
+    The neighbor index (and cached sorted radii) are built once, and the
+    Condition 1 thresholds of all r come from one nearest-distance table.
+    The optimal R is non-decreasing in r, so r values are processed in
+    ascending order and each search starts at the R found for the
+    previous r instead of at the smallest radius. With workers > 1 one
+    ParallelProber (process pool and shared matrix file) serves every r.
+
+    Yields:
+        (r, R, clusters) in ascending order of r
+    """
+    if search not in SEARCH_STRATEGIES:
+        raise ValueError(f"Unknown search {search!r}, expected one of {SEARCH_STRATEGIES}")
+
+    points = as_point_set(points)
+    profiler = NULL_PROFILER if profiler is None else profiler
+    r_values = sorted(set(int(r) for r in r_values))
+    index, sorted_radii = prepare_index(points, backend, cache, profiler, radii=epsilon is None,
+                                        memory_budget=memory_budget)
+    prober = None
+    try:
+        if workers > 1 and search == 'binary' and r_values:
+            prober = ParallelProber(index, workers, flow_backend=flow_backend, warm_start=warm_start)
+        with profiler.phase('candidates'):
+            thresholds = condition_1_thresholds(index, r_values)
+
+        min_radius = 0.0
+        for r in r_values:
+            with profiler.phase('candidates'):
+                candidates = make_candidates(index, r, epsilon, sorted_radii=sorted_radii,
+                                             threshold=thresholds[r], min_radius=min_radius)
+            if search == 'linear':
+                R, clusters = linear_search(points, index, candidates, r, flow_backend, warm_start, profiler)
+            else:
+                R, clusters = binary_search(points, index, candidates, r, flow_backend, warm_start, workers,
+                                            profiler, prober)
+            if R is not None:
+                min_radius = R
+            yield r, R, clusters
+    finally:
+        # Also when the caller stops iterating early (generator close)
+        if prober is not None:
+            prober.close()
+        index.close()
+
+SEARCH_STRATEGIES = ('linear', 'binary')
+
+def linear_search(points: list[Point] | PointSet, index: NeighborIndex,
+                  candidates: CandidateRadii | GeometricRadii, r: float,
+                  flow_backend: str = 'matching', warm_start: bool = True,
+                  profiler: Profiler | None = None):
+    """
+    Scan candidate radii in ascending order and stop at the first feasible R
+
+    Returns:
+        (R, clusters), or (None, empty ClusterResult) if no valid clustering exists
+    """
+    profiler = NULL_PROFILER if profiler is None else profiler
+    verifier = make_flow_verifier(index, r, flow_backend, warm_start)
+
+    # Find the smallest R in candidate radii
+    for R in _timed(candidates, profiler, 'candidates'):
 
         # Condition 1
-        if not check_condition_1(distance_matrix, R, r):
+        with profiler.phase('condition_1'):
+            satisfied = check_condition_1(index, R, r, threshold=candidates.threshold)
+        if not satisfied:
+            profiler.record_probe(R, 'condition_1')
             continue
 
         # Condition 2
-        success, clusters = check_condition_2(points, distance_matrix, R, r)
+        success, clusters = check_condition_2(points, index, R, r, flow_backend=flow_backend,
+                                              verifier=verifier, profiler=profiler)
         if success:
-            return clusters
+            return R, clusters
 
     # No valid clustering found
-    return []
+    return None, ClusterResult.empty(as_point_set(points))
 
-def compute_r_gather_binary_search(points: list[Point], r: float) -> list[Cluster]:
-    # Compute distance matrix and candidate radii
-    distance_matrix = compute_distance_matrix(points)
-    candidate_radii = np.unique(distance_matrix / 2)
-    candidate_radii = candidate_radii[candidate_radii > 0]  # Remove 0
-    
-    if len(candidate_radii) == 0:
-        return []
-    
-    # Binary search for the smallest R
-    left, right = 0, len(candidate_radii) - 1
-    result_R = None
-    result_clusters = []
-    
-    while left <= right:
-        mid = (left + right) // 2
-        R = candidate_radii[mid]
-        
-        # Check Condition 1
-        if not check_condition_1(distance_matrix, R, r):
-            # R is too small, search right half
-            left = mid + 1
-            continue
-        
-        # Check Condition 2
-        success, clusters = check_condition_2(points, distance_matrix, R, r)
-        
-        if success:
-            # Found a valid R, try to find smaller one
-            result_R = R
-            result_clusters = clusters
-            right = mid - 1
-        else:
-            # R doesn't work, need larger R
-            left = mid + 1
-    
-    return result_clusters
+def binary_search(points: list[Point] | PointSet, index: NeighborIndex,
+                  candidates: CandidateRadii | GeometricRadii, r: float,
+                  flow_backend: str = 'matching', warm_start: bool = True, workers: int = 1,
+                  profiler: Profiler | None = None, prober: ParallelProber | None = None):
+    """
+    Binary (or, with workers > 1, parallel k-ary) search over candidate radii
+
+    With workers > 1 the probes run on `prober`, or on a ParallelProber
+    started for this search only when none is given.
+
+    Returns:
+        (R, clusters), or (None, empty ClusterResult) if no valid clustering exists
+    """
+    profiler = NULL_PROFILER if profiler is None else profiler
+    if workers > 1:
+        if prober is None:
+            with ParallelProber(index, workers, flow_backend=flow_backend, warm_start=warm_start) as prober:
+                return _kary_search(points, index, candidates, r, prober, profiler)
+        return _kary_search(points, index, candidates, r, prober, profiler)
+
+    verifier = make_flow_verifier(index, r, flow_backend, warm_start)
+
+    def probe(R):
+        return check_radius(points, index, R, r, threshold=candidates.threshold,
+                            flow_backend=flow_backend, verifier=verifier, profiler=profiler)
+
+    for candidate_radii, is_last in _timed(candidates.windows(), profiler, 'candidates'):
+
+        # Skip windows whose largest radius still fails
+        if not is_last:
+            success, _ = probe(candidate_radii.max())
+            if not success:
+                continue
+
+        # Binary search for the smallest R (by selection, no full sort)
+        R, clusters = select_smallest_feasible(candidate_radii, probe)
+        if R is not None:
+            return R, clusters
+        break
+
+    return None, ClusterResult.empty(as_point_set(points))
+
+def _kary_search(points, index, candidates, r, prober, profiler):
+    # binary_search with workers > 1: each round probes prober.workers radii
+    def probe_many(radii):
+        with profiler.phase('parallel_probes'):
+            outcomes = prober.probe_many(radii, r, candidates.threshold)
+        for R, (success, _) in zip(radii, outcomes):
+            profiler.record_probe(R, 'accepted' if success else 'rejected')
+        return outcomes
 
-def check_condition_1(distance_matrix: np.ndarray, R: float, r: int) -> bool:
+    for candidate_radii, _ in _timed(candidates.windows(), profiler, 'candidates'):
+        R, result = select_smallest_feasible_kary(candidate_radii, probe_many, prober.workers)
+        if R is not None:
+            centers, assignments = result
+            with profiler.phase('clusters'):
+                clusters = build_clusters_from_assignments(points, centers, assignments, index)
+            return R, clusters
+    return None, ClusterResult.empty(as_point_set(points))
+
+def prepare_index(points: list[Point] | PointSet, backend: str = 'dense',
+                  cache: DistanceCache | None = None, profiler: Profiler | None = None,
+                  radii: bool = True, memory_budget: int | None = None):
+    """
+    Neighbor index of one search, plus the sorted candidate radii if cached
+
+    With a DistanceCache the dense matrix and the sorted candidate radii are
+    reopened as memmaps when the same points were seen before. memory_budget
+    is the RAM budget of the tiled backend (see TiledNeighborIndex).
+
+    The caller closes the index (NeighborIndex.close) when done, which
+    removes the temporary store of the tiled backend right away.
+
+    Returns:
+        (index, sorted_radii) - sorted_radii is None without a cache (or
+                                with radii=False, for approximate searches)
+    """
+    profiler = NULL_PROFILER if profiler is None else profiler
+    with profiler.phase('distance_matrix'):
+        index = build_neighbor_index(points, backend, cache=cache, memory_budget=memory_budget)
+    sorted_radii = None
+    if radii and cache is not None and isinstance(index, DenseNeighborIndex):
+        coords = as_point_set(points).coordinates
+        with profiler.phase('candidates'):
+            sorted_radii = cache.candidate_radii(coords, index.distance_matrix)
+    return index, sorted_radii
+
+def make_candidates(index: NeighborIndex, r: int, epsilon: float | None = None,
+                    sorted_radii: np.ndarray | None = None, threshold: float | None = None,
+                    min_radius: float = 0.0) -> CandidateRadii | GeometricRadii:
+    """
+    Exact candidate radii, or with epsilon the (1 + epsilon) geometric grid
+    """
+    if epsilon is None:
+        return CandidateRadii(index, r, sorted_radii=sorted_radii, threshold=threshold,
+                              min_radius=min_radius)
+    return GeometricRadii(index, r, epsilon, threshold=threshold, min_radius=min_radius)
+
+def _timed(iterable, profiler, name: str):
+    # Charge the time spent producing each item to a phase
+    iterator = iter(iterable)
+    while True:
+        with profiler.phase(name):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+def make_flow_verifier(index: NeighborIndex, r: int, flow_backend: str = 'matching',
+                       warm_start: bool = True) -> IncrementalFlowVerifier | None:
+    """
+    Warm-started flow verifier shared by the probes of one search, or None
+    when warm starts are off or the flow backend is not 'matching'
+    """
+    if warm_start and flow_backend == 'matching':
+        return IncrementalFlowVerifier(index.n, index, r)
+    return None
+
+def check_radius(points: list[Point] | PointSet, index: NeighborIndex, R: float, r: int,
+                 threshold: float | None = None, flow_backend: str = 'matching',
+                 verifier: IncrementalFlowVerifier | None = None, profiler: Profiler | None = None):
+    """
+    Check Condition 1 and Condition 2 for a single R
+
+    Returns:
+        (success, clusters) as in check_condition_2
+    """
+    profiler = NULL_PROFILER if profiler is None else profiler
+    success, centers, assignments = solve_radius(index, R, r, threshold=threshold,
+                                                 flow_backend=flow_backend, verifier=verifier,
+                                                 profiler=profiler)
+    if not success:
+        return False, ClusterResult.empty(as_point_set(points))
+    with profiler.phase('clusters'):
+        return True, build_clusters_from_assignments(points, centers, assignments, index)
+
+def solve_radius(index: NeighborIndex, R: float, r: int, threshold: float | None = None,
+                 flow_backend: str = 'matching', verifier: IncrementalFlowVerifier | None = None,
+                 profiler: Profiler | None = None, weights: np.ndarray | None = None):
+    """
+    Condition 1 and Condition 2 for a single R, without building clusters
+
+    Without a Condition 1 threshold the 2R adjacency is built first and
+    shared by both conditions. With weights (weighted representatives, see
+    coreset.py) every condition counts weight instead of points.
+
+    Returns:
+        (success, centers, assignments) - allocations instead of
+                                          assignments with weights
+    """
+    profiler = NULL_PROFILER if profiler is None else profiler
+    if threshold is not None:
+        with profiler.phase('condition_1'):
+            satisfied = check_condition_1(index, R, r, threshold=threshold)
+        adjacency = None
+    else:
+        with profiler.phase('adjacency'):
+            adjacency = index.adjacency(2 * R)
+        with profiler.phase('condition_1'):
+            satisfied = check_condition_1(index, R, r, adjacency=adjacency, weights=weights)
+    if not satisfied:
+        profiler.record_probe(R, 'condition_1')
+        return False, [], {}
+    return solve_condition_2(index, R, r, flow_backend=flow_backend, verifier=verifier,
+                             adjacency=adjacency, profiler=profiler, weights=weights)
+
+def check_condition_1(distance_matrix: np.ndarray | NeighborIndex, R: float, r: int,
+                      threshold: float | None = None,
+                      adjacency: CSRAdjacency | BitsetAdjacency | None = None,
+                      weights: np.ndarray | None = None) -> bool:
     # Each point p in the candidate radii should have
     # at least r − 1 other points within distance 2R of p.
-    neighbor_counts = np.sum(distance_matrix <= 2 * R, axis = 1)
+    # With a precomputed condition_1_threshold this is a single comparison,
+    # with the probe's 2R adjacency it is a popcount row sum.
+    # With weights the total weight within 2R must reach r.
+    if threshold is not None:
+        return bool(2 * R >= threshold)
+    if weights is not None:
+        if adjacency is None:
+            adjacency = as_neighbor_index(distance_matrix).adjacency(2 * R)
+        neighbor_counts = adjacency.weighted_degrees(weights)
+    elif adjacency is not None:
+        neighbor_counts = adjacency.degrees()
+    else:
+        neighbor_counts = as_neighbor_index(distance_matrix).count_within(2 * R)
     return np.all(neighbor_counts >= r)
 
-def check_condition_1_grid(distance_matrix: np.ndarray, R: float, r: int, 
-                      points: list = None) -> bool:
+def check_condition_1_grid(distance_matrix: np.ndarray | None, R: float, r: int,
+                           points: list[Point] | PointSet | np.ndarray | None = None) -> bool:
     """
     Check Condition 1: Each point should have at least r-1 other points 
     within distance 2R (including itself, so total >= r).
     
-    Grid-based optimization: Divide space into cells of size 2R, 
-    only check neighbors in adjacent cells.
+    Grid-based optimization: Divide space into cells of size 2R and count,
+    for every point, the points within 2R among the 3^d adjacent cells
+    (vectorized, see grid.grid_count_within). Distances come from the
+    coordinates, so no distance matrix is needed.
     
     Args:
-        distance_matrix: Pre-computed distance matrix
+        distance_matrix: Pre-computed distance matrix, used only when points
+                         is None or d > GRID_MAX_DIM (may be None otherwise)
         R: Current radius value
         r: Minimum cluster size
-        points: Optional list of points for grid-based optimization
+        points: Points, PointSet or coordinate array for the grid
     
     Returns:
         True if condition 1 is satisfied, False otherwise
     """
-    n = distance_matrix.shape[0]
+    coords = None if points is None else as_point_set(points).coordinates
+    n = distance_matrix.shape[0] if coords is None else coords.shape[0]
     
     # Basic validation
     if n < r:
@@ -99,92 +407,100 @@ def check_condition_1_grid(distance_matrix: np.ndarray, R: float, r: int,
     if R <= 0:
         return False
     
-    # If points not provided, use original vectorized method
-    if points is None:
-        neighbor_counts = np.sum(distance_matrix <= 2 * R, axis=1)
-        return np.all(neighbor_counts >= r)
-    
-    # Grid-based optimization
-    from itertools import product
-    
-    cell_size = 2 * R
-    d = len(points[0].coordinate)
-    
     # For high dimensions (>5), 3^d neighbor cells becomes too large
     # Fall back to original method
-    if d > 5:
-        neighbor_counts = np.sum(distance_matrix <= 2 * R, axis=1)
-        return np.all(neighbor_counts >= r)
+    if coords is None or coords.shape[1] > GRID_MAX_DIM:
+        neighbor_counts = np.sum(np.asarray(distance_matrix) <= 2 * R, axis=1)
+        return bool(np.all(neighbor_counts >= r))
     
-    # Map point coordinate to grid cell index
-    def get_cell_index(coord):
-        return tuple(int(np.floor(c / cell_size)) for c in coord)
-    
-    # Build grid: cell_index -> list of point indices
-    grid = {}
-    for i, p in enumerate(points):
-        cell = get_cell_index(p.coordinate)
-        if cell not in grid:
-            grid[cell] = []
-        grid[cell].append(i)
-    
-    # Pre-compute all neighbor offsets: {-1, 0, 1}^d
-    offsets = list(product([-1, 0, 1], repeat=d))
-    
-    threshold = 2 * R
-    
-    # Check each point
-    for i, p in enumerate(points):
-        cell = get_cell_index(p.coordinate)
-        neighbor_count = 0
-        
-        # Check all neighboring cells (including self)
-        for offset in offsets:
-            neighbor_cell = tuple(cell[k] + offset[k] for k in range(d))
-            if neighbor_cell in grid:
-                for j in grid[neighbor_cell]:
-                    # Use pre-computed distance matrix
-                    if distance_matrix[i][j] <= threshold:
-                        neighbor_count += 1
-                        # Early exit: found enough neighbors
-                        if neighbor_count >= r:
-                            break
-                if neighbor_count >= r:
-                    break
-        
-        # Early exit: this point doesn't have enough neighbors
-        if neighbor_count < r:
-            return False
-    
-    return True
+    neighbor_counts = grid_count_within(coords, 2 * R)
+    return bool(np.all(neighbor_counts >= r))
 
-def check_condition_2(points: list[Point], distance_matrix: np.ndarray, R: float, r: int):
+def check_condition_2(points: list[Point] | PointSet, distance_matrix: np.ndarray | NeighborIndex, R: float, r: int,
+                      flow_backend: str = 'matching', verifier: IncrementalFlowVerifier | None = None,
+                      adjacency: CSRAdjacency | BitsetAdjacency | None = None,
+                      profiler: Profiler | None = None):
     """
     Check condition 2: Initial clustering and flow network verification
     
     Returns:
         (success, clusters) - success is True if condition satisfied, 
-                             clusters is the resulting clustering
+                             clusters is the resulting clustering (an
+                             empty ClusterResult on failure)
+    """
+    profiler = NULL_PROFILER if profiler is None else profiler
+    index = as_neighbor_index(distance_matrix)
+    success, centers, assignments = solve_condition_2(index, R, r, flow_backend=flow_backend,
+                                                      verifier=verifier, adjacency=adjacency,
+                                                      profiler=profiler)
+    
+    if not success:
+        return False, ClusterResult.empty(as_point_set(points))
+    
+    # Build final clusters
+    with profiler.phase('clusters'):
+        clusters = build_clusters_from_assignments(points, centers, assignments, index)
+    return True, clusters
+
+def solve_condition_2(index: NeighborIndex, R: float, r: int, flow_backend: str = 'matching',
+                      verifier: IncrementalFlowVerifier | None = None,
+                      adjacency: CSRAdjacency | BitsetAdjacency | None = None,
+                      profiler: Profiler | None = None, weights: np.ndarray | None = None):
     """
-    n = len(points)
+    Phase 2.1 and Phase 2.2 for a single R
+
+    A verifier (IncrementalFlowVerifier) reuses the matching of earlier
+    probes instead of running flow_network_verification from scratch
+    (unweighted only). The 2R adjacency is built here unless the caller
+    already has it.
+
+    Returns:
+        (success, centers, assignments) - allocations instead of
+                                          assignments with weights
+    """
+    n = index.n
+    profiler = NULL_PROFILER if profiler is None else profiler
+
+    # 2R neighborhood graph, shared by both phases
+    if adjacency is None:
+        with profiler.phase('adjacency'):
+            adjacency = index.adjacency(2 * R)
     
     # Phase 2.1: Initial clustering construction
-    centers = initial_clustering(distance_matrix, R, r)
+    with profiler.phase('initial_clustering'):
+        centers = initial_clustering(index, R, r, adjacency=adjacency, weights=weights)
     
     if not centers:
-        return False, []
+        profiler.record_probe(R, 'initial_clustering')
+        return False, [], {}
     
     # Phase 2.2: Flow network verification
-    success, assignments = flow_network_verification(n, centers, distance_matrix, R, r)
+    if profiler.enabled and verifier is not None:
+        warm_starts = verifier.warm_starts
+    with profiler.phase('flow'):
+        if verifier is not None and weights is None:
+            success, assignments = verifier.verify(centers, R, adjacency=adjacency, profiler=profiler)
+        else:
+            success, assignments = flow_network_verification(n, centers, index, R, r, flow_backend=flow_backend,
+                                                             adjacency=adjacency, profiler=profiler,
+                                                             weights=weights)
+
+    if profiler.enabled:
+        k = len(centers)
+        edges = int(adjacency.row_degrees(centers).sum())
+        profiler.record_probe(R, 'accepted' if success else 'flow', centers=k,
+                              vertices=n + k + 2, edges=k + n + edges)
+        if verifier is not None and weights is None:
+            profiler.count('flow_warm_starts' if verifier.warm_starts > warm_starts else 'flow_rebuilds')
     
     if not success:
-        return False, []
+        return False, [], {}
     
-    # Build final clusters
-    clusters = build_clusters_from_assignments(points, centers, assignments, distance_matrix)
-    return True, clusters
+    return True, centers, assignments
 
-def initial_clustering(distance_matrix: np.ndarray, R: float, r: int) -> list[int]:
+def initial_clustering(distance_matrix: np.ndarray | NeighborIndex, R: float, r: int,
+                       adjacency: CSRAdjacency | BitsetAdjacency | None = None,
+                       weights: np.ndarray | None = None) -> list[int]:
     """
     Phase 2.1: Initial clustering construction
     
@@ -195,82 +511,73 @@ def initial_clustering(distance_matrix: np.ndarray, R: float, r: int) -> list[in
        form cluster and mark all points within 2R
     4. Repeat until cannot continue
     5. All points must be marked for success
+
+    With weights, p needs a total weight of at least r within 2R, and
+    marking a representative marks all the points it stands for.
+
+    The 2R adjacency is built once (or passed in from the probe), and the
+    neighbor counts never change while marking. A point that cannot be a
+    center now never can, so one ordered pass over the points with enough
+    neighbors picks exactly the centers of the restart-from-the-beginning
+    greedy.
     
     Returns:
         List of center indices, or empty list if failed
     """
-    n = distance_matrix.shape[0]
-    marked = np.zeros(n, dtype=bool)
+    if adjacency is None:
+        adjacency = as_neighbor_index(distance_matrix).adjacency(2 * R)
+    n = adjacency.n
+    marked = adjacency.new_marking()
     centers = []
-    
-    while not np.all(marked):
-        # Find an unmarked point to potentially be a center
-        unmarked_indices = np.where(~marked)[0]
-        
-        # Try to find a point that can be a center
-        found_center = False
-        for p_idx in unmarked_indices:
-            # Check if there are at least r unmarked points within 2R of p
-            # (including p itself)
-            within_2R = distance_matrix[p_idx] <= 2 * R
-            # unmarked_within_2R = within_2R & ~marked
-            
-            if np.sum(within_2R) >= r:
-                # Form a cluster with center at p
-                centers.append(p_idx)
-                # Mark all points within 2R of p (including p)
-                marked[within_2R] = True
-                found_center = True
-                break
-        
-        # If no center can be formed, stop
-        if not found_center:
-            break
-    
+
+    # Cursor over the points that have at least r points within 2R
+    degrees = adjacency.degrees() if weights is None else adjacency.weighted_degrees(weights)
+    for p_idx in np.flatnonzero(degrees >= r):
+        if adjacency.is_marked(marked, p_idx):
+            continue
+        # Form a cluster with center at p
+        centers.append(p_idx)
+        # Mark all points within 2R of p (including p)
+        adjacency.mark_neighbors(marked, p_idx)
+
     # Check if all points are marked
-    if not np.all(marked):
+    if adjacency.count_marked(marked) < n:
         return []
     
     return centers
 
-
-
-def build_clusters_from_assignments(points: list[Point], centers: list[int], 
-                                   assignments: dict, distance_matrix: np.ndarray):
+def build_clusters_from_assignments(points: list[Point] | PointSet, centers: list[int],
+                                   assignments: dict, distance_matrix: np.ndarray | NeighborIndex) -> ClusterResult:
     """
     Build final clusters from assignments
-    """
-    clusters = []
-    
-    # Group points by center
-    center_to_points = {}
-    for point_idx, center_idx in assignments.items():
-        if center_idx not in center_to_points:
-            center_to_points[center_idx] = []
-        center_to_points[center_idx].append(points[point_idx])
-    
-    # Create clusters
-    cluster_id = 0
-    for center_idx, member_points in center_to_points.items():
-        # Calculate actual radius for this cluster (max distance from center to any member)
-        max_dist = 0
-        for member in member_points:
-            dist = distance_matrix[member.id][center_idx]
-            max_dist = max(max_dist, dist)
-        
-        cluster = Cluster(
-            id=cluster_id,
-            coordinate=points[center_idx].coordinate,
-            members=member_points,
-            radius=max_dist
-        )
-        clusters.append(cluster)
-        cluster_id += 1
-    
-    return clusters
 
+    Grouping is vectorized: each point gets the label of its center, and the
+    cluster radii are one np.maximum.at over the point-to-center distances.
+    Clusters are numbered in order of first appearance in assignments.
+
+    Returns:
+        ClusterResult - labels, center and radius arrays; Cluster objects
+                        are materialized lazily
+    """
+    points = as_point_set(points)
+    index = as_neighbor_index(distance_matrix)
 
+    point_idx = np.fromiter(assignments.keys(), dtype=np.intp, count=len(assignments))
+    center_idx = np.fromiter(assignments.values(), dtype=np.intp, count=len(assignments))
+    if len(point_idx) == 0:
+        return ClusterResult.empty(points)
 
+    # Number clusters by first appearance of their center
+    cluster_centers, first, inverse = np.unique(center_idx, return_index=True, return_inverse=True)
+    order = np.argsort(first, kind='stable')
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
 
+    labels = np.full(points.n, -1, dtype=np.intp)
+    labels[point_idx] = rank[inverse]
 
+    # Radius: max distance from center to any member
+    radii = np.zeros(len(order), dtype=np.float64)
+    np.maximum.at(radii, labels[point_idx], index.distances_between(center_idx, point_idx))
 
+    return ClusterResult(points, labels, cluster_centers[order], radii)
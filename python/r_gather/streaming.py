@@ -0,0 +1,296 @@
+# streaming.py
+import time
+from dataclasses import dataclass
+import numpy as np
+from .candidates import select_smallest_feasible
+from .data_structures import ClusterResult, PointSet
+from .grid import GRID_PAIR_BATCH
+from .neighbor_index import DenseNeighborIndex, pairwise_distances
+from .profiling import NULL_PROFILER, Profiler
+from .r_gather import _timed, binary_search, check_radius, make_candidates, make_flow_verifier
+
+class SlidingWindow:
+    """
+    The points of a time window and their distance matrix, kept up to date
+    as points arrive and expire
+
+    Arriving points get distances to the live points only (exact
+    differences, O(new · live · d)); expiring points are swap-removed (the
+    last slots move into the holes, O(expired · live)). The live points
+    always occupy the leading slots, so index() is a DenseNeighborIndex
+    over a view of the matrix and nothing is ever recomputed from scratch.
+    Capacity doubles when full.
+
+    Attributes:
+        n: Number of live points
+        coordinates, ids, timestamps: Views of the live points
+    """
+
+    def __init__(self, dimension: int, capacity: int = 1024):
+        self.n = 0
+        self._coords = np.empty((capacity, dimension), dtype=np.float64)
+        self._ids = np.empty(capacity, dtype=np.int64)
+        self._timestamps = np.empty(capacity, dtype=np.float64)
+        self._matrix = np.empty((capacity, capacity), dtype=np.float64)
+
+    @property
+    def coordinates(self) -> np.ndarray:
+        return self._coords[:self.n]
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self._ids[:self.n]
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self._timestamps[:self.n]
+
+    def __len__(self) -> int:
+        return self.n
+
+    def add(self, timestamps, ids, coords: np.ndarray):
+        """
+        Append points and their distances to every live point
+        """
+        coords = np.asarray(coords, dtype=np.float64).reshape(len(ids), -1)
+        m = len(coords)
+        if m == 0:
+            return
+        self._reserve(self.n + m)
+        start, stop = self.n, self.n + m
+        self._coords[start:stop] = coords
+        self._ids[start:stop] = ids
+        self._timestamps[start:stop] = timestamps
+
+        # Rows of the new points against all live points (new ones included),
+        # mirrored into the columns
+        step = max(1, GRID_PAIR_BATCH // max(stop * coords.shape[1], 1))
+        live = self._coords[:stop]
+        for first in range(start, stop, step):
+            last = min(first + step, stop)
+            block = pairwise_distances(live[first:last, np.newaxis, :], live[np.newaxis, :, :])
+            self._matrix[first:last, :stop] = block
+            self._matrix[:stop, first:last] = block.T
+        self.n = stop
+
+    def expire(self, before: float) -> int:
+        """
+        Remove the points with timestamp < before
+
+        Returns:
+            The number of points removed
+        """
+        expired = self.timestamps < before
+        count = int(np.count_nonzero(expired))
+        if count == 0:
+            return 0
+        m = self.n - count
+        # Live points in the tail fill the holes in the head
+        holes = np.flatnonzero(expired[:m])
+        movers = m + np.flatnonzero(~expired[m:])
+        if len(holes):
+            n = self.n
+            self._matrix[holes, :n] = self._matrix[movers, :n]
+            self._matrix[:n, holes] = self._matrix[:n, movers]
+            self._coords[holes] = self._coords[movers]
+            self._ids[holes] = self._ids[movers]
+            self._timestamps[holes] = self._timestamps[movers]
+        self.n = m
+        return count
+
+    def index(self) -> DenseNeighborIndex:
+        """
+        Neighbor index over the live points (views, valid until the next update)
+        """
+        return DenseNeighborIndex(self._matrix[:self.n, :self.n], coords=self.coordinates)
+
+    def point_set(self) -> PointSet:
+        """
+        Copy of the live points
+        """
+        return PointSet(self.coordinates.copy(), self.ids.copy())
+
+    def _reserve(self, size: int):
+        capacity = len(self._ids)
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        n = self.n
+        matrix = np.empty((capacity, capacity), dtype=np.float64)
+        matrix[:n, :n] = self._matrix[:n, :n]
+        self._matrix = matrix
+        for name in ('_coords', '_ids', '_timestamps'):
+            old = getattr(self, name)
+            new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:n] = old[:n]
+            setattr(self, name, new)
+
+@dataclass
+class WindowResult:
+    """
+    The clustering of one time window [start, end)
+
+    Attributes:
+        start, end: Window bounds
+        R: Radius parameter (None if the window has fewer than r points)
+        clusters: ClusterResult over the window's points
+        latency: Seconds from the window closing to its result
+        throughput: Records consumed per second since the stream started
+        records: Records consumed so far
+    """
+    start: float
+    end: float
+    R: float | None
+    clusters: ClusterResult
+    latency: float
+    throughput: float
+    records: int
+
+def stream_r_gather(records, r: int, window: float, step: float | None = None,
+                    flow_backend: str = 'matching', epsilon: float | None = None,
+                    batch_size: int = 1024, profiler: Profiler | None = None):
+    """
+    r-gather over time windows of a stream of (timestamp, id, coordinate) records
+
+    Window k covers [t0 + k·step, t0 + k·step + window), t0 being the first
+    timestamp: step == window (the default) gives tumbling windows, a
+    smaller step sliding windows. Records must arrive in timestamp order;
+    those falling between windows (step > window) are dropped.
+
+    A SlidingWindow keeps the distance matrix of the current window, so a
+    record's distances are computed once however many windows it belongs
+    to. The radius search of each window starts from the previous window's
+    R (see seeded_search), which consecutive windows mostly share. Every
+    window that holds points is emitted, including those after the last
+    record; windows without points are skipped.
+
+    Args:
+        records: Iterable of (timestamp, id, coordinate) records
+        r: Minimum cluster size
+        window: Window length (in timestamp units)
+        step: Distance between window starts (default: window)
+        batch_size: Records buffered before their distances are computed
+        profiler: Also records the 'window' phase (matrix updates) and
+                  the 'stream_records' and 'stream_windows' counters
+
+    Yields:
+        WindowResult per window, as soon as the window closes
+    """
+    profiler = NULL_PROFILER if profiler is None else profiler
+    step = window if step is None else step
+    if window <= 0 or step <= 0:
+        raise ValueError("window and step must be positive")
+
+    live = None
+    pending = []
+    start = last_timestamp = None
+    previous_R = None
+    consumed = 0
+    began = time.perf_counter()
+
+    def flush():
+        if pending:
+            with profiler.phase('window'):
+                timestamps, ids, coords = zip(*pending)
+                live.add(np.array(timestamps), np.array(ids), np.array(coords))
+            pending.clear()
+
+    def close(start):
+        nonlocal previous_R
+        closed = time.perf_counter()
+        flush()
+        points = live.point_set()
+        if live.n < r:
+            R, clusters = None, ClusterResult.empty(points)
+        else:
+            R, clusters = seeded_search(points, live.index(), r, previous_R,
+                                        flow_backend=flow_backend, epsilon=epsilon, profiler=profiler)
+        if R is not None:
+            previous_R = R
+        profiler.count('stream_windows')
+        now = time.perf_counter()
+        return WindowResult(start, start + window, R, clusters, now - closed,
+                            consumed / (now - began), consumed)
+
+    for timestamp, id, coordinate in records:
+        if last_timestamp is not None and timestamp < last_timestamp:
+            raise ValueError(f"Records must arrive in timestamp order ({timestamp} after {last_timestamp})")
+        last_timestamp = timestamp
+        consumed += 1
+        profiler.count('stream_records')
+        if live is None:
+            live = SlidingWindow(np.size(coordinate))
+            start = timestamp
+
+        while timestamp >= start + window:
+            if live.n or pending:
+                yield close(start)
+                start += step
+            else:
+                # Nothing left: jump to the first window that ends after this record
+                start += step * max(1, int((timestamp - start - window) // step) + 1)
+            with profiler.phase('window'):
+                live.expire(start)
+        if timestamp < start:
+            continue
+
+        pending.append((timestamp, id, coordinate))
+        if len(pending) >= batch_size:
+            flush()
+
+    # The remaining windows that still hold points
+    while live is not None and (live.n or pending):
+        yield close(start)
+        start += step
+        with profiler.phase('window'):
+            live.expire(start)
+
+def seeded_search(points: PointSet, index: DenseNeighborIndex, r: int, seed: float | None,
+                  flow_backend: str = 'matching', epsilon: float | None = None,
+                  profiler: Profiler | None = None):
+    """
+    Binary search for the smallest feasible R, starting from a guess
+
+    The 2R neighborhood graph only changes at candidate radii, so if the
+    seed is feasible so is the largest candidate at or below it, and the
+    search is confined to the candidates up to the seed; otherwise to
+    those above it. One probe at the seed thus discards the half of the
+    band on the wrong side of it; for a good seed (the R of the previous
+    window) the rest of the search is short. Like binary_search it assumes
+    feasibility is monotone in R, which the greedy Phase 2.1 only makes
+    approximately true, so the two may return different feasible R.
+
+    Returns:
+        (R, clusters), or (None, empty ClusterResult) if no valid clustering exists
+    """
+    profiler = NULL_PROFILER if profiler is None else profiler
+    with profiler.phase('candidates'):
+        candidates = make_candidates(index, r, epsilon)
+    if seed is None or seed < candidates.lower_bound:
+        return binary_search(points, index, candidates, r, flow_backend=flow_backend, profiler=profiler)
+
+    verifier = make_flow_verifier(index, r, flow_backend)
+
+    def probe(R):
+        return check_radius(points, index, R, r, threshold=candidates.threshold,
+                            flow_backend=flow_backend, verifier=verifier, profiler=profiler)
+
+    success, seed_clusters = probe(seed)
+    if not success:
+        candidates = make_candidates(index, r, epsilon, threshold=candidates.threshold, min_radius=seed)
+        return binary_search(points, index, candidates, r, flow_backend=flow_backend, profiler=profiler)
+
+    for candidate_radii, is_last in _timed(candidates.windows(), profiler, 'candidates'):
+        below = candidate_radii[candidate_radii <= seed]
+        if len(below) == 0:
+            break
+        if not is_last and len(below) == len(candidate_radii):
+            success, _ = probe(candidate_radii.max())
+            if not success:
+                continue
+        R, clusters = select_smallest_feasible(below, probe)
+        if R is not None:
+            return R, clusters
+    # Only for an approximate grid that does not reach the seed
+    return seed, seed_clusters
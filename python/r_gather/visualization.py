@@ -1,9 +1,9 @@
 # visualization.py
 import matplotlib.pyplot as plt
 import numpy as np
-from r_gather.data_structures import Point, Cluster
+from r_gather.data_structures import Point, Cluster, ClusterResult
 
-def visualize_clustering(points: list[Point], clusters: list[Cluster], 
+def visualize_clustering(points: list[Point], clusters: list[Cluster] | ClusterResult, 
                          r: int, title: str = "r-Gather Clustering Result"):
     """
     Visualize the r-Gather clustering result
@@ -33,7 +33,7 @@ def visualize_clustering(points: list[Point], clusters: list[Cluster],
         color = colors[idx]
         
         # Plot cluster members
-        member_coords = np.array([m.coordinate for m in cluster.members])
+        member_coords = cluster.member_coordinates
         ax.scatter(member_coords[:, 0], member_coords[:, 1], 
                   c=[color], s=100, alpha=0.6, 
                   label=f'Cluster {cluster.id} (n={cluster.size()})')
@@ -69,7 +69,7 @@ def visualize_clustering(points: list[Point], clusters: list[Cluster],
     return fig, ax
 
 
-def visualize_clustering_with_stats(points: list[Point], clusters: list[Cluster], 
+def visualize_clustering_with_stats(points: list[Point], clusters: list[Cluster] | ClusterResult, 
                                    r: int, title: str = "r-Gather Clustering Result"):
     """
     Visualize the r-Gather clustering result with detailed statistics
@@ -100,7 +100,7 @@ def visualize_clustering_with_stats(points: list[Point], clusters: list[Cluster]
         color = colors[idx]
         
         # Plot cluster members
-        member_coords = np.array([m.coordinate for m in cluster.members])
+        member_coords = cluster.member_coordinates
         ax1.scatter(member_coords[:, 0], member_coords[:, 1], 
                    c=[color], s=100, alpha=0.6, 
                    label=f'Cluster {cluster.id} (n={cluster.size()})')
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from r_gather.data_structures import Point
+from r_gather.distance_matrix import compute_distance_matrix
+from r_gather.adjacency import BitsetAdjacency, CSRAdjacency
+from r_gather.neighbor_index import DenseNeighborIndex, build_neighbor_index
+
+def random_distance_matrix(n, seed=0):
+    rng = np.random.default_rng(seed)
+    points = [Point(id=i, coordinate=c) for i, c in enumerate(rng.uniform(0, 10, size=(n, 2)))]
+    return compute_distance_matrix(points)
+
+def test_bitset_matches_boolean_matrix():
+    dist_matrix = random_distance_matrix(77)
+    threshold = 2.5
+    within = dist_matrix <= threshold
+    bitset = BitsetAdjacency.from_distance_matrix(dist_matrix, threshold, tile_size=10)
+    assert bitset.bits.shape == (77, 10), "Rows should be packed to ceil(n/8) bytes."
+    assert np.array_equal(bitset.degrees(), within.sum(axis=1)), "Popcount degrees are incorrect."
+    for i in (0, 5, 76):
+        assert np.array_equal(bitset.neighbors(i), np.flatnonzero(within[i])), "Unpacked neighbors are incorrect."
+
+def test_bitset_and_csr_rows_agree():
+    dist_matrix = random_distance_matrix(60, seed=1)
+    threshold = 3.0
+    bitset = BitsetAdjacency.from_distance_matrix(dist_matrix, threshold, tile_size=7)
+    csr = CSRAdjacency.from_rows([np.flatnonzero(row <= threshold) for row in dist_matrix], 60)
+    rows = [4, 0, 59, 4]
+    for got, expected in zip(bitset.subgraph_rows(rows), csr.subgraph_rows(rows)):
+        assert np.array_equal(got, expected), "Bitset and CSR flow rows differ."
+
+def test_bitset_marking():
+    dist_matrix = random_distance_matrix(30, seed=2)
+    bitset = BitsetAdjacency.from_distance_matrix(dist_matrix, 4.0)
+    marking = bitset.new_marking()
+    expected = np.zeros(30, dtype=bool)
+    for i in (3, 17):
+        bitset.mark_neighbors(marking, i)
+        expected[dist_matrix[i] <= 4.0] = True
+    assert [bitset.is_marked(marking, i) for i in range(30)] == expected.tolist(), "Bitwise marking is incorrect."
+    assert bitset.count_marked(marking) == expected.sum(), "Marked count is incorrect."
+
+def test_kdtree_adjacency_matches_dense():
+    pytest.importorskip('scipy')
+    rng = np.random.default_rng(3)
+    points = [Point(id=i, coordinate=c) for i, c in enumerate(rng.uniform(0, 10, size=(50, 2)))]
+    dense = build_neighbor_index(points, 'dense').adjacency(2.0)
+    tree = build_neighbor_index(points, 'kdtree').adjacency(2.0)
+    assert np.array_equal(dense.degrees(), tree.degrees()), "Degrees differ between backends."
+    for i in range(50):
+        assert np.array_equal(dense.neighbors(i), tree.neighbors(i)), "Neighbors differ between backends."
+
+if __name__ == '__main__':
+    test_bitset_matches_boolean_matrix()
+    test_bitset_and_csr_rows_agree()
+    test_bitset_marking()
+    test_kdtree_adjacency_matches_dense()
+    print("All adjacency tests passed.")
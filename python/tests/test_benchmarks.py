@@ -0,0 +1,34 @@
+import numpy as np
+from benchmarks.generators import GENERATORS
+from benchmarks.run import choose_backend, compare, run_suite
+
+def test_generators():
+    for name, generate in GENERATORS.items():
+        points = generate(50, 3, seed=1)
+        assert points.shape == (50, 3), f"{name} should produce (n, d) points."
+        assert np.array_equal(points, generate(50, 3, seed=1)), f"{name} should be deterministic for a seed."
+
+def test_choose_backend():
+    assert choose_backend(1000, 64, 10 ** 9) == 'dense', "Small matrices should stay dense."
+    assert choose_backend(10 ** 6, 64, 10 ** 9) is None, "Huge high-dimensional cases should be skipped."
+
+def test_run_suite_and_compare():
+    results = run_suite(['uniform', 'chain'], [30, 60], [2], [3], ['linear', 'binary'])
+    assert len(results) == 8, "Every case of the grid should run."
+    for case in results:
+        assert case['R'] is not None and case['probes'] >= 1, "Each case should find a clustering."
+        assert 'flow' in case['phases'], "Phase times should be recorded."
+
+    linear = {(c['dataset'], c['n']): c['R'] for c in results if c['driver'] == 'linear'}
+    binary = {(c['dataset'], c['n']): c['R'] for c in results if c['driver'] == 'binary'}
+    assert linear.keys() == binary.keys(), "Both drivers should cover the same cases."
+
+    slower = [dict(case, seconds=case['seconds'] * 3 + 1) for case in results]
+    assert len(compare(slower, results)) == len(results), "Slower runs should be reported as regressions."
+    assert compare(results, results) == [], "Identical runs should not regress."
+
+if __name__ == '__main__':
+    test_generators()
+    test_choose_backend()
+    test_run_suite_and_compare()
+    print("All benchmark suite tests passed.")
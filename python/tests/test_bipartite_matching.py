@@ -0,0 +1,94 @@
+import numpy as np
+import networkx as nx
+from r_gather.data_structures import Point
+from r_gather.distance_matrix import compute_distance_matrix
+from r_gather.bipartite_matching import max_b_matching
+from r_gather.flow_network import IncrementalFlowVerifier, flow_network_verification
+from r_gather.r_gather import initial_clustering
+
+def reference_flow_value(indptr, indices, n_points, capacity):
+    G = nx.DiGraph()
+    for k in range(len(indptr) - 1):
+        G.add_edge('source', ('c', k), capacity=capacity)
+        for v in indices[indptr[k]:indptr[k + 1]]:
+            G.add_edge(('c', k), ('p', v), capacity=1)
+    for v in range(n_points):
+        G.add_edge(('p', v), 'sink', capacity=1)
+    return nx.maximum_flow_value(G, 'source', 'sink')
+
+def random_bipartite(rng, n_centers, n_points, density):
+    rows = [np.flatnonzero(rng.random(n_points) < density) for _ in range(n_centers)]
+    indptr = np.concatenate([[0], np.cumsum([len(row) for row in rows])])
+    indices = np.concatenate(rows) if rows else np.empty(0, dtype=int)
+    return indptr, indices
+
+def test_b_matching_size_matches_networkx():
+    rng = np.random.default_rng(0)
+    for _ in range(40):
+        n_centers = int(rng.integers(1, 12))
+        n_points = int(rng.integers(1, 40))
+        capacity = int(rng.integers(1, 5))
+        indptr, indices = random_bipartite(rng, n_centers, n_points, rng.uniform(0.05, 0.5))
+        match_point, load = max_b_matching(indptr, indices, n_points, capacity)
+        assert load.sum() == reference_flow_value(indptr, indices, n_points, capacity), "Matching size should equal the max flow value."
+        assert np.all(load <= capacity), "Centers should not exceed capacity."
+        for v in np.flatnonzero(match_point >= 0):
+            k = match_point[v]
+            assert v in indices[indptr[k]:indptr[k + 1]], "Points should only be matched along edges."
+
+def test_b_matching_initial_matching():
+    indptr = np.array([0, 2, 3])
+    indices = np.array([0, 1, 1])
+    # Center 0 starts with point 1, so center 1 is only matched through an augmenting path
+    match_point, load = max_b_matching(indptr, indices, 2, 1, match_point=np.array([-1, 0]))
+    assert np.array_equal(match_point, [0, 1]), "Augmentation should move center 0 to point 0."
+    assert np.array_equal(load, [1, 1]), "Both centers should be matched."
+
+def test_flow_backends_agree():
+    rng = np.random.default_rng(1)
+    for _ in range(20):
+        points = [Point(id=i, coordinate=c) for i, c in enumerate(rng.uniform(0, 10, size=(30, 2)))]
+        dist_matrix = compute_distance_matrix(points)
+        r = int(rng.integers(2, 5))
+        R = float(rng.uniform(0.5, 2.5))
+        centers = initial_clustering(dist_matrix, R, r)
+        if not centers:
+            continue
+        success_nx, _ = flow_network_verification(len(points), centers, dist_matrix, R, r, flow_backend='networkx')
+        success, assignments = flow_network_verification(len(points), centers, dist_matrix, R, r, flow_backend='matching')
+        assert success == success_nx, "Backends should agree on feasibility."
+        if success:
+            assert len(assignments) == len(points), "All points should be assigned."
+            for point_idx, center_idx in assignments.items():
+                assert dist_matrix[point_idx][center_idx] <= 2 * R, "Points must be within 2R of their center."
+            counts = np.bincount(list(assignments.values()), minlength=len(points))
+            assert np.all(counts[centers] >= r), "Each center needs at least r points."
+
+def test_incremental_verifier_warm_start():
+    rng = np.random.default_rng(2)
+    points = [Point(id=i, coordinate=c) for i, c in enumerate(rng.uniform(0, 10, size=(40, 2)))]
+    dist_matrix = compute_distance_matrix(points)
+    r = 3
+    centers = initial_clustering(dist_matrix, 2.0, r)
+    verifier = IncrementalFlowVerifier(len(points), dist_matrix, r)
+
+    # Same centers over a sweep of R (up and down) reuse the previous matching
+    for R in (1.0, 1.5, 2.0, 3.0, 1.2, 2.5):
+        expected, _ = flow_network_verification(len(points), centers, dist_matrix, R, r)
+        success, assignments = verifier.verify(centers, R)
+        assert success == expected, "Warm-started verification should match a fresh run."
+        if success:
+            for point_idx, center_idx in assignments.items():
+                assert dist_matrix[point_idx][center_idx] <= 2 * R, "Points must be within 2R of their center."
+    assert verifier.rebuilds == 1 and verifier.warm_starts == 5, "Only the first probe should rebuild."
+
+    # A different center set forces a rebuild
+    verifier.verify(centers[:-1], 3.0)
+    assert verifier.rebuilds == 2, "Changed centers should rebuild."
+
+if __name__ == '__main__':
+    test_b_matching_size_matches_networkx()
+    test_b_matching_initial_matching()
+    test_flow_backends_agree()
+    test_incremental_verifier_warm_start()
+    print("All bipartite matching tests passed.")
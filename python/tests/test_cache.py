@@ -0,0 +1,60 @@
+import os
+import numpy as np
+from r_gather.data_structures import Point
+from r_gather.distance_matrix import compute_distance_matrix
+from r_gather.cache import DistanceCache, dataset_fingerprint
+from r_gather.r_gather import compute_r_gather, compute_r_gather_binary_search
+
+def random_points(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [Point(id=i, coordinate=c) for i, c in enumerate(rng.uniform(0, 100, size=(n, 2)))]
+
+def test_fingerprint():
+    coords = np.arange(12.0).reshape(6, 2)
+    assert dataset_fingerprint(coords) == dataset_fingerprint(coords.copy()), "Equal data should share a key."
+    assert dataset_fingerprint(coords) != dataset_fingerprint(coords.reshape(4, 3)), "Shape should be part of the key."
+    assert dataset_fingerprint(coords) != dataset_fingerprint(coords, np.float32), "Dtype should be part of the key."
+
+def test_cache_reopens_memmap(tmp_path):
+    points = random_points(50)
+    coords = np.array([p.coordinate for p in points])
+    cache = DistanceCache(str(tmp_path))
+    first = cache.distance_matrix(coords)
+    assert isinstance(first, np.memmap), "Cached matrices should be memmaps."
+    assert np.allclose(first, compute_distance_matrix(points)), "Cached matrix is incorrect."
+    mtime = os.path.getmtime(first.filename)
+    second = cache.distance_matrix(coords)
+    assert second.filename == first.filename, "A second call should reopen the same file."
+    assert os.path.getmtime(first.filename) >= mtime, "Reopening should not rewrite the file."
+
+    radii = cache.candidate_radii(coords, second)
+    assert np.array_equal(radii, np.unique(second / 2)[1:]), "Cached radii should be the sorted unique positive half-distances."
+
+def test_cache_lru_eviction(tmp_path):
+    cache = DistanceCache(str(tmp_path), max_bytes=0)
+    for seed in range(3):
+        coords = np.array([p.coordinate for p in random_points(40, seed)])
+        os.utime(cache.distance_matrix(coords).filename, (seed, seed))
+    remaining = os.listdir(tmp_path)
+    assert len(remaining) == 1, "Only the newest entry should survive a zero budget."
+    assert remaining[0].startswith(dataset_fingerprint(coords)), "The most recent entry should be kept."
+
+def test_r_gather_with_cache(tmp_path):
+    points = random_points(60, seed=4)
+    cache = DistanceCache(str(tmp_path))
+    for search in (compute_r_gather, compute_r_gather_binary_search):
+        for r in (2, 3):
+            expected = sorted(tuple(c.coordinate) for c in search(points, r))
+            for _ in range(2):
+                clusters = search(points, r, cache=cache)
+                assert sorted(tuple(c.coordinate) for c in clusters) == expected, "Cached search should give the same clustering."
+    assert len(os.listdir(tmp_path)) == 2, "One matrix and one radii file should be shared by all calls."
+
+if __name__ == '__main__':
+    import pathlib
+    import tempfile
+    test_fingerprint()
+    for test in (test_cache_reopens_memmap, test_cache_lru_eviction, test_r_gather_with_cache):
+        with tempfile.TemporaryDirectory() as directory:
+            test(pathlib.Path(directory))
+    print("All cache tests passed.")
@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+from r_gather.data_structures import Point
+from r_gather.distance_matrix import compute_distance_matrix
+from r_gather.neighbor_index import DenseNeighborIndex, build_neighbor_index
+from r_gather.candidates import CandidateRadii, GeometricRadii, condition_1_lower_bound, condition_1_threshold, condition_1_thresholds, iter_ascending, select_smallest_feasible, select_smallest_feasible_kary
+
+def random_points(n, d=2, seed=0):
+    rng = np.random.default_rng(seed)
+    return [Point(id=i, coordinate=c) for i, c in enumerate(rng.uniform(0, 100, size=(n, d)))]
+
+def test_condition_1_lower_bound():
+    points = [
+        Point(id=0, coordinate=np.array([0.0, 0.0])),
+        Point(id=1, coordinate=np.array([1.0, 0.0])),
+        Point(id=2, coordinate=np.array([5.0, 0.0])),
+        Point(id=3, coordinate=np.array([7.0, 0.0])),
+    ]
+    index = DenseNeighborIndex(compute_distance_matrix(points))
+    assert condition_1_lower_bound(index, 1) == 0.0, "r=1 imposes no lower bound."
+    assert condition_1_lower_bound(index, 2) == 1.0, "Point 2 and 3 are 2 apart, so R >= 1."
+    assert condition_1_lower_bound(index, 3) == 3.0, "Point 3 needs two other points within 2R, so R >= 3."
+    assert condition_1_lower_bound(index, 5) == np.inf, "r > n is infeasible."
+
+def test_iter_ascending_matches_unique():
+    values = np.random.default_rng(0).integers(0, 500, size=5000).astype(float)
+    assert np.array_equal(list(iter_ascending(values, chunk_size=7)), np.unique(values)), "Lazy enumeration should equal np.unique."
+
+def test_select_smallest_feasible():
+    values = np.random.default_rng(1).permutation(np.repeat(np.arange(100.0), 3))
+    R, result = select_smallest_feasible(values, lambda R: (R >= 42, [R]))
+    assert R == 42 and result == [42], "Selection search should find the smallest feasible value."
+    R, result = select_smallest_feasible(values, lambda R: (False, [R]))
+    assert R is None and result is None, "Selection search should report infeasibility."
+
+def test_select_smallest_feasible_kary():
+    values = np.random.default_rng(2).permutation(np.repeat(np.arange(500.0), 2))
+    for k in (1, 2, 3, 8):
+        rounds = []
+        def probe_many(radii):
+            rounds.append(len(radii))
+            return [(R >= 137, [R]) for R in radii]
+        R, result = select_smallest_feasible_kary(values, probe_many, k)
+        assert R == 137 and result == [137], "k-ary search should find the smallest feasible value."
+        assert max(rounds) <= k, "Each round should probe at most k radii."
+    R, _ = select_smallest_feasible_kary(values, lambda radii: [(False, None)] * len(radii), 4)
+    assert R is None, "k-ary search should report infeasibility."
+
+def test_candidate_radii_band():
+    points = random_points(80)
+    distance_matrix = compute_distance_matrix(points)
+    index = DenseNeighborIndex(distance_matrix)
+    candidates = CandidateRadii(index, 4)
+    expected = np.unique(distance_matrix / 2)
+    expected = expected[(expected >= candidates.lower_bound) & (expected > 0)]
+    assert np.array_equal(list(candidates), expected), "Candidates should be the unique half-distances in the feasible band."
+
+def test_candidate_radii_kdtree_windows():
+    pytest.importorskip('scipy')
+    points = random_points(150, seed=2)
+    dense = list(CandidateRadii(build_neighbor_index(points, 'dense'), 3))
+    tree = CandidateRadii(build_neighbor_index(points, 'kdtree'), 3)
+    assert len(list(tree.windows())) > 1, "The tree backend should enumerate several windows."
+    assert np.allclose(list(tree), dense, rtol=0, atol=1e-9), "Windowed enumeration should cover the same candidates."
+
+def test_condition_1_thresholds_shared_table():
+    index = DenseNeighborIndex(compute_distance_matrix(random_points(60, seed=3)))
+    r_values = [1, 2, 5, 17, 60, 61]
+    thresholds = condition_1_thresholds(index, r_values)
+    for r in r_values:
+        assert thresholds[r] == condition_1_threshold(index, r), "Shared table should match the per-r threshold."
+
+def test_candidate_radii_min_radius():
+    index = DenseNeighborIndex(compute_distance_matrix(random_points(80)))
+    full = np.array(list(CandidateRadii(index, 3)))
+    min_radius = full[len(full) // 3]
+    raised = CandidateRadii(index, 3, min_radius=min_radius)
+    assert raised.lower_bound == min_radius, "min_radius should raise the band."
+    assert np.array_equal(list(raised), full[full >= min_radius]), "The raised band should be a suffix of the full band."
+
+def test_geometric_radii_grid():
+    index = DenseNeighborIndex(compute_distance_matrix(random_points(80)))
+    grid = GeometricRadii(index, 3, 0.1)
+    radii = np.array(list(grid))
+    assert radii[0] == condition_1_lower_bound(index, 3), "The grid should start at the Condition 1 bound."
+    assert radii[-1] == index.max_threshold() / 2, "The grid should end where one cluster holds every point."
+    assert np.all(radii[1:] / radii[:-1] <= 1.1 + 1e-12), "Consecutive radii should differ by at most 1 + epsilon."
+    assert len(radii) < 100, "The grid should be logarithmic in the radius range."
+    assert GeometricRadii(index, 1, 0.1).lower_bound == 0.0 and list(GeometricRadii(index, 1, 0.1))[0] > 0, "r=1 should start at a positive radius."
+    with pytest.raises(ValueError):
+        GeometricRadii(index, 3, 0.0)
+
+def test_geometric_radii_duplicates():
+    # Every point has a duplicate: the Condition 1 threshold for r = 2 is 0
+    coords = np.array([0, 0, 1.5, 1.5, 2, 2, 4, 4.])[:, None]
+    for backend in ('dense', 'kdtree', 'condensed', 'tiled'):
+        index = build_neighbor_index(coords, backend)
+        grid = GeometricRadii(index, 2, 0.1)
+        assert grid.lower_bound == 0.0 and list(grid)[0] == 0.25, f"The grid should start at the smallest positive candidate ({backend})."
+    coincident = build_neighbor_index(np.zeros((4, 1)))
+    assert len(list(GeometricRadii(coincident, 2, 0.1))) == 0, "Coinciding points have no positive candidate."
+
+if __name__ == '__main__':
+    test_condition_1_lower_bound()
+    test_iter_ascending_matches_unique()
+    test_select_smallest_feasible()
+    test_select_smallest_feasible_kary()
+    test_candidate_radii_band()
+    test_candidate_radii_kdtree_windows()
+    test_condition_1_thresholds_shared_table()
+    test_candidate_radii_min_radius()
+    test_geometric_radii_grid()
+    test_geometric_radii_duplicates()
+    print("All candidate radii tests passed.")
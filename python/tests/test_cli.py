@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+from r_gather.cli import main, parse_bytes
+from r_gather.r_gather import compute_r_gather_binary_search
+
+def write_points(tmp_path, n=60, seed=0):
+    coords = np.random.default_rng(seed).uniform(0, 100, size=(n, 2))
+    path = tmp_path / 'points.npy'
+    np.save(path, coords)
+    return coords, str(path)
+
+def test_cli_npy_output(tmp_path, capsys):
+    coords, path = write_points(tmp_path)
+    prefix = str(tmp_path / 'out' / 'result')
+    assert main([path, '-r', '3', '-o', prefix]) == 0, "A feasible run should exit with 0."
+
+    expected = compute_r_gather_binary_search(coords, 3)
+    assert np.array_equal(np.load(prefix + '.labels.npy'), expected.labels), "Labels should be written."
+    assert np.array_equal(np.load(prefix + '.centers.npy'), expected.centers), "Centers should be written."
+    assert np.array_equal(np.load(prefix + '.radii.npy'), expected.radii), "Radii should be written."
+
+    report = capsys.readouterr().err
+    for phase in ('distance_matrix', 'candidates', 'initial_clustering', 'flow', 'peak RSS'):
+        assert phase in report, f"The report should include {phase}."
+
+def test_cli_csv_output(tmp_path, capsys):
+    coords, path = write_points(tmp_path, seed=1)
+    prefix = str(tmp_path / 'result')
+    assert main([path, '-r', '4', '--search', 'linear', '--output-format', 'csv', '-o', prefix, '-q']) == 0
+    assert capsys.readouterr().err == '', "--quiet should suppress the report."
+
+    labels = np.loadtxt(prefix + '.labels.csv', delimiter=',', skiprows=1, dtype=int)
+    table = np.loadtxt(prefix + '.clusters.csv', delimiter=',', skiprows=1, ndmin=2)
+    assert labels.shape == (60, 2) and np.array_equal(labels[:, 0], np.arange(60)), "Labels should be listed per point id."
+    assert np.array_equal(np.bincount(labels[:, 1]), table[:, 3]), "Cluster sizes should match the labels."
+    assert np.all(table[:, 3] >= 4), "Every cluster should have at least r points."
+
+def test_cli_infeasible(tmp_path):
+    _, path = write_points(tmp_path, n=5)
+    assert main([path, '-r', '6', '-q']) == 1, "An infeasible r should exit with 1."
+
+def test_cli_epsilon(tmp_path):
+    _, path = write_points(tmp_path, seed=2)
+    prefix = str(tmp_path / 'approx')
+    assert main([path, '-r', '3', '--epsilon', '0.1', '-o', prefix, '-q']) == 0, "An approximate run should succeed."
+    assert np.all(np.bincount(np.load(prefix + '.labels.npy')) >= 3), "Every cluster should have at least r points."
+
+def test_cli_tiled_backend(tmp_path):
+    _, path = write_points(tmp_path, seed=4)
+    prefix = str(tmp_path / 'tiled')
+    assert main([path, '-r', '3', '--backend', 'tiled', '--memory-budget', '64K', '-o', prefix, '-q']) == 0, "A tiled run should succeed."
+    assert np.all(np.bincount(np.load(prefix + '.labels.npy')) >= 3), "Every cluster should have at least r points."
+    assert parse_bytes('512M') == 512 * 1024 ** 2 and parse_bytes('2gb') == 2 * 1024 ** 3, "Byte suffixes should be powers of 1024."
+
+def test_cli_coreset(tmp_path, capsys):
+    coords = np.repeat(np.random.default_rng(3).uniform(0, 100, size=(10, 2)), 4, axis=0)
+    path = str(tmp_path / 'duplicates.npy')
+    np.save(path, coords)
+    prefix = str(tmp_path / 'coreset')
+    assert main([path, '-r', '6', '--coreset', '-o', prefix]) == 0, "A coreset run should succeed."
+    assert '10 representatives' in capsys.readouterr().err, "The report should give the number of representatives."
+    labels = np.load(prefix + '.labels.npy')
+    assert len(labels) == 40 and np.all(np.bincount(labels) >= 6), "Labels should cover every original point."
+
+def test_cli_partition(tmp_path, capsys):
+    _, path = write_points(tmp_path, n=200, seed=5)
+    prefix = str(tmp_path / 'partitioned')
+    assert main([path, '-r', '3', '--partition', 'kdtree', '--partition-size', '50', '--queue',
+                 str(tmp_path / 'queue'), '--compare-global', '-o', prefix]) == 0, "A partitioned run should succeed."
+    assert 'x the global solution' in capsys.readouterr().err, "The report should compare with the global radius."
+    assert np.all(np.bincount(np.load(prefix + '.labels.npy')) >= 3), "Every cluster should have at least r points."
+
+def test_cli_partition_without_ratio(tmp_path, capsys):
+    # r = 1 has a zero lower bound, so there is no radius ratio to report
+    _, path = write_points(tmp_path, n=40)
+    assert main([path, '-r', '1', '--partition', 'kdtree', '--partition-size', '10', '-q']) == 0, "A partitioned run with r=1 should succeed quietly."
+    assert main([path, '-r', '1', '--partition', 'kdtree', '--partition-size', '10']) == 0, "A partitioned run with r=1 should succeed."
+    err = capsys.readouterr().err
+    assert '4 partitions' in err and 'x the' not in err, "The report should skip the missing ratio."
+
+def test_cli_coreset_partition_conflict(tmp_path, capsys):
+    _, path = write_points(tmp_path)
+    with pytest.raises(SystemExit) as error:
+        main([path, '-r', '3', '--coreset', '--partition', 'kdtree'])
+    assert error.value.code == 2 and 'cannot be combined' in capsys.readouterr().err, "Combining the modes should be a usage error."
+
+def test_cli_ignored_options(tmp_path, capsys):
+    _, path = write_points(tmp_path)
+    for mode, option in ((['--coreset'], ['--workers', '2']), (['--coreset'], ['--cache', str(tmp_path)]),
+                         (['--partition', 'kdtree'], ['--epsilon', '0.1']),
+                         (['--partition', 'kdtree'], ['--cache', str(tmp_path)])):
+        with pytest.raises(SystemExit) as error:
+            main([path, '-r', '3'] + mode + option)
+        assert error.value.code == 2 and f'{option[0]} cannot be combined with {mode[0]}' in capsys.readouterr().err, "Options a mode ignores should be a usage error."
+
+def test_cli_tsv_input(tmp_path):
+    coords = np.random.default_rng(6).uniform(0, 100, size=(30, 2))
+    path = str(tmp_path / 'points.tsv')
+    np.savetxt(path, coords, delimiter='\t', header='x\ty', comments='')
+    prefix = str(tmp_path / 'tsv')
+    assert main([path, '-r', '3', '-o', prefix, '-q']) == 0, "A .tsv file should be split on tabs by default."
+    assert len(np.load(prefix + '.labels.npy')) == 30, "Every row should be loaded."
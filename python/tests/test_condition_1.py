@@ -1,7 +1,9 @@
 import numpy as np
 from r_gather.data_structures import Point
 from r_gather.distance_matrix import compute_distance_matrix
-from r_gather.r_gather import check_condition_1
+from r_gather.r_gather import check_condition_1, check_condition_1_grid
+from r_gather.candidates import condition_1_threshold
+from r_gather.neighbor_index import DenseNeighborIndex
 
 def test_condition_1_basic():
     """测试基本情况：3个点形成等边三角形"""
@@ -80,9 +82,47 @@ def test_condition_1_paper_example():
     assert check_condition_1(dist_matrix, 3.0, r) == True
 
 
+def test_condition_1_threshold():
+    """测试预计算阈值与逐点计数结果一致"""
+    rng = np.random.default_rng(0)
+    points = [Point(id=i, coordinate=c) for i, c in enumerate(rng.uniform(0, 10, size=(60, 2)))]
+
+    dist_matrix = compute_distance_matrix(points)
+    index = DenseNeighborIndex(dist_matrix)
+
+    for r in (1, 2, 5, 60, 61):
+        threshold = condition_1_threshold(index, r)
+        for R in np.unique(dist_matrix / 2):
+            assert check_condition_1(dist_matrix, R, r, threshold=threshold) == check_condition_1(dist_matrix, R, r)
+
+
+def test_condition_1_grid():
+    """测试网格计数与距离矩阵计数结果一致（无需距离矩阵）"""
+    rng = np.random.default_rng(1)
+    for d in (1, 2, 3, 5):
+        coords = np.concatenate([rng.normal(0, 0.1, size=(40, d)), rng.uniform(0, 10, size=(40, d))])
+        points = [Point(id=i, coordinate=c) for i, c in enumerate(coords)]
+        dist_matrix = compute_distance_matrix(points)
+
+        for r in (1, 3, 10, 81):
+            # 取相邻候选半径的中点，避免两种距离计算在边界上的舍入差异
+            radii = np.unique(dist_matrix / 2)
+            for R in ((radii[1:] + radii[:-1]) / 2)[::250]:
+                expected = check_condition_1(dist_matrix, R, r)
+                assert check_condition_1_grid(None, R, r, points) == expected
+                assert check_condition_1_grid(dist_matrix, R, r, coords) == expected
+
+    # 高维时退回距离矩阵
+    coords = rng.uniform(0, 1, size=(30, 8))
+    dist_matrix = compute_distance_matrix(coords)
+    assert check_condition_1_grid(dist_matrix, 0.6, 3, coords) == check_condition_1(dist_matrix, 0.6, 3)
+
+
 if __name__ == '__main__':
     test_condition_1_basic()
     test_condition_1_edge_case()
     test_condition_1_insufficient()
     test_condition_1_paper_example()
+    test_condition_1_threshold()
+    test_condition_1_grid()
     print("All condition 1 tests passed.")
\ No newline at end of file
@@ -0,0 +1,74 @@
+import numpy as np
+from r_gather.adjacency import CSRAdjacency
+from r_gather.candidates import condition_1_threshold, weighted_condition_1_threshold
+from r_gather.coreset import build_coreset, compute_r_gather_coreset, weighted_search
+from r_gather.data_structures import PointSet
+from r_gather.neighbor_index import build_neighbor_index
+from r_gather.r_gather import compute_r_gather_sweep
+
+def duplicated_coordinates(seed=0, locations=25, n=150):
+    rng = np.random.default_rng(seed)
+    base = rng.integers(0, 40, size=(locations, 2)).astype(float)
+    return base[rng.integers(0, locations, size=n)]
+
+def test_build_coreset_duplicates():
+    coords = np.array([[1.0, 1.0], [0.0, 0.0], [1.0, 1.0], [5.0, 5.0], [0.0, 0.0], [1.0, 1.0]])
+    coreset = build_coreset(coords)
+    assert np.array_equal(coreset.representatives, [0, 1, 3]), "Representatives should be first occurrences in input order."
+    assert np.array_equal(coreset.weights, [3, 2, 1]), "Weights should count the duplicates."
+    assert np.array_equal(coreset.assignment, [0, 1, 0, 2, 1, 0]), "Every point should map to its representative."
+    assert np.array_equal(coreset.point_set().coordinates, [[1.0, 1.0], [0.0, 0.0], [5.0, 5.0]]), "The representative set should hold their coordinates."
+
+def test_build_coreset_tolerance():
+    rng = np.random.default_rng(1)
+    coords = np.concatenate([c + rng.normal(0, 0.01, size=(30, 3)) for c in rng.uniform(0, 100, size=(20, 3))])
+    coreset = build_coreset(coords, tolerance=0.2)
+    assert coreset.m < len(coords) and coreset.weights.sum() == len(coords), "Close points should be collapsed."
+    offsets = coords - coords[coreset.representatives[coreset.assignment]]
+    assert np.all(np.sqrt(np.sum(offsets ** 2, axis=1)) <= 0.2), "Every point should be within tolerance of its representative."
+
+def test_weighted_condition_1_threshold():
+    coords = duplicated_coordinates()
+    coreset = build_coreset(coords)
+    index = build_neighbor_index(coreset.point_set())
+    full_index = build_neighbor_index(coords)
+    for r in (1, 2, 5, 20, 150, 151):
+        expected = condition_1_threshold(full_index, r)
+        assert weighted_condition_1_threshold(index, r, coreset.weights) == expected, "The weighted threshold should equal the threshold of the expanded points."
+
+    adjacency = CSRAdjacency.from_rows([np.array([0, 1]), np.array([0, 1]), np.array([2])], 3)
+    assert np.array_equal(adjacency.weighted_degrees(np.array([2, 3, 4])), [5, 5, 4]), "Weighted degrees should sum the row weights."
+
+def test_coreset_matches_full_input():
+    for seed in range(4):
+        coords = duplicated_coordinates(seed)
+        coreset = build_coreset(coords)
+        for r in (2, 4, 9):
+            expected_R, _ = compute_r_gather_sweep(coords, [r])[r]
+            for flow_backend in ('matching', 'networkx'):
+                index = build_neighbor_index(coreset.point_set())
+                R, centers, allocations = weighted_search(index, coreset.weights, r, flow_backend=flow_backend)
+                assert R == expected_R, "Collapsing exact duplicates should not change the optimal R."
+
+                clusters = coreset.expand(centers, allocations)
+                assert np.all(clusters.labels >= 0), "Every point should be clustered."
+                assert np.all(clusters.sizes >= r), "Every cluster should hold at least r original points."
+                assert np.all(clusters.radii <= 2 * R), "Cluster radii should be at most 2R."
+
+def test_compute_r_gather_coreset():
+    rng = np.random.default_rng(2)
+    coords = np.concatenate([c + rng.normal(0, 0.01, size=(20, 2)) for c in rng.uniform(0, 100, size=(15, 2))])
+    points = PointSet(coords, ids=np.arange(100, 100 + len(coords)))
+    for search in ('linear', 'binary'):
+        clusters = compute_r_gather_coreset(points, 25, tolerance=0.1, search=search, backend='kdtree')
+        assert clusters.point_set is points and len(clusters.labels) == len(coords), "Labels should cover the original points."
+        assert np.all(clusters.sizes >= 25) and clusters.sizes.sum() == len(coords), "Every cluster should hold at least r original points."
+    assert len(compute_r_gather_coreset(coords, len(coords) + 1)) == 0, "r > n has no clustering."
+
+if __name__ == '__main__':
+    test_build_coreset_duplicates()
+    test_build_coreset_tolerance()
+    test_weighted_condition_1_threshold()
+    test_coreset_matches_full_input()
+    test_compute_r_gather_coreset()
+    print("All coreset tests passed.")
@@ -0,0 +1,88 @@
+import numpy as np
+from r_gather.data_structures import Cluster, ClusterResult, Point, PointSet, as_point_set
+from r_gather.distance_matrix import compute_distance_matrix
+from r_gather.r_gather import build_clusters_from_assignments, compute_r_gather
+
+def random_coordinates(n, d=2, seed=0):
+    return np.random.default_rng(seed).uniform(0, 100, size=(n, d))
+
+def test_point_set_from_points_zero_copy():
+    coords = random_coordinates(30)
+    points = [Point(id=i, coordinate=c) for i, c in enumerate(coords)]
+    point_set = PointSet.from_points(points)
+    assert np.shares_memory(point_set.coordinates, coords), "Rows of one array should be adopted without copying."
+    assert np.array_equal(point_set.ids, np.arange(30)), "Ids should be kept."
+
+    # A slice of the rows is still zero-copy
+    sliced = PointSet.from_points(points[5:12])
+    assert np.shares_memory(sliced.coordinates, coords), "Consecutive rows of one array should be adopted without copying."
+    assert np.array_equal(sliced.coordinates, coords[5:12]), "The adopted rows should be the sliced ones."
+
+def test_point_set_from_points_copy():
+    coords = random_coordinates(10)
+    points = [Point(id=i, coordinate=coords[i].copy()) for i in (3, 1, 2)]
+    point_set = PointSet.from_points(points)
+    assert np.array_equal(point_set.coordinates, coords[[3, 1, 2]]), "Independent coordinates should be stacked."
+    assert np.array_equal(point_set.ids, [3, 1, 2]), "Ids should be kept in order."
+
+    reversed_views = [Point(id=i, coordinate=coords[i]) for i in (2, 1, 0)]
+    point_set = PointSet.from_points(reversed_views)
+    assert np.array_equal(point_set.coordinates, coords[[2, 1, 0]]), "Out-of-order rows must not be adopted."
+
+def test_point_set_indexing():
+    coords = random_coordinates(5)
+    point_set = as_point_set(coords)
+    point = point_set[3]
+    assert point.id == 3 and np.shares_memory(point.coordinate, coords), "Indexing should give a Point view."
+    assert [p.id for p in point_set.to_points()] == list(range(5)), "to_points should cover every point."
+    assert as_point_set(point_set) is point_set, "A PointSet should pass through."
+
+def test_compute_r_gather_point_set():
+    coords = random_coordinates(40, seed=4)
+    points = [Point(id=i, coordinate=c.copy()) for i, c in enumerate(coords)]
+    from_list = compute_r_gather(points, 3)
+    from_set = compute_r_gather(PointSet(coords), 3)
+    assert [c.radius for c in from_list] == [c.radius for c in from_set], "PointSet and list inputs should agree."
+
+    member_indices = np.sort(np.concatenate([c.member_indices for c in from_set]))
+    assert np.array_equal(member_indices, np.arange(40)), "Every point should be in exactly one cluster."
+    for cluster in from_set:
+        assert np.array_equal(cluster.member_coordinates, coords[cluster.member_indices]), "Member coordinates should come from the set."
+        assert [m.id for m in cluster.members] == list(cluster.member_indices), "Members should materialize from the indices."
+
+def test_cluster_result_arrays():
+    coords = np.array([[0.0], [1.0], [10.0], [3.0], [12.0]])
+    point_set = PointSet(coords)
+    assignments = {0: 3, 1: 3, 2: 4, 3: 3, 4: 4}
+    result = build_clusters_from_assignments(point_set, [3, 4], assignments, compute_distance_matrix(point_set))
+    assert isinstance(result, ClusterResult), "Clusters should be returned as a ClusterResult."
+    assert np.array_equal(result.labels, [0, 0, 1, 0, 1]), "Clusters should be numbered by first appearance."
+    assert np.array_equal(result.centers, [3, 4]), "Center indices should follow cluster numbering."
+    assert np.allclose(result.radii, [3.0, 2.0]), "Radii should be the largest member distances."
+    assert np.array_equal(result.sizes, [3, 2]), "Sizes should count the labels."
+
+    assert len(result) == 2, "The result should behave like a sequence of clusters."
+    first, second = result
+    assert np.array_equal(first.member_indices, [0, 1, 3]) and first.radius == 3.0, "Clusters should materialize lazily."
+    assert np.array_equal(result[-1].member_indices, second.member_indices), "Negative indices should work."
+    assert [c.id for c in result[:2]] == [0, 1], "Slices should give clusters."
+
+    empty = ClusterResult.empty(point_set)
+    assert len(empty) == 0 and np.all(empty.labels == -1), "The empty result should have no clusters."
+
+def test_cluster_from_points():
+    members = [Point(id=i, coordinate=np.array([float(i), 0.0])) for i in range(3)]
+    cluster = Cluster(7, members[1].coordinate, members, 1.0)
+    assert cluster.members == members and cluster.size() == 3, "The positional form should keep its Point members."
+    assert np.array_equal(cluster.member_coordinates, [[0, 0], [1, 0], [2, 0]]), "Member coordinates should come from the Points."
+    indexed = Cluster.from_indices(7, members[1].coordinate, np.arange(3), 1.0, PointSet.from_points(members))
+    assert [p.id for p in indexed.members] == [0, 1, 2] and indexed.size() == 3, "Indexed members should materialize as Points."
+
+if __name__ == '__main__':
+    test_point_set_from_points_zero_copy()
+    test_point_set_from_points_copy()
+    test_point_set_indexing()
+    test_compute_r_gather_point_set()
+    test_cluster_result_arrays()
+    test_cluster_from_points()
+    print("All data structure tests passed.")
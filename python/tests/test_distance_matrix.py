@@ -1,6 +1,8 @@
 import numpy as np
 from r_gather.data_structures import Point, Cluster
-from r_gather.distance_matrix import compute_distance_matrix
+from r_gather.distance_matrix import (compute_condensed_distances, compute_distance_matrix,
+                                      compute_distance_matrix_blocked, condensed_index, condensed_size,
+                                      condensed_to_square, squared_threshold)
 
 def test_distance_matrix():
     points = [
@@ -52,9 +54,71 @@ def test_distance_matrix_half_unique():
     expected_unique_half = np.array([0.0, 2.5, 5.0])
     assert np.allclose(unique_half, expected_unique_half), "Unique half distance matrix computation is incorrect."
 
+def test_distance_matrix_blocked_matches_broadcast():
+    rng = np.random.default_rng(0)
+    coords = rng.uniform(-50, 50, size=(257, 16))
+    diff = coords[:, np.newaxis, :] - coords[np.newaxis, :, :]
+    expected = np.linalg.norm(diff, axis=-1)
+    for tile_size in (1, 7, 64, 1024):
+        distance_matrix = compute_distance_matrix_blocked(coords, tile_size=tile_size)
+        assert np.allclose(distance_matrix, expected, rtol=0, atol=1e-8), "Blocked distance matrix does not match broadcast result."
+        assert np.array_equal(distance_matrix, distance_matrix.T), "Blocked distance matrix should be exactly symmetric."
+        assert np.all(np.diag(distance_matrix) == 0), "Blocked distance matrix should have a zero diagonal."
+
+def test_distance_matrix_blocked_float32():
+    rng = np.random.default_rng(1)
+    coords = rng.uniform(0, 100, size=(100, 3))
+    diff = coords[:, np.newaxis, :] - coords[np.newaxis, :, :]
+    expected = np.linalg.norm(diff, axis=-1)
+    distance_matrix = compute_distance_matrix_blocked(coords, tile_size=16, dtype=np.float32)
+    assert distance_matrix.dtype == np.float32, "Distance matrix should use the requested dtype."
+    assert np.allclose(distance_matrix, expected, rtol=0, atol=1e-1), "Float32 distance matrix is outside tolerance."
+
+def test_distance_matrix_duplicates_at_offset():
+    rng = np.random.default_rng(4)
+    base = rng.uniform(0, 1000, size=(50, 2)) + 1e4
+    coords = np.vstack([base, base])
+    for dtype in (np.float64, np.float32):
+        distance_matrix = compute_distance_matrix_blocked(coords, tile_size=16, dtype=dtype)
+        assert np.all(np.diag(distance_matrix[:50, 50:]) == 0), "Duplicate points should be exactly 0 apart."
+        condensed = compute_condensed_distances(coords, tile_size=16, dtype=dtype, squared=True)
+        assert np.all(condensed[condensed_index(100, np.arange(50), np.arange(50, 100))] == 0), "Duplicate points should be exactly 0 apart."
+
+def test_condensed_distances():
+    coords = np.random.default_rng(2).uniform(0, 100, size=(123, 3))
+    distance_matrix = compute_distance_matrix_blocked(coords, tile_size=16)
+    upper = distance_matrix[np.triu_indices(123, k=1)]
+    condensed = compute_condensed_distances(coords, tile_size=16)
+    assert len(condensed) == condensed_size(123), "Condensed distances should store every pair once."
+    assert np.array_equal(condensed, upper), "Condensed distances should be the upper triangle in row-major order."
+    squared = compute_condensed_distances(coords, tile_size=16, squared=True)
+    assert np.array_equal(np.sqrt(squared), upper), "Rooted squared distances should equal the distances exactly."
+
+def test_condensed_index_helpers():
+    n = 37
+    k = np.arange(condensed_size(n))
+    i, j = condensed_to_square(n, k)
+    assert np.all(i < j) and np.all(j < n), "Condensed positions should map to pairs i < j."
+    assert np.array_equal(condensed_index(n, i, j), k), "condensed_index should invert condensed_to_square."
+    assert np.array_equal(condensed_index(n, j, i), k), "condensed_index should accept either order."
+    i, j = condensed_to_square(100_003, condensed_size(100_003) - 1)
+    assert (i, j) == (100_001, 100_002), "The last position should be the last pair."
+
+def test_squared_threshold():
+    for threshold in np.random.default_rng(3).uniform(0, 1000, size=1000):
+        limit = squared_threshold(threshold)
+        assert np.sqrt(limit) <= threshold < np.sqrt(np.nextafter(limit, np.inf)), "The squared threshold should be the largest square rooting to at most the threshold."
+    assert squared_threshold(np.inf) == np.inf and squared_threshold(-1.0) < 0, "Infinite and negative thresholds should stay comparable."
+
 if __name__ == '__main__':
     test_distance_matrix()
     test_distance_matrix_type()
     test_distance_matrix_half()
     test_distance_matrix_half_unique()
+    test_distance_matrix_blocked_matches_broadcast()
+    test_distance_matrix_blocked_float32()
+    test_distance_matrix_duplicates_at_offset()
+    test_condensed_distances()
+    test_condensed_index_helpers()
+    test_squared_threshold()
     print("All distance matrix tests passed.")
\ No newline at end of file
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+from r_gather.loaders import load_csv, load_npy, load_parquet, load_points
+from r_gather.r_gather import compute_r_gather
+
+def random_coordinates(n, d=2, seed=0):
+    return np.random.default_rng(seed).uniform(0, 100, size=(n, d))
+
+def write_csv(path, coords, header=True, delimiter=','):
+    with open(path, 'w') as f:
+        if header:
+            f.write('id' + delimiter + delimiter.join(f'x{k}' for k in range(coords.shape[1])) + '\n')
+        for i, row in enumerate(coords):
+            f.write(f'{100 + i}' + delimiter + delimiter.join(repr(float(v)) for v in row) + '\n')
+
+def test_load_npy_memmap(tmp_path):
+    coords = random_coordinates(50, d=3)
+    path = tmp_path / 'points.npy'
+    np.save(path, coords)
+    calls = []
+    points = load_points(str(path), progress=lambda done, total: calls.append((done, total)))
+    assert isinstance(points.coordinates, np.memmap), ".npy files should be memory-mapped."
+    assert np.array_equal(points.coordinates, coords), "Coordinates should round-trip."
+    assert calls == [(50, 50)], "Progress should be reported."
+    assert not isinstance(load_npy(str(path), mmap=False).coordinates, np.memmap), "mmap=False should read into RAM."
+
+def test_load_csv_chunks(tmp_path):
+    coords = random_coordinates(103, d=3, seed=1)
+    path = tmp_path / 'points.csv'
+    write_csv(path, coords)
+    calls = []
+    points = load_csv(str(path), id_column='id', chunk_rows=10,
+                      progress=lambda done, total: calls.append((done, total)))
+    assert np.array_equal(points.coordinates, coords), "Chunked parsing should reproduce the coordinates."
+    assert np.array_equal(points.ids, np.arange(100, 203)), "Ids should come from the id column."
+    assert len(calls) == 11 and calls[-1] == (103, 103), "Progress should be reported per chunk."
+
+    selected = load_csv(str(path), columns=['x2', 'x0'], chunk_rows=7)
+    assert np.array_equal(selected.coordinates, coords[:, [2, 0]]), "Named columns should be selected in order."
+
+def test_load_csv_out_path(tmp_path):
+    coords = random_coordinates(40, seed=2)
+    path = tmp_path / 'points.csv'
+    write_csv(path, coords, header=False)
+    out_path = tmp_path / 'points.npy'
+    points = load_csv(str(path), columns=[1, 2], header=False, chunk_rows=16, out_path=str(out_path))
+    assert isinstance(points.coordinates, np.memmap), "out_path should give a memmap."
+    assert np.array_equal(np.load(out_path), coords), "The memmap should hold the parsed coordinates."
+
+    clusters = compute_r_gather(points, 3)
+    expected = compute_r_gather(coords, 3)
+    assert [c.radius for c in clusters] == [c.radius for c in expected], "Loaded points should cluster like the array."
+
+def test_load_tsv(tmp_path):
+    coords = random_coordinates(20, d=2, seed=3)
+    path = tmp_path / 'points.tsv'
+    write_csv(path, coords, delimiter='\t')
+    points = load_points(str(path), id_column='id')
+    assert np.array_equal(points.coordinates, coords), ".tsv files should be split on tabs."
+    assert np.array_equal(points.ids, np.arange(100, 120)), "Ids should come from the id column."
+
+def test_load_parquet(tmp_path):
+    pa = pytest.importorskip('pyarrow')
+    pq = pytest.importorskip('pyarrow.parquet')
+    coords = random_coordinates(30, seed=3)
+    path = tmp_path / 'points.parquet'
+    pq.write_table(pa.table({'id': np.arange(30), 'x': coords[:, 0], 'y': coords[:, 1]}), path)
+    points = load_parquet(str(path), id_column='id', chunk_rows=8)
+    assert np.array_equal(points.coordinates, coords), "Parquet batches should reproduce the coordinates."
+    assert np.array_equal(points.ids, np.arange(30)), "Ids should come from the id column."
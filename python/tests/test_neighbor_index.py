@@ -0,0 +1,166 @@
+import numpy as np
+import pytest
+from r_gather.data_structures import Point
+from r_gather.distance_matrix import compute_distance_matrix, compute_distance_matrix_blocked
+from r_gather.neighbor_index import (CondensedNeighborIndex, DenseNeighborIndex, NeighborIndex,
+                                     TiledNeighborIndex, build_neighbor_index, as_neighbor_index)
+from r_gather.r_gather import compute_r_gather, compute_r_gather_binary_search, compute_r_gather_sweep
+
+def random_points(n, d=2, seed=0):
+    rng = np.random.default_rng(seed)
+    return [Point(id=i, coordinate=c) for i, c in enumerate(rng.uniform(0, 100, size=(n, d)))]
+
+def test_dense_index_queries():
+    points = [
+        Point(id=0, coordinate=np.array([0.0, 0.0])),
+        Point(id=1, coordinate=np.array([3.0, 4.0])),
+        Point(id=2, coordinate=np.array([6.0, 8.0])),
+    ]
+    index = as_neighbor_index(compute_distance_matrix(points))
+    assert isinstance(index, DenseNeighborIndex), "Dense matrices should be wrapped in DenseNeighborIndex."
+    assert np.array_equal(index.count_within(5.0), [2, 3, 2]), "Counts should include points exactly at the threshold."
+    assert np.array_equal(index.neighbors_within(1, 5.0), [0, 1, 2]), "Neighbors should include the point itself."
+    assert np.allclose(np.sort(index.pair_distances(0.0, 10.0)), [5.0, 5.0, 10.0]), "Pair distances are incorrect."
+
+def test_dense_index_grid_matches_matrix():
+    rng = np.random.default_rng(3)
+    for d in (1, 2, 3):
+        # Clustered and coincident points exercise the finer and coarser grids
+        coords = np.concatenate([rng.normal(0, 0.01, size=(60, d)), rng.uniform(0, 100, size=(60, d)),
+                                 np.zeros((5, d))])
+        matrix = compute_distance_matrix(coords)
+        grid_index = DenseNeighborIndex(matrix, coords=coords)
+        matrix_index = DenseNeighborIndex(matrix)
+        for k in (1, 2, 7, 125):
+            assert np.array_equal(grid_index.nearest_distances(k), matrix_index.nearest_distances(k)), "Grid nearest distances should match the matrix."
+            assert np.array_equal(grid_index.kth_distances(k), matrix_index.kth_distances(k)), "Grid k-th distances should match the matrix."
+        for threshold in (0.0, 0.01, 5.0, 50.0):
+            assert np.array_equal(grid_index.count_within(threshold), matrix_index.count_within(threshold)), "Grid counts should match the matrix."
+    assert build_neighbor_index(random_points(10)).coords is not None, "The dense backend should keep the coordinates for the grid."
+
+def test_kdtree_index_matches_dense():
+    pytest.importorskip('scipy')
+    points = random_points(200)
+    dense = build_neighbor_index(points, 'dense')
+    tree = build_neighbor_index(points, 'kdtree')
+    for threshold in (1.0, 5.0, 12.5):
+        assert np.array_equal(dense.count_within(threshold), tree.count_within(threshold)), "Counts differ between backends."
+        for i in (0, 17, 199):
+            assert np.array_equal(dense.neighbors_within(i, threshold), tree.neighbors_within(i, threshold)), "Neighbors differ between backends."
+
+def test_kdtree_includes_pairs_at_threshold():
+    pytest.importorskip('scipy')
+    points = random_points(300, seed=3)
+    tree = build_neighbor_index(points, 'kdtree')
+    i, j, d = tree._pairs_within(3.0)
+    for a, b, dist in zip(i[:500], j[:500], d[:500]):
+        assert b in tree.neighbors_within(a, dist), "A pair exactly at the threshold should be neighbors."
+
+def test_r_gather_kdtree_backend():
+    pytest.importorskip('scipy')
+    points = random_points(120, seed=7)
+    for search in (compute_r_gather, compute_r_gather_binary_search):
+        dense_clusters = search(points, 4)
+        tree_clusters = search(points, 4, backend='kdtree')
+        dense_centers = sorted(tuple(c.coordinate) for c in dense_clusters)
+        tree_centers = sorted(tuple(c.coordinate) for c in tree_clusters)
+        assert dense_centers == tree_centers, "Backends should select the same centers."
+        assert sum(c.size() for c in tree_clusters) == len(points), "All points should be clustered."
+
+def test_tiled_index_matches_dense():
+    coords = np.array([p.coordinate for p in random_points(150, seed=5)])
+    # Budgets small enough for several tiles and a CSR adjacency, and large
+    # enough for a bitset
+    for budget in (20_000, 10 ** 8):
+        tiled = TiledNeighborIndex.from_coords(coords, memory_budget=budget)
+        matrix = compute_distance_matrix_blocked(coords, tile_size=tiled.store.tile_rows)
+        assert np.array_equal(tiled.store.matrix, matrix), "The store should hold the blocked matrix."
+        dense = DenseNeighborIndex(matrix)
+        for threshold in (0.0, 10.0, 40.0):
+            assert np.array_equal(tiled.count_within(threshold), dense.count_within(threshold)), "Tiled counts should match dense."
+            adjacency = tiled.adjacency(threshold)
+            assert np.array_equal(adjacency.degrees(), dense.count_within(threshold)), "Tiled adjacency degrees should match dense."
+            assert np.array_equal(adjacency.neighbors(17), dense.neighbors_within(17, threshold)), "Tiled adjacency rows should match dense."
+        assert np.array_equal(tiled.nearest_distances(4), dense.nearest_distances(4)), "Tiled nearest distances should match dense."
+        assert np.array_equal(np.sort(tiled.pair_distances(5.0, 30.0)), np.sort(dense.pair_distances(5.0, 30.0))), "Tiled pair distances should match dense."
+        a, b = np.arange(150), np.arange(150)[::-1]
+        assert np.array_equal(tiled.distances_between(a, b), matrix[a, b]), "Tiled distances should match dense."
+        assert tiled.max_threshold() == matrix.max(), "The largest distance should be recorded while writing."
+        tiled.close()
+
+def test_r_gather_tiled_backend():
+    points = random_points(120, seed=7)
+    for search in (compute_r_gather, compute_r_gather_binary_search):
+        dense_clusters = search(points, 4)
+        tiled_clusters = search(points, 4, backend='tiled', memory_budget=50_000)
+        assert np.isclose(max(c.radius for c in tiled_clusters), max(c.radius for c in dense_clusters)), "Backends should find the same radius."
+        assert sum(c.size() for c in tiled_clusters) == len(points), "All points should be clustered."
+
+def test_condensed_index_matches_dense():
+    rng = np.random.default_rng(11)
+    # Rounded coordinates give ties exactly at the thresholds
+    coords = np.round(rng.uniform(0, 10, size=(140, 2)), 1)
+    matrix = compute_distance_matrix_blocked(coords, tile_size=32)
+    dense = DenseNeighborIndex(matrix)
+    for squared in (False, True):
+        condensed = CondensedNeighborIndex.from_coords(coords, squared=squared, tile_size=32)
+        # Small thresholds use the pair list, large ones full row tiles
+        for threshold in (0.0, matrix[3, 17], 1.0, matrix[5, 90], 12.0):
+            assert np.array_equal(condensed.count_within(threshold), dense.count_within(threshold)), "Condensed counts should match dense."
+            adjacency = condensed.adjacency(threshold)
+            assert np.array_equal(adjacency.degrees(), dense.count_within(threshold)), "Condensed adjacency degrees should match dense."
+            assert np.array_equal(adjacency.neighbors(40), dense.neighbors_within(40, threshold)), "Condensed adjacency rows should match dense."
+            assert np.array_equal(condensed.neighbors_within(40, threshold), dense.neighbors_within(40, threshold)), "Condensed neighbors should match dense."
+        assert np.array_equal(np.sort(condensed.pair_distances(1.0, 5.0)), np.sort(dense.pair_distances(1.0, 5.0))), "Condensed pair distances should match dense."
+        assert np.array_equal(condensed.nearest_distances(5), dense.nearest_distances(5)), "Condensed nearest distances should match dense."
+        a, b = np.arange(140), np.arange(140)[::-1]
+        assert np.array_equal(condensed.distances_between(a, b), matrix[a, b]), "Condensed distances should match dense."
+        assert condensed.max_threshold() == matrix.max(), "Condensed largest distance should match dense."
+
+def test_r_gather_condensed_backend():
+    points = random_points(120, seed=7)
+    for search in (compute_r_gather, compute_r_gather_binary_search):
+        dense_clusters = search(points, 4)
+        condensed_clusters = search(points, 4, backend='condensed')
+        assert np.isclose(max(c.radius for c in condensed_clusters), max(c.radius for c in dense_clusters)), "Backends should find the same radius."
+        assert sum(c.size() for c in condensed_clusters) == len(points), "All points should be clustered."
+
+def test_backends_agree_on_duplicates():
+    # Duplicated float points far from the origin: the Gram identity must
+    # not make them slightly apart, or R collapses to its rounding error;
+    # the kdtree backend computes every distance directly
+    rng = np.random.default_rng(12)
+    base = rng.uniform(0, 1000, size=(40, 2)) + 1e4
+    coords = np.vstack([base, base])
+    kdtree = compute_r_gather_sweep(coords, [2, 4], backend='kdtree')
+    for backend in ('dense', 'condensed', 'tiled'):
+        results = compute_r_gather_sweep(coords, [2, 4], backend=backend, memory_budget=50_000)
+        for r in (2, 4):
+            assert np.isclose(results[r][0], kdtree[r][0]), f"The {backend} backend should match kdtree (r={r})."
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        build_neighbor_index(random_points(5), 'octree')
+
+def test_incomplete_backend():
+    class CountOnly(NeighborIndex):
+        def count_within(self, threshold):
+            return np.ones(1, dtype=np.int64)
+
+    with pytest.raises(TypeError):
+        CountOnly()
+
+if __name__ == '__main__':
+    test_dense_index_queries()
+    test_dense_index_grid_matches_matrix()
+    test_kdtree_index_matches_dense()
+    test_kdtree_includes_pairs_at_threshold()
+    test_r_gather_kdtree_backend()
+    test_tiled_index_matches_dense()
+    test_r_gather_tiled_backend()
+    test_condensed_index_matches_dense()
+    test_r_gather_condensed_backend()
+    test_backends_agree_on_duplicates()
+    test_unknown_backend()
+    test_incomplete_backend()
+    print("All neighbor index tests passed.")
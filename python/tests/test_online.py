@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+from r_gather.data_structures import PointSet
+from r_gather.online import RGatherIndex
+from r_gather.r_gather import compute_r_gather_sweep
+
+def assert_valid(index):
+    clusters = index.result()
+    assert len(clusters.labels) == len(index), "The result should cover every point in the index."
+    if index.R is None:
+        assert len(clusters) == 0, "Without R there should be no clusters."
+        return
+    coords = clusters.point_set.coordinates
+    distances = np.sqrt(np.sum((coords - coords[clusters.centers[clusters.labels]]) ** 2, axis=1))
+    radii = np.zeros(len(clusters))
+    np.maximum.at(radii, clusters.labels, distances)
+    assert np.all(clusters.labels >= 0), "Every point should be assigned."
+    assert np.all(clusters.sizes >= index.r), "Every cluster should hold at least r points."
+    assert np.allclose(clusters.radii, radii), "Cluster radii should be the largest member distance."
+    assert np.all(radii <= 2 * index.R * (1 + 1e-9)), "Every member should be within 2R of its center."
+
+def test_online_initial_clustering():
+    coords = np.random.default_rng(0).uniform(0, 100, size=(150, 2))
+    index = RGatherIndex(coords, 4)
+    R, _ = compute_r_gather_sweep(coords, [4], search='binary')[4]
+    assert index.R == R, "The initial R should be the optimum of the binary search."
+    assert_valid(index)
+    assert index.recomputes == 1 and index.repairs == 0, "Building should be one global computation."
+
+def test_online_insert():
+    rng = np.random.default_rng(1)
+    index = RGatherIndex(rng.uniform(0, 100, size=(150, 2)), 4)
+    # Copies of existing points join a center within 2R
+    index.insert(PointSet(index.result().point_set.coordinates[:10] + 1e-6, np.arange(1000, 1010)))
+    assert index.repairs == 0 and index.recomputes == 1, "Points near a center should need no repair."
+    # A separate group of r close points becomes a new cluster by local repair
+    index.insert(PointSet(np.full((4, 2), 500.0) + rng.normal(0, 0.01, size=(4, 2)), np.arange(2000, 2004)))
+    assert index.repairs == 1 and index.recomputes == 1, "A new group should be clustered locally."
+    assert len(index) == 164 and 2003 in index, "Inserted points should be in the index."
+    assert_valid(index)
+
+def test_online_insert_escalates():
+    index = RGatherIndex(np.random.default_rng(2).uniform(0, 100, size=(100, 2)), 4)
+    R = index.R
+    # A single far point cannot form a cluster at R
+    index.insert(PointSet(np.array([[1000.0, 1000.0]]), np.array([100])))
+    assert index.recomputes == 2 and index.R > R, "An isolated point should escalate R."
+    assert_valid(index)
+
+def test_online_delete():
+    index = RGatherIndex(np.random.default_rng(3).uniform(0, 100, size=(200, 2)), 3)
+    centers = index.result().point_set.ids[index.result().centers[:5]]
+    index.delete(centers)
+    assert len(index) == 195 and centers[0] not in index, "Deleted points should leave the index."
+    assert index.recomputes == 1, "Deleting centers should be repaired locally."
+    assert_valid(index)
+    index.delete(index.result().point_set.ids[:193].copy())
+    assert index.R is None and len(index.result()) == 0, "Fewer than r points have no clustering."
+    with pytest.raises(KeyError):
+        index.delete([123456])
+
+def test_online_random_updates():
+    rng = np.random.default_rng(4)
+    index = RGatherIndex(rng.uniform(0, 100, size=(120, 2)), 3)
+    next_id = 120
+    for _ in range(25):
+        if rng.random() < 0.5:
+            index.delete(rng.choice(index.result().point_set.ids, size=int(rng.integers(1, 10)), replace=False))
+        else:
+            m = int(rng.integers(1, 10))
+            index.insert(PointSet(rng.uniform(0, 100, size=(m, 2)), np.arange(next_id, next_id + m)))
+            next_id += m
+        assert_valid(index)
+    with pytest.raises(ValueError):
+        index.insert(PointSet(np.zeros((1, 2)), index.result().point_set.ids[:1].copy()))
+
+if __name__ == '__main__':
+    test_online_initial_clustering()
+    test_online_insert()
+    test_online_insert_escalates()
+    test_online_delete()
+    test_online_random_updates()
+    print("All online tests passed.")
@@ -0,0 +1,103 @@
+import os
+import time
+import numpy as np
+import pytest
+from r_gather.neighbor_index import pairwise_distances
+from r_gather.partition import (WorkQueue, compute_r_gather_partitioned, grid_partition, kd_partition,
+                                radius_lower_bound, serve_queue)
+from r_gather.r_gather import compute_r_gather_sweep
+
+def assert_valid(clusters, r):
+    coords = clusters.point_set.coordinates
+    radii = np.zeros(len(clusters))
+    np.maximum.at(radii, clusters.labels, pairwise_distances(coords, coords[clusters.centers[clusters.labels]]))
+    assert np.all(clusters.labels >= 0), "Every point should be assigned."
+    assert np.all(clusters.sizes >= r), "Every cluster should hold at least r points."
+    assert np.allclose(clusters.radii, radii), "Cluster radii should be the largest member distance."
+
+def test_kd_partition():
+    coords = np.random.default_rng(0).uniform(0, 100, size=(1000, 3))
+    parts, boxes = kd_partition(coords, 100)
+    assert np.array_equal(np.sort(np.concatenate(parts)), np.arange(1000)), "Parts should cover every point once."
+    assert all(50 <= len(part) <= 100 for part in parts), "Parts should hold between leaf_size / 2 and leaf_size points."
+    for part, (lo, hi) in zip(parts, boxes):
+        assert np.all((coords[part] >= lo) & (coords[part] <= hi)), "Every point should lie in its part's cell."
+
+def test_grid_partition():
+    coords = np.random.default_rng(1).uniform(0, 100, size=(500, 2))
+    parts, boxes = grid_partition(coords, 4)
+    assert len(parts) == 16, "Every cell of a uniform sample should be occupied."
+    assert np.array_equal(np.sort(np.concatenate(parts)), np.arange(500)), "Parts should cover every point once."
+    for part, (lo, hi) in zip(parts, boxes):
+        assert np.all((coords[part] >= lo) & (coords[part] <= hi)), "Every point should lie in its part's cell."
+
+def test_partitioned_r_gather():
+    coords = np.random.default_rng(2).uniform(0, 100, size=(1200, 2))
+    global_R, global_clusters = compute_r_gather_sweep(coords, [4], search='binary')[4]
+    for method in ('kdtree', 'grid'):
+        clusters, report = compute_r_gather_partitioned(coords, 4, method=method, partition_size=200, compare=True)
+        assert_valid(clusters, 4)
+        assert report.global_R == global_R, "The global comparison should run the binary search."
+        assert report.ratio == clusters.radii.max() / global_clusters.radii.max(), "The ratio should compare the largest radii."
+        assert report.lower_bound <= global_clusters.radii.max(), "The lower bound should hold for the global solution."
+        assert report.sizes.sum() == 1200 and report.band > 0, "Boundary clusters should be stitched."
+
+def test_partitioned_small_cells():
+    # Most grid cells hold fewer than r points; the stitching pass clusters them
+    coords = np.random.default_rng(3).uniform(0, 100, size=(300, 2))
+    clusters, report = compute_r_gather_partitioned(coords, 5, method='grid', partition_size=3)
+    assert_valid(clusters, 5)
+    assert report.stitched and np.isnan(report.partition_R).any(), "Parts without a clustering should be stitched."
+    clusters, report = compute_r_gather_partitioned(coords[:4], 5)
+    assert len(clusters) == 0 and report.R is None, "Fewer than r points have no clustering."
+    with pytest.raises(ValueError):
+        compute_r_gather_partitioned(coords, 5, method='octree')
+
+def test_work_queue(tmp_path):
+    coords = np.random.default_rng(4).uniform(0, 100, size=(800, 2))
+    local, _ = compute_r_gather_partitioned(coords, 3, partition_size=200)
+    queued, _ = compute_r_gather_partitioned(coords, 3, partition_size=200, queue_dir=str(tmp_path))
+    assert np.array_equal(local.labels, queued.labels), "Queued parts should give the same clustering."
+    assert not any(list((tmp_path / state).iterdir()) for state in ('pending', 'claimed', 'done')), "The run should clean up its tasks."
+
+    # Tasks submitted without local workers are solved by serve_queue
+    queue = WorkQueue(str(tmp_path))
+    queue.submit('task', coords[:100], 3)
+    assert queue.result('task') is None, "A pending task should have no result."
+    assert serve_queue(str(tmp_path)) == 1 and queue.claim() is None, "The worker should drain the queue."
+    R, labels, centers = queue.result('task')
+    expected_R, expected = compute_r_gather_sweep(coords[:100], [3], search='binary')[3]
+    assert R == expected_R and np.array_equal(labels, expected.labels), "The worker should solve the task."
+
+def test_work_queue_abandoned_claim(tmp_path):
+    coords = np.random.default_rng(6).uniform(0, 100, size=(100, 2))
+    queue = WorkQueue(str(tmp_path), lease=60.0)
+    queue.submit('task', coords, 3)
+    # A worker claims the task and dies
+    assert queue.claim() == 'task' and queue.claim() is None, "A claimed task should not be handed out again."
+    assert queue.requeue_expired() == 0, "A fresh claim should keep its lease."
+    expired = time.time() - 120
+    os.utime(tmp_path / 'claimed' / 'task.npz', (expired, expired))
+    assert serve_queue(str(tmp_path), lease=60.0) == 1, "An expired claim should be requeued and solved."
+    assert queue.result('task') is not None and not list((tmp_path / 'claimed').iterdir()), "The task should be done."
+
+def test_radius_lower_bound():
+    coords = np.random.default_rng(5).uniform(0, 100, size=(200, 2))
+    for r in (2, 5):
+        _, clusters = compute_r_gather_sweep(coords, [r], search='binary')[r]
+        assert radius_lower_bound(coords, r) <= clusters.radii.max(), "No clustering should beat the lower bound."
+    assert radius_lower_bound(coords, 201) is None and radius_lower_bound(coords, 1) == 0.0
+
+if __name__ == '__main__':
+    import tempfile
+    from pathlib import Path
+    test_kd_partition()
+    test_grid_partition()
+    test_partitioned_r_gather()
+    test_partitioned_small_cells()
+    with tempfile.TemporaryDirectory() as directory:
+        test_work_queue(Path(directory))
+    with tempfile.TemporaryDirectory() as directory:
+        test_work_queue_abandoned_claim(Path(directory))
+    test_radius_lower_bound()
+    print("All partition tests passed.")
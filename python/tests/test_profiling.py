@@ -0,0 +1,47 @@
+import json
+import numpy as np
+from r_gather.profiling import PROBE_OUTCOMES, Profiler
+from r_gather.r_gather import compute_r_gather, compute_r_gather_binary_search
+
+def random_coordinates(n, d=2, seed=0):
+    return np.random.default_rng(seed).uniform(0, 100, size=(n, d))
+
+def test_profiler_linear_search():
+    coords = random_coordinates(80)
+    with Profiler() as profiler:
+        clusters = compute_r_gather(coords, 4, profiler=profiler)
+    assert [c.radius for c in clusters] == [c.radius for c in compute_r_gather(coords, 4)], "Profiling should not change the result."
+
+    for phase in ('distance_matrix', 'candidates', 'condition_1', 'adjacency', 'initial_clustering',
+                  'flow', 'flow_network', 'max_flow', 'clusters'):
+        assert phase in profiler.times, f"Phase {phase} should be timed."
+    assert profiler.wall_time >= profiler.times['flow'], "Wall time should cover the phases."
+
+    assert profiler.probes[-1]['outcome'] == 'accepted', "The scan should end with the accepted R."
+    assert all(p['outcome'] in PROBE_OUTCOMES for p in profiler.probes), "Outcomes should be known."
+    last = profiler.probes[-1]
+    assert last['vertices'] == 80 + last['centers'] + 2, "V should count source, sink, centers and points."
+    assert last['edges'] > 80 + last['centers'], "E should include the center -> point edges."
+
+def test_profiler_binary_search_json(tmp_path):
+    coords = random_coordinates(120, seed=2)
+    with Profiler(trace_memory=True) as profiler:
+        compute_r_gather_binary_search(coords, 3, profiler=profiler)
+    rejections = profiler.rejections()
+    assert rejections.get('accepted', 0) >= 1 and len(rejections) >= 2, "Binary search should accept and reject probes."
+    assert sum(profiler.counters.values()) == profiler.counts['flow'], "Every flow call is a warm start or a rebuild."
+    assert profiler.peak_bytes['distance_matrix'] >= 120 * 120 * 8, "The distance matrix allocation should be traced."
+
+    path = tmp_path / 'profile.json'
+    profiler.to_json(str(path))
+    data = json.loads(path.read_text())
+    assert data['probe_count'] == len(profiler.probes), "JSON should carry the probes."
+    assert data['phases']['flow']['calls'] == profiler.counts['flow'], "JSON should carry the phase counts."
+    assert data['peak_rss_bytes'] > 0, "Peak RSS should be reported."
+
+if __name__ == '__main__':
+    import tempfile, pathlib
+    test_profiler_linear_search()
+    with tempfile.TemporaryDirectory() as directory:
+        test_profiler_binary_search_json(pathlib.Path(directory))
+    print("All profiling tests passed.")
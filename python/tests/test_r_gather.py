@@ -1,7 +1,9 @@
 import numpy as np
 from r_gather.data_structures import Point, Cluster
 from r_gather.distance_matrix import compute_distance_matrix
-from r_gather.r_gather import compute_r_gather, check_condition_1, check_condition_2, initial_clustering
+import r_gather.r_gather as r_gather_module
+from r_gather.neighbor_index import build_neighbor_index
+from r_gather.r_gather import compute_r_gather, compute_r_gather_binary_search, compute_r_gather_sweep, iter_r_gather_sweep, check_condition_1, check_condition_2, initial_clustering, binary_search, check_radius
 from r_gather.flow_network import flow_network_verification, build_flow_network
 
 def test_simple_clustering():
@@ -89,6 +91,41 @@ def test_initial_clustering_single_cluster():
     assert len(centers) == 1, f"Expected 1 center, got {len(centers)}"
 
 
+def reference_initial_clustering(dist_matrix, R, r):
+    # Original restart-from-the-beginning greedy
+    n = dist_matrix.shape[0]
+    marked = np.zeros(n, dtype=bool)
+    centers = []
+    while not np.all(marked):
+        found_center = False
+        for p_idx in np.where(~marked)[0]:
+            within_2R = dist_matrix[p_idx] <= 2 * R
+            if np.sum(within_2R) >= r:
+                centers.append(p_idx)
+                marked[within_2R] = True
+                found_center = True
+                break
+        if not found_center:
+            break
+    if not np.all(marked):
+        return []
+    return centers
+
+
+def test_initial_clustering_matches_greedy():
+    """测试单遍游标实现与原贪心算法选出的中心完全一致"""
+    rng = np.random.default_rng(0)
+    for _ in range(30):
+        points = [
+            Point(id=i, coordinate=c)
+            for i, c in enumerate(rng.uniform(0, 10, size=(int(rng.integers(5, 60)), 2)))
+        ]
+        dist_matrix = compute_distance_matrix(points)
+        r = int(rng.integers(1, 6))
+        R = float(rng.uniform(0.2, 3.0))
+        assert initial_clustering(dist_matrix, R, r) == reference_initial_clustering(dist_matrix, R, r)
+
+
 def test_flow_network_basic():
     """测试基本流网络验证"""
     points = [
@@ -210,6 +247,7 @@ def test_condition_2_failure():
     
     assert not success, "Condition 2 should fail with isolated point"
     assert len(clusters) == 0, "Should return empty clusters on failure"
+    assert clusters.point_set.n == len(points), "The empty clustering should keep the points"
 
 
 def test_paper_example():
@@ -395,11 +433,120 @@ def test_cluster_assignment_consistency():
         assert len(assigned_point_ids) == len(points), "All points should be assigned exactly once"
 
 
+def test_binary_search_parallel_workers():
+    """测试多进程k叉搜索与串行二分搜索结果一致"""
+    rng = np.random.default_rng(5)
+    points = [
+        Point(id=i, coordinate=c)
+        for i, c in enumerate(rng.uniform(0, 100, size=(60, 2)))
+    ]
+
+    for r in (2, 4):
+        serial = compute_r_gather_binary_search(points, r)
+        parallel = compute_r_gather_binary_search(points, r, workers=3)
+        assert sorted(tuple(c.coordinate) for c in serial) == sorted(tuple(c.coordinate) for c in parallel)
+        assert sum(c.size() for c in parallel) == len(points)
+
+
+def test_binary_search_failure_result():
+    """测试串行二分搜索失败时返回空的ClusterResult"""
+    class TooSmallRadii:
+        threshold = None
+
+        def windows(self):
+            yield np.array([0.1, 0.2, 0.3]), True
+
+    coords = np.array([[0.0, 0.0], [10.0, 0.0], [20.0, 0.0], [30.0, 0.0]])
+    index = build_neighbor_index(coords)
+    R, clusters = binary_search(coords, index, TooSmallRadii(), 2)
+    assert R is None and len(clusters) == 0, "No feasible radius should give an empty clustering"
+    assert np.array_equal(clusters.point_set.coordinates, coords), "The empty clustering should keep the points"
+    success, clusters = check_radius(coords, index, 0.1, 2)
+    assert not success and len(clusters) == 0 and clusters.point_set.n == 4, "A failed probe should return an empty ClusterResult"
+
+
+def test_sweep_matches_per_r():
+    """测试多r扫描与逐个r单独计算的结果一致"""
+    rng = np.random.default_rng(7)
+    points = [
+        Point(id=i, coordinate=c)
+        for i, c in enumerate(rng.uniform(0, 100, size=(50, 2)))
+    ]
+    r_values = [5, 1, 3, 2, 51]
+
+    sweep = compute_r_gather_sweep(points, r_values)
+    assert sorted(sweep) == [1, 2, 3, 5, 51]
+    for r in (1, 2, 3, 5):
+        R, clusters = sweep[r]
+        expected = compute_r_gather(points, r)
+        assert sorted(tuple(c.coordinate) for c in clusters) == sorted(tuple(c.coordinate) for c in expected)
+        assert max(c.radius for c in clusters) <= 2 * R
+    # r > n 无解
+    assert sweep[51][0] is None and len(sweep[51][1]) == 0
+
+    # 流式输出按r升序, 且R单调不减
+    streamed = list(iter_r_gather_sweep(points, r_values, search='binary'))
+    assert [r for r, _, _ in streamed] == [1, 2, 3, 5, 51]
+    radii = [R for _, R, _ in streamed if R is not None]
+    assert radii == sorted(radii)
+
+    # 多进程扫描: 所有r共用一个进程池
+    started = []
+
+    class CountingProber(r_gather_module.ParallelProber):
+        def __init__(self, *args, **kwargs):
+            started.append(args)
+            super().__init__(*args, **kwargs)
+
+    original = r_gather_module.ParallelProber
+    r_gather_module.ParallelProber = CountingProber
+    try:
+        parallel = compute_r_gather_sweep(points, r_values, search='binary', workers=2)
+    finally:
+        r_gather_module.ParallelProber = original
+    assert len(started) == 1, "The sweep should start one prober for all r"
+    serial = compute_r_gather_sweep(points, r_values, search='binary')
+    assert all(parallel[r][0] == serial[r][0] for r in r_values)
+
+
+
+def test_approximate_epsilon():
+    """测试近似模式：R在精确最优值的(1+ε)倍以内"""
+    rng = np.random.default_rng(11)
+    points = [
+        Point(id=i, coordinate=c)
+        for i, c in enumerate(rng.uniform(0, 100, size=(80, 2)))
+    ]
+
+    for r in (1, 3, 6):
+        exact = compute_r_gather_sweep(points, [r])[r][0]
+        for epsilon in (0.5, 0.05):
+            for search in ('linear', 'binary'):
+                R, clusters = compute_r_gather_sweep(points, [r], search=search, epsilon=epsilon)[r]
+                assert exact <= R < (1 + epsilon) * exact
+                assert sum(c.size() for c in clusters) == len(points)
+                assert min(c.size() for c in clusters) >= r
+                assert max(c.radius for c in clusters) <= 2 * R
+
+    clusters = compute_r_gather_binary_search(points, 4, epsilon=0.1)
+    assert min(c.size() for c in clusters) >= 4
+
+    # Every point duplicated: the Condition 1 threshold is 0
+    coords = np.array([0, 0, 1, 1, 2, 2, 3, 3.])[:, None]
+    assert compute_r_gather_sweep(coords, [2], epsilon=0.1)[2][0] == 0.5
+    for clusters in (compute_r_gather(coords, 2, epsilon=0.1),
+                     compute_r_gather_binary_search(coords, 2, epsilon=0.1, workers=2),
+                     compute_r_gather_binary_search(coords, 2, backend='kdtree', epsilon=0.1)):
+        assert sum(c.size() for c in clusters) == len(coords)
+        assert min(c.size() for c in clusters) >= 2
+
+
 if __name__ == '__main__':
     test_simple_clustering()
     test_initial_clustering_two_groups()
     test_initial_clustering_failure()
     test_initial_clustering_single_cluster()
+    test_initial_clustering_matches_greedy()
     test_flow_network_basic()
     test_flow_network_structure()
     test_flow_network_insufficient_capacity()
@@ -414,4 +561,8 @@ if __name__ == '__main__':
     test_condition_1_with_various_r()
     test_no_valid_clustering()
     test_cluster_assignment_consistency()
+    test_binary_search_parallel_workers()
+    test_binary_search_failure_result()
+    test_sweep_matches_per_r()
+    test_approximate_epsilon()
     print("All r-Gather tests passed.")
\ No newline at end of file
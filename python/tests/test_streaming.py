@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+from r_gather.data_structures import PointSet
+from r_gather.neighbor_index import build_neighbor_index
+from r_gather.profiling import Profiler
+from r_gather.r_gather import check_radius, compute_r_gather_sweep
+from r_gather.streaming import SlidingWindow, seeded_search, stream_r_gather
+
+def random_records(seed=0, n=400, duration=100.0):
+    rng = np.random.default_rng(seed)
+    timestamps = np.sort(rng.uniform(0, duration, size=n))
+    coords = rng.uniform(0, 100, size=(n, 2))
+    return [(t, i, c) for i, (t, c) in enumerate(zip(timestamps, coords))]
+
+def assert_valid(clusters, R, r):
+    coords = clusters.point_set.coordinates
+    distances = np.sqrt(np.sum((coords - coords[clusters.centers[clusters.labels]]) ** 2, axis=1))
+    assert np.all(clusters.labels >= 0), "Every point should be assigned."
+    assert np.all(clusters.sizes >= r), "Every cluster should hold at least r points."
+    assert np.all(distances <= 2 * R), "Every member should be within 2R of its center."
+
+def window_points(records, start, end):
+    selected = [(i, c) for t, i, c in records if start <= t < end]
+    return np.array([i for i, _ in selected]), np.array([c for _, c in selected])
+
+def test_sliding_window_matrix():
+    rng = np.random.default_rng(0)
+    live = SlidingWindow(3, capacity=4)
+    coords = rng.uniform(0, 10, size=(30, 3))
+    live.add(np.arange(20), np.arange(20), coords[:20])
+    assert live.expire(7) == 7 and len(live) == 13, "Points before the cutoff should expire."
+    live.add(np.arange(20, 30), np.arange(20, 30), coords[20:])
+    expected = build_neighbor_index(coords[live.ids], backend='kdtree')
+    full = expected.distances_between(*np.indices((len(live), len(live))).reshape(2, -1)).reshape(len(live), -1)
+    assert np.array_equal(live.index().distance_matrix, full), "The window matrix should hold the live points' distances."
+    assert np.array_equal(live.coordinates, coords[live.ids]), "Coordinates should follow their ids."
+
+def test_seeded_search_matches_binary_search():
+    coords = np.random.default_rng(1).uniform(0, 100, size=(120, 2))
+    index = build_neighbor_index(coords, backend='kdtree')
+    R, _ = compute_r_gather_sweep(coords, [4], backend='kdtree', search='binary')[4]
+    seeded_R, _ = seeded_search(PointSet(coords), index, 4, None)
+    assert seeded_R == R, "Without a seed the search should equal the binary search."
+    for seed in (0.0, R / 2, R, R * 1.01, R * 3, 1e6):
+        seeded_R, clusters = seeded_search(PointSet(coords), index, 4, seed)
+        assert_valid(clusters, seeded_R, 4)
+        if check_radius(PointSet(coords), index, seed, 4)[0]:
+            assert seeded_R <= seed, f"A feasible seed should bound the result (seed {seed})."
+        else:
+            assert seeded_R > seed, f"An infeasible seed should bound the result from below (seed {seed})."
+
+def check_stream(records, step):
+    profiler = Profiler()
+    results = list(stream_r_gather(iter(records), 4, 20.0, step=step, batch_size=16, profiler=profiler))
+    step = 20.0 if step is None else step
+    assert len(results) == profiler.counters['stream_windows'], "Every window should be counted."
+    assert profiler.counters['stream_records'] == len(records), "Every record should be consumed."
+    for k, result in enumerate(results):
+        assert result.start == pytest.approx(records[0][0] + k * step), "Windows should advance by step."
+        ids, coords = window_points(records, result.start, result.end)
+        assert np.array_equal(np.sort(result.clusters.point_set.ids), ids), "A window should hold exactly its records."
+        assert_valid(result.clusters, result.R, 4)
+        if k == 0:
+            R, _ = compute_r_gather_sweep(coords, [4], backend='kdtree', search='binary')[4]
+            assert result.R == R, "The first window should get the binary search result."
+        assert result.latency >= 0 and result.throughput > 0, "Latency and throughput should be reported."
+
+def test_stream_r_gather_tumbling():
+    check_stream(random_records(0), None)
+
+def test_stream_r_gather_sliding():
+    check_stream(random_records(1), 10.0)
+    check_stream(random_records(2), 30.0)
+
+def test_stream_r_gather_gaps():
+    records = [(t, i, np.array([float(i), 0.0])) for i, t in enumerate([0, 1, 2, 3, 50, 51, 52, 53])]
+    results = list(stream_r_gather(records, 2, 10.0))
+    assert [result.start for result in results] == [0, 50], "Empty windows should be skipped."
+    assert all(result.R == 0.5 for result in results), "Both windows should pair up neighbors."
+    # A gap longer than the window: sliding windows that still hold points are emitted
+    records = [(t, t, np.array([float(t), 0.0])) for t in [0, 1, 2, 3, 4, 5, 100]]
+    results = list(stream_r_gather(records, 2, 10.0, step=1.0))
+    assert [result.start for result in results] == list(range(0, 6)) + list(range(91, 101)), "Every window holding points should be emitted."
+    assert [len(result.clusters.point_set.ids) for result in results[:6]] == [6, 5, 4, 3, 2, 1], "Windows should expire their oldest points."
+    small = list(stream_r_gather(records[:3], 4, 10.0))
+    assert small[0].R is None and len(small[0].clusters) == 0, "A window with fewer than r points has no clustering."
+    with pytest.raises(ValueError):
+        list(stream_r_gather(records[::-1], 2, 10.0))
+
+if __name__ == '__main__':
+    test_sliding_window_matrix()
+    test_seeded_search_matches_binary_search()
+    test_stream_r_gather_tumbling()
+    test_stream_r_gather_sliding()
+    test_stream_r_gather_gaps()
+    print("All streaming tests passed.")